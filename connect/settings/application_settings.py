@@ -13,7 +13,20 @@ env = environ.Env(
     GOOGLE_ANALYTICS_PROPERTY_ID=(str, 'UA-0-0'),
     GOOGLE_ANALYTICS_DEBUG_MODE=(bool, False),
     ICON_PREFIX=(str, "glyphicon glyphicon-"),
-    GROUP_MEMBER_LIST_PAGINATION_SIZE=(int, 40)
+    GROUP_MEMBER_LIST_PAGINATION_SIZE=(int, 40),
+    DAILY_DIGEST_HOUR=(int, 7),
+    NOTIFICATION_COALESCE_WINDOW=(int, 0),
+    USER_AGENT_CACHE_SIZE=(int, 2000),
+    USER_AGENT_SHARED_CACHE=(bool, False),
+    EMAIL_OPEN_RETENTION_DAYS=(int, 14),
+    VISIT_RETENTION_DAYS=(int, 0),
+    SHORTENED_URL_CLICK_RETENTION_DAYS=(int, 365),
+    RETENTION_BATCH_SIZE=(int, 5000),
+    EMAIL_SPOOL_MAX_ATTEMPTS=(int, 8),
+    EMAIL_SPOOL_BACKOFF=(int, 60),
+    EMAIL_SPOOL_LEASE=(int, 10*60),
+    OUTGOING_EMAIL_RETENTION_DAYS=(int, 7),
+    REPORT_EXPORT_REUSE_MINUTES=(int, 60)
 )
 
 
@@ -79,3 +92,67 @@ ICON_PREFIX = env('ICON_PREFIX')
 
 # Total number of group members to paginate by on the "Group Member List" page
 GROUP_MEMBER_LIST_PAGINATION_SIZE = env('GROUP_MEMBER_LIST_PAGINATION_SIZE')
+
+
+# The hour (0-23), in each user's own timezone, that daily digests are sent.
+# Digests are spread across hourly buckets so users in different timezones
+# are not all sent mail at the same moment.
+DAILY_DIGEST_HOUR = env('DAILY_DIGEST_HOUR')
+
+# Number of seconds within which immediate notifications for the same user
+# and thread are merged into a single email. The first notification is always
+# sent right away, any others in the window are sent together when it ends.
+# Set to 0 (the default) to send one email per message.
+NOTIFICATION_COALESCE_WINDOW = env('NOTIFICATION_COALESCE_WINDOW')
+
+
+# Parsing a useragent is expensive but the same few hundred useragents make up
+# nearly all traffic. Parsed useragents are kept in a per-process LRU cache of
+# `USER_AGENT_CACHE_SIZE` entries and, if `USER_AGENT_SHARED_CACHE` is enabled,
+# are also shared between processes through the default cache.
+USER_AGENT_CACHE_SIZE = env('USER_AGENT_CACHE_SIZE')
+USER_AGENT_SHARED_CACHE = env('USER_AGENT_SHARED_CACHE')
+
+
+# Tracking tables grow with every email and page view. Each retention policy
+# maps a model (as `app_label.ModelName`) to the datetime field rows are aged
+# by and the number of days rows are kept. A policy of 0 days keeps rows
+# forever, which is the default for visits as the user report shows each
+# user's all-time visit count. Expired rows are deleted `RETENTION_BATCH_SIZE`
+# at a time so that a large purge never holds a long lock on the table.
+RETENTION_POLICIES = {
+    'mailer.EmailOpen': {
+        'field': 'opened_at',
+        'days': env('EMAIL_OPEN_RETENTION_DAYS')
+    },
+    'accounts.Visit': {
+        'field': 'created_at',
+        'days': env('VISIT_RETENTION_DAYS')
+    },
+    'media.ShortenedURLClick': {
+        'field': 'created_at',
+        'days': env('SHORTENED_URL_CLICK_RETENTION_DAYS')
+    },
+    'mailer.OutgoingEmail': {
+        'field': 'created_at',
+        'days': env('OUTGOING_EMAIL_RETENTION_DAYS')
+    }
+}
+RETENTION_BATCH_SIZE = env('RETENTION_BATCH_SIZE')
+
+
+# Rendered emails are saved to an outbound spool before they are sent. If an
+# email can't be handed to the email backend it is retried after
+# `EMAIL_SPOOL_BACKOFF` seconds, doubling after every failed attempt, until it
+# has been tried `EMAIL_SPOOL_MAX_ATTEMPTS` times. While an email is being sent
+# it is leased for `EMAIL_SPOOL_LEASE` seconds, after which it is assumed the
+# sending process died and the email is retried.
+EMAIL_SPOOL_MAX_ATTEMPTS = env('EMAIL_SPOOL_MAX_ATTEMPTS')
+EMAIL_SPOOL_BACKOFF = env('EMAIL_SPOOL_BACKOFF')
+EMAIL_SPOOL_LEASE = env('EMAIL_SPOOL_LEASE')
+
+
+# Report exports are generated in the background. If the same export (the same
+# report with the same filters and ordering) is requested again within
+# `REPORT_EXPORT_REUSE_MINUTES` of finishing, the finished file is reused.
+REPORT_EXPORT_REUSE_MINUTES = env('REPORT_EXPORT_REUSE_MINUTES')
@@ -6,7 +6,8 @@ env = environ.Env(
     LOGIN_REDIRECT_URL=(str, '/messages/'),
     POST_LOGOUT_PAGE=(str, '/'),
     ACCOUNT_EMAIL_VERIFICATION=(str, 'optional'),
-    ACCOUNT_IGNORE_UNSUBSCRIBE=(bool, True)
+    ACCOUNT_IGNORE_UNSUBSCRIBE=(bool, True),
+    REQUIRE_INVITE=(bool, False)
 )
 
 
@@ -48,6 +49,9 @@ SIGNUP_URL = '/user/signup/'
 LOGIN_REDIRECT_URL = env('LOGIN_REDIRECT_URL')
 LOGOUT_REDIRECT_URL = env('POST_LOGOUT_PAGE')
 
+# Whether users must enter an invite code before they can use Connect
+REQUIRE_INVITE = env('REQUIRE_INVITE')
+
 
 AUTHENTICATION_BACKENDS = (
     # Needed to login by username in Django admin, regardless of `allauth`
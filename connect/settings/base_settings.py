@@ -22,6 +22,9 @@ env = environ.Env(
     SESSION_COOKIE_SECURE=(bool, False),
     SECURE_PROXY_SSL_HEADER=(tuple, ('HTTP_X_FORWARDED_PROTO', 'https')),
     KEY_PREFIX=(str, ''),
+    LOCAL_CACHE_PREFIXES=(list, ['user_', 'imageurlcache_']),
+    LOCAL_CACHE_TIMEOUT=(int, 5),
+    LOCAL_CACHE_MAX_ENTRIES=(int, 1000),
     USE_SES=(bool, False),
 
     EMAIL_BACKEND=(str, 'django.core.mail.backends.dummy.EmailBackend'),
@@ -93,8 +96,23 @@ except ImportError:
     default_cache = env.cache()
 
 
+# Hot keys are also kept in a small per-process cache for a few seconds to
+# save a trip to the shared cache. Only keys starting with one of
+# `LOCAL_CACHE_PREFIXES` are kept locally, which should only be keys that never
+# change or that are invalidated by bumping a user's cache generation.
 CACHES = {
-    'default': default_cache,
+    'default': {
+        'BACKEND': (
+            'open_connect.connect_core.utils.cache_backends.TwoTierCache'),
+        'OPTIONS': {
+            'SHARED_CACHE': 'shared',
+            'LOCAL_PREFIXES': [
+                prefix for prefix in env('LOCAL_CACHE_PREFIXES') if prefix],
+            'LOCAL_TIMEOUT': env('LOCAL_CACHE_TIMEOUT'),
+            'LOCAL_MAX_ENTRIES': env('LOCAL_CACHE_MAX_ENTRIES'),
+        }
+    },
+    'shared': default_cache,
 }
 
 KEY_PREFIX = env('KEY_PREFIX')
@@ -161,11 +179,11 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'open_connect.middleware.login_required.LoginRequiredMiddleware',
     'open_connect.middleware.impersonation.ImpersonationMiddleware',
+    'open_connect.middleware.access_gate.AccessGateMiddleware',
+    'open_connect.middleware.authorization.AuthorizationMiddleware',
     'open_connect.middleware.timezone.TimezoneMiddleware',
-    'open_connect.middleware.visit_tracking.VisitTrackingMiddleware',
-    'open_connect.middleware.accept_terms.AcceptTermsAndConductMiddleware'
+    'open_connect.middleware.visit_tracking.VisitTrackingMiddleware'
 )
 
 
@@ -51,16 +51,54 @@ CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND')
 
 CELERYBEAT_SCHEDULE = {
     'send-daily-notifications': {
-        'task': 'open_connect.notifications.tasks.send_daily_email_notifications',
-        'schedule': crontab(hour=7)
+        'task': 'open_connect.notifications.tasks.send_timezone_digest_notifications',
+        # Execute at the top of every hour. Only users whose local time is
+        # `DAILY_DIGEST_HOUR` are sent their digest in any one run.
+        'schedule': crontab(minute=0)
     },
     'send-moderator-notifications': {
         'task': 'open_connect.notifications.tasks.send_moderation_notifications',
         # Execute the 1nd minute after each hour
         'schedule': crontab(minute=1)
     },
-    'clear-email-opens': {
-        'task': 'open_connect.mailer.tasks.wipe_old_email_opens',
+    'process-email-opens': {
+        'task': 'open_connect.mailer.tasks.process_buffered_opens',
+        # Execute every minute
+        'schedule': crontab()
+    },
+    'process-visits': {
+        'task': 'open_connect.accounts.tasks.process_buffered_visits',
+        # Execute every minute
+        'schedule': crontab()
+    },
+    'drain-email-spool': {
+        'task': 'open_connect.mailer.tasks.drain_email_spool',
+        # Execute every minute
+        'schedule': crontab()
+    },
+    'rollup-email-opens': {
+        'task': 'open_connect.mailer.tasks.rollup_email_opens',
+        # Execute 5 minutes after each hour
+        'schedule': crontab(minute=5)
+    },
+    'reconcile-user-stats': {
+        'task': 'open_connect.reporting.tasks.reconcile_user_stats',
+        # Recount user report statistics once a day
+        'schedule': crontab(hour=9, minute=40)
+    },
+    'refresh-stale-group-stats': {
+        'task': 'open_connect.reporting.tasks.refresh_stale_group_stats',
+        # Execute every minute
+        'schedule': crontab()
+    },
+    'rebuild-group-stats': {
+        'task': 'open_connect.reporting.tasks.rebuild_group_stats',
+        # Recount group report statistics once a day
+        'schedule': crontab(hour=9, minute=50)
+    },
+    'enforce-retention-policies': {
+        'task': 'open_connect.connect_core.tasks.enforce_retention_policies',
+        # Purge expired email opens, visits and clicks once a day
         'schedule': crontab(hour=10, minute=20)
     },
 }
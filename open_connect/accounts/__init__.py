@@ -1,4 +1,10 @@
 """User account app"""
-
 # pylint: disable=invalid-name
+import django.dispatch
+
+
 default_app_config = 'open_connect.accounts.apps.AccountsConfig'
+
+# Sent after buffered visits are saved in bulk, as `bulk_create` doesn't send
+# `post_save` for each visit
+visits_recorded = django.dispatch.Signal(providing_args=["visits"])
@@ -0,0 +1,59 @@
+"""Request-scoped answers to questions about what a user may do"""
+from open_connect.groups.membership import get_memberships
+
+
+class AuthorizationContext(object):
+    """
+    Memo of a user's roles and group memberships for a single request
+
+    `AuthorizationMiddleware` attaches one of these to the request's user, so
+    that the user's memberships are fetched at most once per request however
+    many messages, threads or groups are checked. Memberships are fetched the
+    first time they're needed.
+
+    The context is reset when the user joins or leaves a group, or is made an
+    owner or whitelisted through their own side of the relation. Changes made
+    from the group's side (such as `group.owners.add(user)`) aren't seen until
+    the next request.
+    """
+    def __init__(self, user):
+        """Initialize the context"""
+        self.user = user
+        self._memberships = None
+        self._global_moderator = None
+
+    def reset(self):
+        """Forget everything, for when the user's memberships change"""
+        self._memberships = None
+        self._global_moderator = None
+
+    @property
+    def memberships(self):
+        """Every kind of group membership the user has"""
+        if self._memberships is None:
+            self._memberships = get_memberships(self.user.pk)
+        return self._memberships
+
+    @property
+    def joined_group_ids(self):
+        """Set of the ids of groups the user is a member of"""
+        return self.memberships['joined']
+
+    @property
+    def owned_group_ids(self):
+        """Set of the ids of groups the user owns"""
+        return self.memberships['owned']
+
+    @property
+    def whitelisted_group_ids(self):
+        """Set of the ids of groups the user is whitelisted in"""
+        return self.memberships['whitelisted']
+
+    @property
+    def global_moderator(self):
+        """Whether the user can moderate all messages"""
+        if self._global_moderator is None:
+            self._global_moderator = bool(
+                self.user.is_superuser or
+                self.user.has_perm('accounts.can_moderate_all_messages'))
+        return self._global_moderator
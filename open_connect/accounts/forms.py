@@ -16,6 +16,7 @@ from open_connect.mailer.utils import clean_addresses
 from open_connect.media.models import Image
 from open_connect.groups.models import Group
 from open_connect.connectmessages.models import Thread
+from open_connect.connect_core.utils.generations import bump_user_generations
 from open_connect.connect_core.utils.mixins import SanitizeHTMLMixin
 
 
@@ -162,6 +163,7 @@ class BanUserForm(forms.Form):
 
         User.objects.filter(
             pk=user.pk).update(is_banned=True)
+        bump_user_generations([user.pk])
 
 
 class UnBanUserForm(forms.Form):
@@ -192,6 +194,7 @@ class UnBanUserForm(forms.Form):
 
         User.objects.filter(
             pk=user.pk).update(is_banned=False)
+        bump_user_generations([user.pk])
 
 
 class BecomeUserForm(forms.Form):
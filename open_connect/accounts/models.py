@@ -1,6 +1,5 @@
 """Models for user accounts."""
 # pylint:disable=too-many-instance-attributes
-from datetime import timedelta
 import logging
 
 import re
@@ -21,11 +20,14 @@ import autocomplete_light
 from open_connect.accounts.tasks import render_and_send_invite_email
 from open_connect.accounts.utils import generate_nologin_hash
 from open_connect.groups import tasks as group_tasks
+from open_connect.groups.membership import get_group_ids
 from open_connect.groups.models import Group, GroupRequest
 from open_connect.mailer.utils import unsubscribe_url
 from open_connect.media.models import Image
 from open_connect.notifications.models import NOTIFICATION_PERIODS
 from open_connect.connectmessages.models import Message
+from open_connect.connect_core.utils.caching import get_many_or_compute
+from open_connect.connect_core.utils.generations import user_cache_key
 from open_connect.connect_core.utils.location import STATES
 from open_connect.connect_core.utils.models import (
     TimestampModel, CacheMixinModel
@@ -173,6 +175,13 @@ class User(
 
     USERNAME_FIELD = 'username'
 
+    # An `AuthorizationContext` attached by `AuthorizationMiddleware` while
+    # handling a request, which memoizes the user's memberships and roles
+    authorization = None
+
+    # Set by `ImpersonationMiddleware` on the user being impersonated
+    impersonating = False
+
     class Meta(object):
         """Meta options."""
         verbose_name = _('user')
@@ -256,7 +265,7 @@ class User(
         if not self.global_moderator:
             queryset = queryset.filter(
                 thread__thread_type='group',
-                thread__group__in=self.groups_moderating
+                thread__group_id__in=self.owned_group_ids
             )
 
         return queryset
@@ -264,6 +273,8 @@ class User(
     @property
     def global_moderator(self):
         """Return true if the user can moderate all messages"""
+        if self.authorization is not None:
+            return self.authorization.global_moderator
         if (self.is_superuser or
                 self.has_perm('accounts.can_moderate_all_messages')):
             return True
@@ -277,15 +288,10 @@ class User(
         """Gets a list of moderation task types that are pending."""
         messages_key = '%s_messages_to_mod' % self.pk
         groups_key = '%s_groups_to_mod' % self.pk
-        mods = cache.get_many([messages_key, groups_key])
-        if messages_key not in mods:
-            messages_to_moderate = self.messages_to_moderate.count()
-            cache.set(messages_key, messages_to_moderate, 600)
-            mods[messages_key] = messages_to_moderate
-        if groups_key not in mods:
-            groups_to_moderate = self.group_join_requests_to_moderate().count()
-            cache.set(groups_key, groups_to_moderate, 600)
-            mods[groups_key] = groups_to_moderate
+        mods = get_many_or_compute({
+            messages_key: self.messages_to_moderate.count,
+            groups_key: lambda: self.group_join_requests_to_moderate().count()
+        }, 600)
         return {
             'groups_to_mod': mods[groups_key],
             'messages_to_mod': mods[messages_key]
@@ -293,40 +299,48 @@ class User(
 
     def is_moderator(self):
         """Returns True if user is a moderator."""
-        key = self.cache_key + 'is_moderator'
+        key = user_cache_key(self.pk, 'is_moderator')
         is_mod = cache.get(key)
         if is_mod is None:
-            is_mod = self.groups_moderating.exists()
+            is_mod = bool(self.owned_group_ids)
             cache.set(key, is_mod, 3600)
         return is_mod
 
+    @property
+    def joined_group_ids(self):
+        """Set of the ids of groups a user is a member of."""
+        if self.authorization is not None:
+            return self.authorization.joined_group_ids
+        return get_group_ids(self.pk, 'joined')
+
+    @property
+    def owned_group_ids(self):
+        """Set of the ids of groups a user owns and can moderate."""
+        if self.authorization is not None:
+            return self.authorization.owned_group_ids
+        return get_group_ids(self.pk, 'owned')
+
+    @property
+    def whitelisted_group_ids(self):
+        """Set of the ids of groups a user is whitelisted to send to."""
+        if self.authorization is not None:
+            return self.authorization.whitelisted_group_ids
+        return get_group_ids(self.pk, 'whitelisted')
+
     @property
     def groups_moderating(self):
         """Groups a user can moderate."""
-        owned_groups = cache.get(self.cache_key + 'owned_groups')
-        if owned_groups is None:
-            owned_groups = self.owned_groups_set.all()
-            # Cache owned groups for 1 week
-            cache.set(
-                self.cache_key + 'owned_groups', owned_groups, 7*24*60*60)
-        return owned_groups
+        return Group.objects.filter(pk__in=self.owned_group_ids)
 
     @property
     def groups_joined(self):
         """Groups a user is a member of."""
-        groups = cache.get(self.cache_key + 'groups_joined')
-        if groups is None:
-            groups = Group.objects.filter(group__user__id=self.pk)
-
-            # Include the `Image` and `AuthGroup` models and tags
-            groups = groups.select_related(
+        # Include the `Image` and `AuthGroup` models and tags
+        return Group.objects.filter(
+            pk__in=self.joined_group_ids).select_related(
                 'image', 'group', 'category').prefetch_related(
                     'tagged_items__tag')
 
-            # Cache groups joined for 1 week
-            cache.set(self.cache_key + 'groups_joined', groups, 7*24*60*60)
-        return groups
-
     @property
     def cached_groups_joined(self):
         """Same as groups_joined, but cached on the object instance."""
@@ -356,7 +370,7 @@ class User(
         """Boolean indicating whether user has permission to moderate."""
         if self.global_moderator:
             return True
-        elif self.groups_moderating.exists():
+        elif self.owned_group_ids:
             return True
         else:
             return False
@@ -460,14 +474,14 @@ class User(
             return True
         if self.is_superuser:
             return True
-        elif group in self.groups_moderating:
+        elif group.pk in self.owned_group_ids:
             return True
-        elif group in self.groups_joined and not group.moderated:
+        elif group.pk in self.joined_group_ids and not group.moderated:
             return True
-        elif group.whitelist_users.filter(pk=self.pk).exists():
+        elif group.pk in self.whitelisted_group_ids:
             # User is whitelisted to send to this group
             return True
-        elif group in self.groups_joined:
+        elif group.pk in self.joined_group_ids:
             return False
         else:
             raise PermissionDeniedError(
@@ -505,10 +519,14 @@ class User(
                 notification=notification,
                 period=period
             )
+        if self.authorization is not None:
+            self.authorization.reset()
 
     def remove_from_group(self, group):
         """Removes user from a group and handles existing threads/messages."""
         group_tasks.remove_user_from_group(user=self, group=group)
+        if self.authorization is not None:
+            self.authorization.reset()
 
     def bulk_unsubscribe(self):
         """Unsubscribe from all group notifications for user"""
@@ -531,17 +549,6 @@ class User(
         has_perm = self.has_perm('accounts.can_impersonate')
         return has_perm or self.is_superuser
 
-    def direct_messages_sent_since(self, since_datetime=None):
-        """Returns count of messages sent by the user since since_datetime.
-
-        since_datetime defaults to 24 hours.
-        """
-        if not since_datetime:
-            since_datetime = now() - timedelta(hours=24)
-        count = Message.objects.filter(
-            sender=self, created_at__gte=since_datetime).count()
-        return count
-
 
 class UserAutocomplete(autocomplete_light.AutocompleteModelBase):
     """Creates an autocomplete endpoint for searching users."""
@@ -1,7 +1,12 @@
 """Signal handlers for Account-related tasks"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group as AuthGroup
+from django.db.models.signals import m2m_changed
 from django.dispatch import receiver
 from allauth.account.signals import email_changed
 
+from open_connect.connect_core.utils.generations import bump_user_generations
+
 
 @receiver(email_changed)
 def change_user_email(sender, **kwargs):
@@ -14,3 +19,31 @@ def change_user_email(sender, **kwargs):
     user = kwargs['user']
     user.email = kwargs['to_email_address'].email
     user.save(update_fields=['email'])
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+def user_access_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the caches of users whose groups or permissions changed"""
+    # pylint: disable=unused-argument
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        bump_user_generations([instance.pk])
+    elif pk_set:
+        bump_user_generations(pk_set)
+
+
+@receiver(m2m_changed, sender=AuthGroup.permissions.through)
+def group_permissions_changed(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Invalidate the caches of members of groups whose permissions changed"""
+    # pylint: disable=unused-argument
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        auth_group_ids = pk_set or []
+    else:
+        auth_group_ids = [instance.pk]
+    bump_user_generations(get_user_model().objects.filter(
+        groups__in=auth_group_ids).values_list('pk', flat=True))
@@ -1,12 +1,24 @@
 """Accounts tasks"""
+# pylint: disable=not-callable
+import logging
+
 from celery import shared_task
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.timezone import now
 
+from open_connect.accounts import visits_recorded
+from open_connect.accounts.visits import VISIT_BUFFER_KEY
+from open_connect.connect_core.utils import buffers
 from open_connect.mailer.utils import send_email
 
 
+LOGGER = logging.getLogger('accounts.tasks')
+
+# Number of buffered visits to read from the cache and insert at once
+VISIT_BUFFER_BATCH_SIZE = 500
+
+
 @shared_task()
 def render_and_send_invite_email(invite_id):
     """Renders and sends an invite email."""
@@ -36,3 +48,30 @@ def render_and_send_invite_email(invite_id):
 
     invite.notified = now()
     invite.save()
+
+
+def save_buffered_visits(records):
+    """Save a batch of buffered visits"""
+    from open_connect.accounts.models import Visit
+    visits = []
+    for record in records:
+        try:
+            visits.append(Visit(
+                user_id=record['user_id'],
+                ip_address=record['ip_address'] or None,
+                user_agent=record['user_agent']))
+        except (KeyError, TypeError):
+            LOGGER.warning('Discarding malformed visit %s', record)
+
+    Visit.objects.bulk_create(visits)
+    visits_recorded.send(sender=Visit, visits=visits)
+    return len(visits)
+
+
+@shared_task()
+def process_buffered_visits():
+    """Save all visits waiting in the visit buffer"""
+    total = buffers.drain(
+        VISIT_BUFFER_KEY, save_buffered_visits, VISIT_BUFFER_BATCH_SIZE)
+    if total:
+        LOGGER.info('Saved %s buffered visits', total)
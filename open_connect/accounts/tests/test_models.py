@@ -1,7 +1,5 @@
 """Tests for accounts.models."""
 # pylint: disable=invalid-name, too-many-lines
-from datetime import timedelta
-
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
@@ -21,8 +19,9 @@ from open_connect.notifications.models import Subscription
 from open_connect.connectmessages.models import Thread
 from open_connect.connectmessages.tests import ConnectMessageTestCase
 from open_connect.connect_core.utils.basetests import (
-    ConnectTestCase, ConnectTestMixin
+    ConnectTestCase, ConnectTestMixin, LOCMEM_CACHES
 )
+from open_connect.connect_core.utils.generations import user_cache_key
 
 
 User = get_user_model()
@@ -448,18 +447,6 @@ class UserCanViewProfileTest(ConnectMessageTestCase):
         self.assertFalse(self.normal_user.can_view_profile(self.banned_user))
 
 
-class UserDirectMessagesSentSinceTest(ConnectTestMixin, TestCase):
-    """Tests for User.direct_messages_sent_since."""
-    def test_message_count(self):
-        """Should return the correct message count."""
-        sender = self.create_user()
-        self.create_thread(direct=True, sender=sender)
-        self.create_thread(direct=True, sender=sender)
-        self.create_thread(direct=True, sender=sender)
-        yesterday = now() - timedelta(hours=24)
-        self.assertEqual(sender.direct_messages_sent_since(yesterday), 3)
-
-
 class UserGroupModerationRequestsTest(ConnectTestCase):
     """Tests for UserGroupModerationRequest"""
     # pylint: disable=too-many-instance-attributes
@@ -720,7 +707,7 @@ class UserGroupManagementTest(ConnectTestMixin, TestCase):
     def test_cached_groups_joined_multiple_calls(self):
         """Should only call groups_joined once."""
         user = self.create_user()
-        with patch('open_connect.accounts.models.cache') as mock_cache:
+        with patch('open_connect.groups.membership.cache') as mock_cache:
             groups = mommy.make('groups.Group', _quantity=2)
             for group in groups:
                 user.add_to_group(group.pk)
@@ -1066,6 +1053,7 @@ class TestUserAutocomplete(ConnectTestMixin, TestCase):
         self.assertNotContains(response, user.email)
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
 @patch('open_connect.accounts.models.cache')
 class TestUserIsModerator(ConnectTestMixin, TestCase):
     """Tests for User.is_moderator."""
@@ -1079,9 +1067,9 @@ class TestUserIsModerator(ConnectTestMixin, TestCase):
         mock_cache.get.return_value = None
         self.assertTrue(user.is_moderator())
         mock_cache.get.assert_any_call(
-            '{}is_moderator'.format(user.cache_key))
+            user_cache_key(user.pk, 'is_moderator'))
         mock_cache.set.any_call(
-            '{}is_moderator'.format(user.cache_key), True, 3600)
+            user_cache_key(user.pk, 'is_moderator'), True, 3600)
 
     def test_user_is_not_moderator(self, mock_cache):
         """Test when user is not a moderator."""
@@ -1092,7 +1080,7 @@ class TestUserIsModerator(ConnectTestMixin, TestCase):
 
         self.assertFalse(user.is_moderator())
         mock_cache.set.assert_any_call(
-            '{}is_moderator'.format(user.cache_key), False, 3600)
+            user_cache_key(user.pk, 'is_moderator'), False, 3600)
 
     def test_cache_is_set(self, mock_cache):
         """Test the cache is empty."""
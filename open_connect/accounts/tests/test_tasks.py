@@ -3,14 +3,21 @@ from datetime import datetime
 from unittest import TestCase
 
 from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase as DjangoTestCase, override_settings
 from django.utils.timezone import now
 from mock import patch
 from model_mommy import mommy
 
-from open_connect.accounts.models import Invite
+from open_connect.accounts.models import Invite, Visit
 from open_connect.accounts.tasks import (
-    render_and_send_invite_email
+    process_buffered_visits, render_and_send_invite_email
 )
+from open_connect.accounts.visits import buffer_visit, VISIT_BUFFER_HEAD_KEY
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
+from open_connect.reporting.models import UserStats
 from open_connect.mailer.utils import unsubscribe_url
 
 
@@ -42,3 +49,57 @@ class TestRenderAndSendInviteEmail(TestCase):
             response = render_and_send_invite_email(invite.pk)
         self.assertIsNone(response)
         self.assertFalse(mock.called)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestProcessBufferedVisits(ConnectTestMixin, DjangoTestCase):
+    """Tests for process_buffered_visits"""
+    def setUp(self):
+        """Setup the TestProcessBufferedVisits TestCase"""
+        cache.clear()
+        self.user = self.create_user()
+
+    def test_visits_saved(self):
+        """Buffered visits should be saved and counted"""
+        other_user = self.create_user()
+        self.assertTrue(buffer_visit(self.user.pk, '127.0.0.1', 'Browser'))
+        self.assertTrue(buffer_visit(other_user.pk, '', ''))
+
+        process_buffered_visits()
+
+        visit = Visit.objects.get(user=self.user)
+        self.assertEqual(visit.ip_address, '127.0.0.1')
+        self.assertEqual(visit.user_agent, 'Browser')
+        self.assertTrue(Visit.objects.filter(user=other_user).exists())
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).visit_count, 1)
+        self.assertEqual(cache.get(VISIT_BUFFER_HEAD_KEY), 2)
+
+    def test_visits_deduplicated(self):
+        """Only a user's first visit of the day should be buffered"""
+        self.assertTrue(buffer_visit(self.user.pk, '127.0.0.1', ''))
+        self.assertFalse(buffer_visit(self.user.pk, '127.0.0.1', ''))
+
+        process_buffered_visits()
+        process_buffered_visits()
+
+        self.assertEqual(Visit.objects.filter(user=self.user).count(), 1)
+
+    def test_visit_saved_without_buffer(self):
+        """If a visit can't be buffered it should be saved straight away"""
+        with patch('open_connect.accounts.visits.buffers.push',
+                   return_value=False):
+            self.assertTrue(buffer_visit(self.user.pk, '127.0.0.1', ''))
+
+        self.assertTrue(Visit.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            UserStats.objects.get(user=self.user).visit_count, 1)
+
+    def test_locked(self):
+        """If another worker holds the lock nothing should be processed"""
+        buffer_visit(self.user.pk, '127.0.0.1', '')
+        cache.add(VISIT_BUFFER_HEAD_KEY + '_lock', True)
+
+        process_buffered_visits()
+
+        self.assertFalse(Visit.objects.filter(user=self.user).exists())
@@ -91,8 +91,7 @@ class UserDetailView(SuppressSystemUserMixin, DetailView):
             user=self.request.user)
         context['groups_joined'] = Group.objects.filter(
             group__user__id=self.object.pk).select_related('image', 'group')
-        context['subscribed_ids'] = self.request.user.groups_joined.values_list(
-            'pk', flat=True)
+        context['subscribed_ids'] = self.request.user.joined_group_ids
         # pylint: disable=line-too-long
         context['show_message_button'] = self.request.user.can_direct_message_user(self.object)
         context['profile_is_self'] = self.request.user.pk == self.object.pk
@@ -150,7 +149,7 @@ class UserUpdateView(
     def get_forms(self, form_classes):
         """Get forms."""
         forms = super(UserUpdateView, self).get_forms(form_classes)
-        if not self.object.groups_moderating.exists():
+        if not self.object.owned_group_ids:
             del forms['user_form'].fields['receive_group_join_notifications']
 
         # Only allow those with the permission to toggle staff status
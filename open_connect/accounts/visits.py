@@ -0,0 +1,57 @@
+"""
+Buffered recording of user visits
+
+A user's first visit of each (UTC) day is pushed into a buffer in the cache
+(see `connect_core.utils.buffers`) rather than saved straight away. The
+`process_buffered_visits` task saves the buffered visits in batches. A
+visit's `created_at` is when it was saved, which is at most a minute or so
+after the visit itself.
+"""
+from django.apps import apps
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from open_connect.connect_core.utils import buffers
+
+
+VISIT_BUFFER_KEY = 'visit_buffer'
+VISIT_BUFFER_TAIL_KEY = buffers.tail_key(VISIT_BUFFER_KEY)
+VISIT_BUFFER_HEAD_KEY = buffers.head_key(VISIT_BUFFER_KEY)
+VISIT_BUFFER_TIMEOUT = 24*60*60
+
+
+def visit_logged_key(user_id, day):
+    """The cache key marking that a user's visit was logged on a day"""
+    return 'visit_logged_{user_id}_{day}'.format(
+        user_id=user_id, day=day.strftime('%Y%m%d'))
+
+
+def visit_buffer_slot_key(index):
+    """The cache key for an individual slot in the visit buffer"""
+    return buffers.slot_key(VISIT_BUFFER_KEY, index)
+
+
+def buffer_visit(user_id, ip_address, user_agent):
+    """
+    Push a user's visit into the visit buffer, once per user per day
+
+    If the visit can't be buffered it's saved straight away. Returns whether
+    the visit was recorded.
+    """
+    # `add` is atomic, so only the first visit of the day from any web node
+    # makes it into the buffer
+    if not cache.add(
+            visit_logged_key(user_id, now().date()), True,
+            VISIT_BUFFER_TIMEOUT):
+        return False
+
+    record = {
+        'user_id': user_id,
+        'ip_address': ip_address,
+        'user_agent': user_agent
+    }
+    if not buffers.push(VISIT_BUFFER_KEY, record, VISIT_BUFFER_TIMEOUT):
+        apps.get_model('accounts', 'Visit').objects.create(
+            user_id=user_id, ip_address=ip_address or None,
+            user_agent=user_agent)
+    return True
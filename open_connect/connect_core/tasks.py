@@ -0,0 +1,11 @@
+"""Tasks for the connect_core app"""
+# pylint: disable=not-callable
+from celery import shared_task
+
+from open_connect.connect_core.utils.retention import apply_retention_policies
+
+
+@shared_task()
+def enforce_retention_policies():
+    """Delete rows that have outlived their table's retention policy"""
+    apply_retention_policies()
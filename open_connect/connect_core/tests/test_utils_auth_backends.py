@@ -1,22 +1,26 @@
 """Tests for utils/auth_backends.py"""
 # pylint: disable=protected-access
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from mock import patch, Mock
 
 from open_connect.connect_core.utils.auth_backends import (
     CachedModelAuthBackend
 )
-from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
+from open_connect.connect_core.utils.generations import user_cache_key
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
 class TestCachedModelAuthBackend(ConnectTestMixin, TestCase):
     """Tests for CachedModelAuthBackend"""
     def setUp(self):
         """Setup tests for CachedModelAuthBackend"""
-        cache_patcher = patch(
-            'open_connect.connect_core.utils.auth_backends.cache')
-        self.mockcache = cache_patcher.start()
-        self.addCleanup(cache_patcher.stop)
+        patcher = patch(
+            'open_connect.connect_core.utils.auth_backends.get_or_compute')
+        self.mock_get_or_compute = patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_anonymous(self):
         """Test for an anonymous user object"""
@@ -26,7 +30,7 @@ class TestCachedModelAuthBackend(ConnectTestMixin, TestCase):
 
         result = backend.get_all_permissions(mock_user)
         self.assertEqual(result, set())
-        self.assertFalse(self.mockcache.get.called)
+        self.assertFalse(self.mock_get_or_compute.called)
 
     def test_has_perm_cache(self):
         """Test where a user object already has a permission cache"""
@@ -37,11 +41,12 @@ class TestCachedModelAuthBackend(ConnectTestMixin, TestCase):
 
         result = backend.get_all_permissions(user)
         self.assertEqual(result, demo_cache)
-        self.assertFalse(self.mockcache.get.called)
+        self.assertFalse(self.mock_get_or_compute.called)
 
     def test_empty_cache(self):
         """Test where the cache does not contain permissions"""
-        self.mockcache.get.return_value = None
+        self.mock_get_or_compute.side_effect = (
+            lambda key, compute, timeout: compute())
 
         user = self.create_user()
         self.add_perm(user, 'can_moderate_all_messages', 'accounts', 'user')
@@ -49,25 +54,23 @@ class TestCachedModelAuthBackend(ConnectTestMixin, TestCase):
         backend = CachedModelAuthBackend()
         result = backend.get_all_permissions(user)
 
-        self.mockcache.get(user.cache_key + '_permissions')
-        self.mockcache.set.assert_called_once_with(
-            user.cache_key + '_permissions',
-            result,
-            1800
-        )
+        args = self.mock_get_or_compute.call_args[0]
+        self.assertEqual(args[0], user_cache_key(user.pk, 'permissions'))
+        self.assertEqual(args[2], 1800)
         self.assertEqual(user._perm_cache, result)
         self.assertIn(u'accounts.can_moderate_all_messages', result)
 
     def test_full_cache(self):
         """Test where the cache is full and should be returned"""
         demo_result = Mock()
-        self.mockcache.get.return_value = demo_result
+        self.mock_get_or_compute.return_value = demo_result
 
         user = self.create_user()
         backend = CachedModelAuthBackend()
         result = backend.get_all_permissions(user)
 
-        self.mockcache.get.assert_called_once_with(
-            user.cache_key + '_permissions')
+        self.assertEqual(
+            self.mock_get_or_compute.call_args[0][0],
+            user_cache_key(user.pk, 'permissions'))
         self.assertEqual(user._perm_cache, demo_result)
         self.assertEqual(result, demo_result)
@@ -0,0 +1,100 @@
+"""Tests for utils/buffers.py"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from mock import patch
+
+from open_connect.connect_core.utils import buffers
+from open_connect.connect_core.utils.basetests import LOCMEM_CACHES
+
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestBuffers(TestCase):
+    """Tests for pushing to and draining buffers"""
+    def setUp(self):
+        """Start with an empty cache and nothing saved"""
+        cache.clear()
+        self.saved = []
+
+    def save(self, records):
+        """Keep track of saved records"""
+        self.saved.extend(records)
+        return len(records)
+
+    def test_push_and_drain(self):
+        """Pushed records should be saved in order, once"""
+        for number in range(5):
+            self.assertTrue(buffers.push('test', number, 60))
+
+        self.assertEqual(buffers.drain('test', self.save, 2), 5)
+        self.assertEqual(self.saved, [0, 1, 2, 3, 4])
+        self.assertEqual(cache.get(buffers.head_key('test')), 5)
+
+        self.assertEqual(buffers.drain('test', self.save, 2), 0)
+        self.assertEqual(self.saved, [0, 1, 2, 3, 4])
+
+    def test_locked(self):
+        """Nothing should be drained while another process is draining"""
+        buffers.push('test', 'record', 60)
+        cache.add(buffers.lock_key('test'), True)
+
+        self.assertEqual(buffers.drain('test', self.save, 10), 0)
+        self.assertEqual(self.saved, [])
+
+    def test_missing_slot_checked_again(self):
+        """A slot which wasn't written yet should be saved by a later drain"""
+        # The slot is handed out but not written
+        index = buffers.next_slot('test')
+        buffers.push('test', 'second', 60)
+
+        buffers.drain('test', self.save, 10)
+        self.assertEqual(self.saved, ['second'])
+        self.assertEqual(
+            cache.get(buffers.pending_key('test')).keys(), [index])
+
+        cache.set(buffers.slot_key('test', index), 'first')
+        buffers.drain('test', self.save, 10)
+        self.assertEqual(self.saved, ['second', 'first'])
+        self.assertEqual(cache.get(buffers.pending_key('test')), {})
+
+    def test_missing_slot_given_up(self):
+        """A slot missing for too long should stop being checked"""
+        buffers.next_slot('test')
+        with patch.object(buffers.time, 'time', return_value=1000):
+            buffers.drain('test', self.save, 10)
+        self.assertEqual(len(cache.get(buffers.pending_key('test'))), 1)
+
+        with patch.object(
+                buffers.time, 'time',
+                return_value=1001 + buffers.MISSING_SLOT_GRACE):
+            buffers.drain('test', self.save, 10)
+        self.assertEqual(cache.get(buffers.pending_key('test')), {})
+
+    def test_lost_tail_restarts_after_head(self):
+        """If the tail is lost, slots should be handed out after the head"""
+        buffers.push('test', 'first', 60)
+        buffers.drain('test', self.save, 10)
+        cache.delete(buffers.tail_key('test'))
+
+        self.assertEqual(buffers.next_slot('test'), 2)
+
+    def test_undrained_slot_not_overwritten(self):
+        """A slot which hasn't been drained should never be overwritten"""
+        buffers.push('test', 'first', 60)
+        cache.delete(buffers.tail_key('test'))
+
+        buffers.push('test', 'second', 60)
+        buffers.drain('test', self.save, 10)
+        self.assertEqual(self.saved, ['first', 'second'])
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class TestBuffersWithoutCache(TestCase):
+    """Tests for buffers when nothing can be cached"""
+    def test_push_fails(self):
+        """Pushing should report that the record wasn't buffered"""
+        self.assertFalse(buffers.push('test', 'record', 60))
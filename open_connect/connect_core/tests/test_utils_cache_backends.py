@@ -0,0 +1,76 @@
+"""Tests for utils/cache_backends.py"""
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from mock import patch
+
+from open_connect.connect_core.utils.cache_backends import TwoTierCache
+
+
+class TestTwoTierCache(TestCase):
+    """Tests for TwoTierCache"""
+    def setUp(self):
+        """Setup a two tier cache in front of a local memory cache"""
+        self.shared = LocMemCache('two-tier-test', {})
+        self.shared.clear()
+        self.cache = TwoTierCache('', {'OPTIONS': {
+            'LOCAL_PREFIXES': ['user_'],
+            'LOCAL_TIMEOUT': 5,
+            'LOCAL_MAX_ENTRIES': 10
+        }})
+        shared_patcher = patch.object(
+            TwoTierCache, 'shared', new=self.shared)
+        shared_patcher.start()
+        self.addCleanup(shared_patcher.stop)
+
+    def test_local_keys_skip_shared_cache(self):
+        """Opted in keys should be read locally after the first read"""
+        self.cache.set('user_1_5_permissions', set(['a']))
+
+        with patch.object(self.shared, 'get') as mock_get:
+            self.assertEqual(
+                self.cache.get('user_1_5_permissions'), set(['a']))
+            self.assertFalse(mock_get.called)
+
+    def test_other_keys_use_shared_cache(self):
+        """Keys which aren't opted in should always be read from shared"""
+        self.cache.set('sessionkey', 'value')
+        self.shared.set('sessionkey', 'changed')
+
+        self.assertEqual(self.cache.get('sessionkey'), 'changed')
+
+    def test_local_timeout(self):
+        """Local copies should expire after the local timeout"""
+        self.cache.set('user_1_5_permissions', 'old')
+        self.shared.set('user_1_5_permissions', 'new')
+
+        with patch('open_connect.connect_core.utils.cache_backends.time') as (
+                mock_time):
+            mock_time.time.return_value = 2**40
+            self.assertEqual(self.cache.get('user_1_5_permissions'), 'new')
+
+    def test_missing_and_none(self):
+        """Missing keys return the default and None values are cached"""
+        self.assertEqual(self.cache.get('user_missing', 'default'), 'default')
+        self.cache.set('user_none', None)
+        self.assertIsNone(self.cache.get('user_none', 'default'))
+
+    def test_get_many(self):
+        """Only keys not held locally should be read from the shared cache"""
+        self.cache.set('user_1', 1)
+        self.cache.set('other', 2)
+
+        with patch.object(self.shared, 'get_many') as mock_get_many:
+            mock_get_many.return_value = {'other': 2}
+            result = self.cache.get_many(['user_1', 'other'])
+
+        mock_get_many.assert_called_once_with(['other'], None)
+        self.assertEqual(result, {'user_1': 1, 'other': 2})
+
+    def test_delete_and_incr(self):
+        """Deleting or incrementing should drop the local copy"""
+        self.cache.set('user_count', 1)
+        self.assertEqual(self.cache.incr('user_count'), 2)
+        self.assertEqual(self.cache.get('user_count'), 2)
+
+        self.cache.delete('user_count')
+        self.assertIsNone(self.cache.get('user_count'))
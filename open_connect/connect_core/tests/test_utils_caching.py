@@ -0,0 +1,91 @@
+"""Tests for utils/caching.py"""
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from mock import Mock, patch
+
+from open_connect.connect_core.utils import caching
+from open_connect.connect_core.utils.basetests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestGetOrCompute(TestCase):
+    """Tests for get_or_compute"""
+    def setUp(self):
+        """Setup the get_or_compute tests"""
+        cache.clear()
+        self.compute = Mock(return_value='value')
+
+    def test_computes_missing_value(self):
+        """A missing value should be computed once and then cached"""
+        self.assertEqual(
+            caching.get_or_compute('key', self.compute, 60), 'value')
+        self.assertEqual(
+            caching.get_or_compute('key', self.compute, 60), 'value')
+        self.assertEqual(self.compute.call_count, 1)
+        self.assertIsNone(cache.get(caching.lock_key('key')))
+
+    def test_expired_value_kept(self):
+        """Values should stay cached for a while after they expire"""
+        with patch.object(caching.cache, 'set') as mock_set:
+            caching.get_or_compute('key', self.compute, 60)
+        key, entry, timeout = mock_set.call_args[0]
+        self.assertEqual(key, 'key')
+        self.assertEqual(entry.value, 'value')
+        self.assertLessEqual(entry.expires, time.time() + 60)
+        self.assertEqual(timeout, 60 + caching.STALE_TIMEOUT)
+
+    def test_refreshes_expiring_value(self):
+        """A value past its expiry should be recomputed"""
+        cache.set(
+            'key', caching.CachedEntry('old', time.time() - 1, 0.1), 60)
+        self.assertEqual(
+            caching.get_or_compute('key', self.compute, 60), 'value')
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_bare_value_is_missing(self):
+        """A value cached without its expiry should be recomputed"""
+        for old_value in ('https://example.com/image.png', 3, ('a', 'b', 'c')):
+            cache.set('key', old_value, 60)
+            self.assertEqual(
+                caching.get_or_compute('key', self.compute, 60), 'value')
+        self.assertEqual(self.compute.call_count, 3)
+
+    def test_locked_refresh_uses_current_value(self):
+        """If someone else is refreshing, the current value should be used"""
+        cache.set(
+            'key', caching.CachedEntry('old', time.time() - 1, 0.1), 60)
+        cache.add(caching.lock_key('key'), True, 30)
+
+        self.assertEqual(
+            caching.get_or_compute('key', self.compute, 60), 'old')
+        self.assertFalse(self.compute.called)
+
+    @patch.object(caching, 'WAIT_TIMEOUT', 0)
+    def test_locked_missing_value_is_computed(self):
+        """If nothing is cached and waiting fails, the value is computed"""
+        cache.add(caching.lock_key('key'), True, 30)
+
+        self.assertEqual(
+            caching.get_or_compute('key', self.compute, 60), 'value')
+        self.assertEqual(self.compute.call_count, 1)
+        # The value is left for the process holding the lock to cache
+        self.assertIsNone(cache.get('key'))
+
+    def test_should_refresh(self):
+        """Values should be refreshed more often as they near expiry"""
+        with patch.object(caching.random, 'random', return_value=0.5):
+            self.assertFalse(caching.should_refresh(time.time() + 60, 1))
+            self.assertTrue(caching.should_refresh(time.time() + 0.1, 1))
+
+    def test_get_many_or_compute(self):
+        """Only missing values should be computed"""
+        caching.get_or_compute('first', lambda: 1, 60)
+        compute_first = Mock(return_value=10)
+
+        result = caching.get_many_or_compute(
+            {'first': compute_first, 'second': lambda: 2}, 60)
+
+        self.assertEqual(result, {'first': 1, 'second': 2})
+        self.assertFalse(compute_first.called)
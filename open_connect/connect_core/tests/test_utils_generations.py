@@ -0,0 +1,96 @@
+"""Tests for utils/generations.py"""
+from django.contrib.auth.models import Group as AuthGroup, Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from mock import patch
+
+from open_connect.accounts.forms import BanUserForm
+from open_connect.connect_core.utils import generations
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestGenerations(ConnectTestMixin, TestCase):
+    """Tests for per-user cache generations"""
+    def setUp(self):
+        """Setup the generation tests"""
+        cache.clear()
+        self.user = self.create_user()
+
+    def test_generation_is_stable(self):
+        """The same key should be returned until the generation is bumped"""
+        self.assertEqual(
+            generations.user_cache_key(self.user.pk, 'thing'),
+            generations.user_cache_key(self.user.pk, 'thing'))
+
+    def test_bump_changes_key(self):
+        """Bumping a generation should change every key of the user"""
+        other_user = self.create_user()
+        key = generations.user_cache_key(self.user.pk, 'thing')
+        other_key = generations.user_cache_key(other_user.pk, 'thing')
+
+        generations.bump_user_generations([self.user.pk])
+
+        self.assertNotEqual(
+            generations.user_cache_key(self.user.pk, 'thing'), key)
+        self.assertEqual(
+            generations.user_cache_key(other_user.pk, 'thing'), other_key)
+
+    def test_evicted_generation_is_not_reused(self):
+        """A lost generation should never restart at an older value"""
+        generation = generations.get_user_generation(self.user.pk)
+        cache.delete(generations.generation_key(self.user.pk))
+
+        self.assertGreater(
+            generations.get_user_generation(self.user.pk), generation)
+
+    def test_generation_read_once_per_request(self):
+        """A generation should only be read from the cache once a request"""
+        # The request signals also close database connections, so only the
+        # receivers are called
+        generations.start_request_generations()
+        self.addCleanup(generations.finish_request_generations)
+        generation = generations.get_user_generation(self.user.pk)
+
+        with patch.object(generations, 'cache') as mock_cache:
+            generations.user_cache_key(self.user.pk, 'thing')
+            generations.user_cache_key(self.user.pk, 'other_thing')
+        self.assertFalse(mock_cache.get.called)
+
+        generations.bump_user_generations([self.user.pk])
+        self.assertGreater(
+            generations.get_user_generation(self.user.pk), generation)
+
+    def test_generation_not_remembered_outside_request(self):
+        """Outside of a request every generation read should be fresh"""
+        generation = generations.get_user_generation(self.user.pk)
+        cache.incr(generations.generation_key(self.user.pk))
+        self.assertEqual(
+            generations.get_user_generation(self.user.pk), generation + 1)
+
+    def test_permission_changes_bump_generation(self):
+        """Changing a user's groups or permissions should bump it"""
+        generation = generations.get_user_generation(self.user.pk)
+        self.add_perm(
+            self.user, 'can_moderate_all_messages', 'accounts', 'user')
+        self.assertGreater(
+            generations.get_user_generation(self.user.pk), generation)
+
+        auth_group = AuthGroup.objects.create(name='Generation Test')
+        self.user.groups.add(auth_group)
+        generation = generations.get_user_generation(self.user.pk)
+        auth_group.permissions.add(
+            Permission.objects.get(codename='can_ban'))
+        self.assertGreater(
+            generations.get_user_generation(self.user.pk), generation)
+
+    def test_ban_bumps_generation(self):
+        """Banning a user should bump their generation"""
+        generation = generations.get_user_generation(self.user.pk)
+        form = BanUserForm({'user': self.user.pk, 'confirm': True})
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertGreater(
+            generations.get_user_generation(self.user.pk), generation)
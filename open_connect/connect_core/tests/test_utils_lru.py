@@ -0,0 +1,58 @@
+"""Test lru.py utilities"""
+from django.test import TestCase
+
+from open_connect.connect_core.utils.lru import LRUCache
+
+
+class TestLRUCache(TestCase):
+    """Testcase for the LRUCache"""
+    def test_get_and_set(self):
+        """Values set in the cache should be returned"""
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('b', 'default'), 'default')
+
+    def test_least_recently_used_evicted(self):
+        """When full, the least recently used entry should be evicted"""
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        # Use 'a' so 'b' becomes the least recently used entry
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertIn('a', lru)
+        self.assertNotIn('b', lru)
+        self.assertIn('c', lru)
+        self.assertEqual(len(lru), 2)
+
+    def test_delete(self):
+        """Deleted entries should no longer be in the cache"""
+        lru = LRUCache()
+        lru.set('a', 1)
+        lru.delete('a')
+        lru.delete('does-not-exist')
+        self.assertNotIn('a', lru)
+
+    def test_stats(self):
+        """Hits and misses should be counted"""
+        lru = LRUCache(maxsize=10)
+        self.assertEqual(lru.stats()['hit_rate'], 0.0)
+        lru.set('a', 1)
+        lru.get('a')
+        lru.get('a')
+        lru.get('a')
+        lru.get('b')
+
+        stats = lru.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.75)
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['maxsize'], 10)
+
+        lru.clear()
+        self.assertEqual(lru.stats()['hits'], 0)
+        self.assertEqual(len(lru), 0)
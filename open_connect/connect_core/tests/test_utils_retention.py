@@ -0,0 +1,67 @@
+"""Tests for utils/retention.py"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils.timezone import now
+from mock import patch
+from model_mommy import mommy
+
+from open_connect.accounts.models import Visit
+from open_connect.connect_core.utils import retention
+
+
+class TestPurgeExpired(TestCase):
+    """Tests for purge_expired"""
+    def setUp(self):
+        """Setup the purge_expired tests"""
+        self.old_visits = [mommy.make(Visit) for _ in range(5)]
+        self.new_visit = mommy.make(Visit)
+        # `created_at` is set on insert so it has to be backdated afterwards
+        Visit.objects.filter(
+            pk__in=[visit.pk for visit in self.old_visits]
+        ).update(created_at=now() - timedelta(days=30))
+
+    def test_deletes_expired_rows_in_batches(self):
+        """Expired rows should be deleted batch_size at a time"""
+        result = retention.purge_expired(
+            Visit, 'created_at', now() - timedelta(days=7), batch_size=2)
+
+        self.assertEqual(result['deleted'], 5)
+        self.assertEqual(result['batches'], 3)
+        self.assertFalse(Visit.objects.filter(
+            pk__in=[visit.pk for visit in self.old_visits]).exists())
+        self.assertTrue(Visit.objects.filter(pk=self.new_visit.pk).exists())
+
+    def test_nothing_expired(self):
+        """Nothing should be deleted if no rows are older than the cutoff"""
+        result = retention.purge_expired(
+            Visit, 'created_at', now() - timedelta(days=60), batch_size=2)
+
+        self.assertEqual(result['deleted'], 0)
+        self.assertEqual(result['batches'], 0)
+        self.assertEqual(Visit.objects.count(), 6)
+
+
+class TestApplyRetentionPolicies(TestCase):
+    """Tests for apply_retention_policies"""
+    @patch.object(retention, 'purge_expired')
+    def test_applies_each_policy(self, mock_purge):
+        """Each policy should be purged and disabled policies skipped"""
+        mock_purge.return_value = {
+            'deleted': 0, 'batches': 0, 'seconds': 0, 'rows_per_second': 0}
+        policies = {
+            'accounts.Visit': {'field': 'created_at', 'days': 30},
+            'media.ShortenedURLClick': {'field': 'created_at', 'days': 0}
+        }
+
+        results = retention.apply_retention_policies(
+            policies=policies, batch_size=10)
+
+        self.assertEqual(results.keys(), ['accounts.Visit'])
+        self.assertEqual(mock_purge.call_count, 1)
+        args = mock_purge.call_args[0]
+        self.assertEqual(args[0], Visit)
+        self.assertEqual(args[1], 'created_at')
+        self.assertAlmostEqual(
+            args[2], now() - timedelta(days=30), delta=timedelta(minutes=1))
+        self.assertEqual(args[3], 10)
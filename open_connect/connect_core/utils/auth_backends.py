@@ -1,8 +1,10 @@
 """Authentication backends for Connect"""
 # pylint: disable=protected-access
-from django.core.cache import cache
 from django.contrib.auth.backends import ModelBackend
 
+from open_connect.connect_core.utils.caching import get_or_compute
+from open_connect.connect_core.utils.generations import user_cache_key
+
 
 class CachedModelAuthBackend(ModelBackend):
     """An extension of `ModelBackend` that allows caching"""
@@ -15,16 +17,12 @@ class CachedModelAuthBackend(ModelBackend):
         # This should still work even if django removes `user._perm_cache` from
         # future releases of the auth `ModelBackend`
         if not hasattr(user_obj, '_perm_cache'):
-            key = '{userkey}_permissions'.format(userkey=user_obj.cache_key)
-            cache_result = cache.get(key)
-            if cache_result is None:
-                user_obj._perm_cache = super(
-                    CachedModelAuthBackend, self).get_all_permissions(
-                        user_obj, obj)
-                # Cache permissions for 15 minutes. As adding a user to a group
-                # will result in a change of the modified_at column and thus
-                # the `cache_key` we don't have to hugely worry about changes
-                cache.set(key, user_obj._perm_cache, 60*30)
-            else:
-                user_obj._perm_cache = cache_result
+            backend = super(CachedModelAuthBackend, self)
+            # Cache permissions for 30 minutes. Changes to a user's groups or
+            # permissions bump their cache generation, so we don't have to
+            # hugely worry about changes
+            user_obj._perm_cache = get_or_compute(
+                user_cache_key(user_obj.pk, 'permissions'),
+                lambda: backend.get_all_permissions(user_obj, obj),
+                60*30)
         return user_obj._perm_cache
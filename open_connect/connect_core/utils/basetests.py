@@ -10,6 +10,19 @@ import open_connect.groups.models as group_models
 
 USER_MODEL = get_user_model()
 
+# CI runs with a dummy cache, so tests which rely on values actually being
+# cached override `CACHES` with these local memory caches
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'connect-tests'
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'connect-tests-shared'
+    }
+}
+
 
 class ConnectTestMixin(object):
     """Mixin for common testing operations"""
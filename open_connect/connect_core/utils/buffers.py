@@ -0,0 +1,136 @@
+"""
+Buffers of records kept in the cache and saved to the database in batches
+
+A buffer is a run of numbered slots. The tail is the number of the last slot
+handed out and the head the number of the last slot drained. Slots are
+numbered with `incr`, so every record gets its own slot, and written with
+`add`, so a slot that hasn't been drained is never overwritten.
+
+A slot can be missing when it's drained, either because the record hasn't
+been written yet (it's handed out a moment before it's written) or because it
+was evicted. Missing slots are checked again on each drain until
+`MISSING_SLOT_GRACE` seconds have passed.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+
+
+LOGGER = logging.getLogger('connect_core.utils.buffers')
+
+# Seconds to keep checking for a slot which was missing when it was drained
+MISSING_SLOT_GRACE = 5*60
+
+# Number of slots to try before giving up on pushing a record
+PUSH_ATTEMPTS = 10
+
+# Most slots to look through if the head has been lost
+MAX_BACKLOG = 100000
+
+# Seconds the lock taken while draining a buffer is held for at most
+DRAIN_LOCK_TIMEOUT = 10*60
+
+
+def tail_key(name):
+    """The cache key holding the number of the last slot handed out"""
+    return '{name}_tail'.format(name=name)
+
+
+def head_key(name):
+    """The cache key holding the number of the last slot drained"""
+    return '{name}_head'.format(name=name)
+
+
+def pending_key(name):
+    """The cache key holding the missing slots to check again"""
+    return '{name}_pending'.format(name=name)
+
+
+def lock_key(name):
+    """The cache key held while a buffer is being drained"""
+    return '{name}_head_lock'.format(name=name)
+
+
+def slot_key(name, index):
+    """The cache key of an individual slot"""
+    return '{name}_{index}'.format(name=name, index=index)
+
+
+def next_slot(name):
+    """Hand out the number of the next slot, or None if the cache can't"""
+    key = tail_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The tail is missing, so start handing out slots after the head
+        # rather than from 0 so that no slot is skipped by the next drain
+        cache.add(key, cache.get(head_key(name), 0), None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return None
+
+
+def push(name, record, timeout):
+    """
+    Push a record into a buffer
+
+    Returns whether the record was buffered. If it wasn't (such as when the
+    cache is unavailable or is a dummy cache) the caller should save the
+    record another way.
+    """
+    for _ in range(PUSH_ATTEMPTS):
+        index = next_slot(name)
+        if index is None:
+            return False
+        if cache.add(slot_key(name, index), record, timeout):
+            return True
+    return False
+
+
+def drain(name, save, batch_size):
+    """
+    Pass every record waiting in a buffer to `save`, a batch at a time
+
+    `save` is called with a list of records and returns how many of them it
+    saved. Only one process drains a buffer at a time; if another process
+    already is, nothing is drained. Returns the number of records saved.
+    """
+    lock = lock_key(name)
+    if not cache.add(lock, True, DRAIN_LOCK_TIMEOUT):
+        return 0
+
+    try:
+        head = cache.get(head_key(name))
+        tail = cache.get(tail_key(name), head or 0)
+        if head is None:
+            # The buffer has never been drained or its head was lost
+            head = max(0, tail - MAX_BACKLOG)
+        pending = cache.get(pending_key(name), {})
+
+        indices = sorted(pending) + range(head + 1, tail + 1)
+        total = 0
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            keys = [slot_key(name, index) for index in batch]
+            records = cache.get_many(keys)
+
+            checked_at = time.time()
+            for index, key in zip(batch, keys):
+                if key in records:
+                    pending.pop(index, None)
+                elif checked_at - pending.setdefault(
+                        index, checked_at) > MISSING_SLOT_GRACE:
+                    LOGGER.warning('Slot %s of %s buffer lost', index, name)
+                    del pending[index]
+
+            total += save(
+                [records[key] for key in keys if key in records])
+            cache.delete_many(records.keys())
+            head = max([head] + batch)
+            cache.set(head_key(name), head, None)
+            cache.set(pending_key(name), pending, None)
+        return total
+    finally:
+        cache.delete(lock)
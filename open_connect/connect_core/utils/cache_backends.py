@@ -0,0 +1,162 @@
+"""Cache backends for Connect"""
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+from open_connect.connect_core.utils.lru import LRUCache
+
+
+# Returned by the shared cache when a key is missing, so that missing keys can
+# be told apart from cached `None` values
+MISSING = object()
+
+
+class TwoTierCache(BaseCache):
+    """
+    A per-process LRU cache in front of a shared cache such as memcached
+
+    Only keys starting with one of `LOCAL_PREFIXES` are kept locally, and only
+    for `LOCAL_TIMEOUT` seconds, as a change made by another process can't
+    remove a key from this process's memory. Keys which are safe to keep
+    locally are ones that never change, or ones which include a generation
+    (see `connect_core.utils.generations`) so that they are replaced by a new
+    key rather than updated.
+
+    Everything is always read from and written to the shared cache as well.
+
+    Options:
+        SHARED_CACHE: alias of the shared cache in `CACHES`
+        LOCAL_PREFIXES: key prefixes which are cached locally
+        LOCAL_TIMEOUT: seconds a key is kept locally
+        LOCAL_MAX_ENTRIES: maximum number of keys kept locally
+    """
+    def __init__(self, location, params):
+        """Initialize the cache"""
+        super(TwoTierCache, self).__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_CACHE', 'shared')
+        self.local_prefixes = tuple(options.get('LOCAL_PREFIXES', ()))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.local = LRUCache(maxsize=options.get('LOCAL_MAX_ENTRIES', 1000))
+
+    @property
+    def shared(self):
+        """The shared cache"""
+        return caches[self._shared_alias]
+
+    def is_local(self, key):
+        """Whether a key should be kept in the local cache"""
+        return bool(self.local_prefixes) and key.startswith(
+            self.local_prefixes)
+
+    def _get_local(self, key, version):
+        """Get a key from the local cache, or `MISSING` if absent or expired"""
+        entry = self.local.get((key, version))
+        if entry is None:
+            return MISSING
+        expires, value = entry
+        if expires < time.time():
+            self.local.delete((key, version))
+            return MISSING
+        return value
+
+    def _set_local(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        """Keep a key in the local cache if it has opted in"""
+        if not self.is_local(key):
+            return
+        local_timeout = self.local_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+        if local_timeout <= 0:
+            self.local.delete((key, version))
+            return
+        self.local.set((key, version), (time.time() + local_timeout, value))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Add a key to the cache if it doesn't already exist"""
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self._set_local(key, value, version, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        """Get a key, from the local cache if possible"""
+        if self.is_local(key):
+            value = self._get_local(key, version)
+            if value is not MISSING:
+                return value
+        value = self.shared.get(key, MISSING, version)
+        if value is MISSING:
+            return default
+        self._set_local(key, value, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set a key in both caches"""
+        self.shared.set(key, value, timeout, version)
+        self._set_local(key, value, version, timeout)
+
+    def delete(self, key, version=None):
+        """Delete a key from both caches"""
+        self.local.delete((key, version))
+        self.shared.delete(key, version)
+
+    def get_many(self, keys, version=None):
+        """Get many keys, only asking the shared cache for those not local"""
+        found = {}
+        remaining = []
+        for key in keys:
+            value = MISSING
+            if self.is_local(key):
+                value = self._get_local(key, version)
+            if value is MISSING:
+                remaining.append(key)
+            else:
+                found[key] = value
+        if remaining:
+            shared_found = self.shared.get_many(remaining, version)
+            for key, value in shared_found.items():
+                self._set_local(key, value, version)
+            found.update(shared_found)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set many keys in both caches"""
+        self.shared.set_many(data, timeout, version)
+        for key, value in data.items():
+            self._set_local(key, value, version, timeout)
+
+    def delete_many(self, keys, version=None):
+        """Delete many keys from both caches"""
+        keys = list(keys)
+        for key in keys:
+            self.local.delete((key, version))
+        self.shared.delete_many(keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        """Increment a key in the shared cache"""
+        self.local.delete((key, version))
+        return self.shared.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        """Decrement a key in the shared cache"""
+        self.local.delete((key, version))
+        return self.shared.decr(key, delta, version)
+
+    def has_key(self, key, version=None):
+        """Whether a key is in the cache"""
+        return self.get(key, MISSING, version) is not MISSING
+
+    def clear(self):
+        """Remove everything from both caches"""
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        """Close the shared cache's connections"""
+        self.shared.close(**kwargs)
+
+    def stats(self):
+        """Statistics for the local cache"""
+        return self.local.stats()
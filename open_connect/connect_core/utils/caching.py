@@ -0,0 +1,120 @@
+"""
+Read-through caching which protects expensive values from stampedes
+
+Values are cached along with when they expire and how long they took to
+compute. As a value nears its expiry each reader has a small, growing chance
+of refreshing it early, so popular values are usually recomputed by a single
+request before they expire rather than by every request after. Only one
+process computes a value at a time; the others keep using the current value,
+even one that has just expired, or wait briefly for the new one if there is
+none.
+
+Keys cached with these helpers must only be read through them, but may be
+deleted with `cache.delete()` as usual. Anything else found under a key, such
+as a bare value cached by older code, is treated as missing.
+"""
+from collections import namedtuple
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+
+# Seconds another process is kept from computing a value while one is already
+# computing it
+LOCK_TIMEOUT = 30
+
+# Seconds a value is kept in the cache after it expires, so that it can still
+# be used while another process recomputes it
+STALE_TIMEOUT = 60
+
+# Seconds to wait for another process to compute a missing value before
+# computing it anyway, and how often to check for it
+WAIT_TIMEOUT = 0.25
+WAIT_INTERVAL = 0.05
+
+# What is cached: the value, when it expires and how long it took to compute
+CachedEntry = namedtuple('CachedEntry', ['value', 'expires', 'delta'])
+
+
+def lock_key(key):
+    """The key held while a value is being computed"""
+    return 'computing_{key}'.format(key=key)
+
+
+def should_refresh(expires, delta, beta=1.0):
+    """
+    Whether a value should be recomputed now
+
+    The chance increases as `expires` approaches, and sooner for values that
+    took longer (`delta` seconds) to compute. A larger `beta` refreshes
+    earlier.
+    """
+    return time.time() - delta * beta * math.log(
+        1.0 - random.random()) >= expires
+
+
+def compute_and_store(key, compute, timeout):
+    """Compute a value and cache it with its expiry and computation time"""
+    started = time.time()
+    value = compute()
+    finished = time.time()
+    cache.set(
+        key, CachedEntry(value, finished + timeout, finished - started),
+        timeout + STALE_TIMEOUT)
+    return value
+
+
+def resolve(key, entry, compute, timeout, beta=1.0):
+    """Return the value of a cache entry, recomputing it if needed"""
+    if not isinstance(entry, CachedEntry):
+        entry = None
+    elif not should_refresh(entry.expires, entry.delta, beta):
+        return entry.value
+
+    if cache.add(lock_key(key), True, LOCK_TIMEOUT):
+        try:
+            return compute_and_store(key, compute, timeout)
+        finally:
+            cache.delete(lock_key(key))
+
+    # Another process is already computing the value, so rather than block
+    # use the current value even if it has expired
+    if entry is not None:
+        return entry.value
+
+    deadline = time.time() + WAIT_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if isinstance(entry, CachedEntry):
+            return entry.value
+
+    # Give up on waiting, leaving it to the other process to cache the value
+    return compute()
+
+
+def get_or_compute(key, compute, timeout, beta=1.0):
+    """
+    Get a value from the cache, calling `compute` to (re)calculate it
+
+    `timeout` is how many seconds the value is cached for. An expired value
+    may still be returned for up to `STALE_TIMEOUT` seconds after, but only
+    while another process is recomputing it.
+    """
+    return resolve(key, cache.get(key), compute, timeout, beta)
+
+
+def get_many_or_compute(computations, timeout, beta=1.0):
+    """
+    Get several values from the cache in one round trip
+
+    `computations` is a dictionary of functions that calculate each value,
+    keyed by cache key. Returns a dictionary of values keyed by cache key.
+    """
+    entries = cache.get_many(computations.keys())
+    return {
+        key: resolve(key, entries.get(key), compute, timeout, beta)
+        for key, compute in computations.items()
+    }
@@ -0,0 +1,93 @@
+"""
+Per-user cache namespaces which are invalidated with a generation counter
+
+Every cache entry that belongs to a user includes the user's current
+generation in its key. Bumping the generation makes every one of those
+entries unreachable at once, on every web node, without loading the user or
+knowing which entries exist. The orphaned entries simply expire.
+
+Generations are remembered for the rest of the request once read, so that
+the per-user keys kept in each process's local cache don't still cost a trip
+to the shared cache for the generation every time they are built.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.dispatch import receiver
+
+
+# Generations read during the current request, keyed by user id. `cache` is
+# only set while a request is being handled.
+_request_generations = threading.local()
+
+
+@receiver(request_started)
+def start_request_generations(**kwargs):
+    """Start remembering the generations read during a request"""
+    # pylint: disable=unused-argument
+    _request_generations.cache = {}
+
+
+@receiver(request_finished)
+def finish_request_generations(**kwargs):
+    """Forget the generations read during a request"""
+    # pylint: disable=unused-argument
+    _request_generations.cache = None
+
+
+def generation_key(user_id):
+    """The cache key which holds a user's generation"""
+    return 'generation_user_{user_id}'.format(user_id=user_id)
+
+
+def new_generation():
+    """
+    A generation which is higher than any handed out before
+
+    If a user's generation is evicted from the cache it must not restart at a
+    value that was already used, or entries from that earlier generation
+    would become reachable again.
+    """
+    return int(time.time() * 1000)
+
+
+def get_user_generation(user_id):
+    """Get a user's current cache generation"""
+    remembered = getattr(_request_generations, 'cache', None)
+    if remembered is not None and user_id in remembered:
+        return remembered[user_id]
+
+    key = generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = new_generation()
+        # Another process may have set the generation first, in which case
+        # theirs is used
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+
+    if remembered is not None:
+        remembered[user_id] = generation
+    return generation
+
+
+def user_cache_key(user_id, name):
+    """The key of the cache entry `name` in a user's current generation"""
+    return 'user_{user_id}_{generation}_{name}'.format(
+        user_id=user_id, generation=get_user_generation(user_id), name=name)
+
+
+def bump_user_generations(user_ids):
+    """Invalidate every per-user cache entry of each user in `user_ids`"""
+    remembered = getattr(_request_generations, 'cache', None)
+    for user_id in set(user_ids):
+        if remembered is not None:
+            remembered.pop(user_id, None)
+        try:
+            cache.incr(generation_key(user_id))
+        except ValueError:
+            # There's no generation to increment, so anything cached for the
+            # user was in a generation which can't be reached anymore
+            pass
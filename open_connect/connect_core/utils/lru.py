@@ -0,0 +1,71 @@
+"""A small, thread-safe, bounded least-recently-used cache"""
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache(object):
+    """
+    In-process cache which holds at most `maxsize` entries
+
+    When the cache is full the entry that was used least recently is evicted.
+    Hits and misses are counted so callers can report how effective the cache
+    is via `stats()`.
+    """
+    def __init__(self, maxsize=1000):
+        """Initialize the cache"""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        """Number of entries currently in the cache"""
+        return len(self._data)
+
+    def __contains__(self, key):
+        """Whether a key is currently in the cache"""
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Get a value from the cache, marking it as recently used"""
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Add a value to the cache, evicting the oldest entry if full"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a value from the cache if it exists"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove everything from the cache and reset the statistics"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return a dictionary of cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0
+        }
@@ -0,0 +1,75 @@
+"""Delete expired rows from tracking tables in bounded batches"""
+from datetime import timedelta
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.utils.timezone import now
+
+
+LOGGER = logging.getLogger('connect_core.utils.retention')
+
+
+def purge_expired(model, field, cutoff, batch_size):
+    """
+    Delete every row of `model` whose `field` is older than `cutoff`
+
+    Rows are deleted `batch_size` at a time, each batch in its own statement,
+    so that no single delete locks the table for long or leaves a huge number
+    of dead rows for the vacuum to deal with at once.
+
+    Returns a dictionary with the number of rows deleted, the number of
+    batches it took, the number of seconds spent and the rows per second.
+    """
+    expired = model.objects.filter(
+        **{'{field}__lt'.format(field=field): cutoff}).order_by('pk')
+
+    deleted = 0
+    batches = 0
+    started = time.time()
+
+    while True:
+        pks = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        model.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        batches += 1
+        if len(pks) < batch_size:
+            break
+
+    seconds = time.time() - started
+    return {
+        'deleted': deleted,
+        'batches': batches,
+        'seconds': seconds,
+        'rows_per_second': deleted / seconds if seconds else 0.0
+    }
+
+
+def apply_retention_policies(policies=None, batch_size=None):
+    """
+    Purge expired rows for each policy in `settings.RETENTION_POLICIES`
+
+    Returns a dictionary of `purge_expired` results keyed by model label.
+    """
+    if policies is None:
+        policies = settings.RETENTION_POLICIES
+    if batch_size is None:
+        batch_size = settings.RETENTION_BATCH_SIZE
+
+    results = {}
+    for label, policy in policies.items():
+        if not policy['days']:
+            continue
+        model = apps.get_model(label)
+        cutoff = now() - timedelta(days=policy['days'])
+        result = purge_expired(model, policy['field'], cutoff, batch_size)
+        LOGGER.info(
+            'Retention for %s: deleted %s rows older than %s in %s batches'
+            ' (%.2f seconds, %.0f rows/second)',
+            label, result['deleted'], cutoff, result['batches'],
+            result['seconds'], result['rows_per_second'])
+        results[label] = result
+    return results
@@ -1,7 +1,6 @@
 """Models related to sending messages."""
 # pylint: disable=no-init
 from bs4 import BeautifulSoup
-from datetime import timedelta
 import logging
 import re
 
@@ -10,13 +9,15 @@ from django.conf import settings
 from django.db import models
 from django.db.models import Q, ObjectDoesNotExist
 from django.utils.encoding import smart_text
-from django.utils.timezone import now
 from unidecode import unidecode
 import pytz
 
 from open_connect.media.models import Image, ShortenedURL
 from open_connect.notifications.models import Subscription
 from open_connect.connectmessages import tasks
+from open_connect.connectmessages.rate_limits import (
+    can_send_direct_message, record_direct_message
+)
 
 from open_connect.connect_core.utils.models import TimestampModel
 from open_connect.connect_core.utils.stringhelp import unicode_or_empty
@@ -373,8 +374,7 @@ class Thread(TimestampModel):
             return True
 
         # Check to see if the group is one that the user is moderating
-        if self.group and user.groups_moderating.filter(
-                pk=self.group.pk).exists():
+        if self.group_id and self.group_id in user.owned_group_ids:
             return True
 
         # Default to false
@@ -455,6 +455,9 @@ class Message(TimestampModel):
 
             self.thread.add_user_to_thread(self.sender)
 
+            if self.thread.thread_type == 'direct':
+                record_direct_message(self.sender_id)
+
             if self.status == 'approved':
                 tasks.send_message(self.pk, False)
 
@@ -520,8 +523,6 @@ class Message(TimestampModel):
 
     def get_initial_status(self):
         """Returns the initial status of the message when created"""
-        yesterday = now() - timedelta(hours=24)
-
         if self.is_system_message:
             # If a system message auto-approve
             status = 'approved'
@@ -536,7 +537,7 @@ class Message(TimestampModel):
             status = 'approved'
 
         elif (self.thread.thread_type == 'direct' and
-              self.sender.direct_messages_sent_since(yesterday) <= 10):
+              can_send_direct_message(self.sender_id)):
             # Up to 10 DMs per day may be sent without moderation
             status = 'approved'
 
@@ -644,7 +645,7 @@ class Message(TimestampModel):
 
         # Unapproved messages should be visible to moderators
         if (user.global_moderator or
-                self.thread.group in user.groups_moderating):
+                self.thread.group_id in user.owned_group_ids):
             return True
 
         # By default a message shouldn't be available
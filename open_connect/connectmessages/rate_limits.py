@@ -0,0 +1,109 @@
+"""
+Limit on the number of direct messages a user can send without moderation
+
+Direct messages sent by each user are counted in the cache in hourly buckets,
+so checking the limit is a single `get_many` no matter how many messages the
+user has sent. The counts are seeded from the database whenever the cache has
+lost them, and at least every `DIRECT_MESSAGE_RECONCILE_INTERVAL` seconds to
+correct any drift, such as a bucket being evicted.
+
+The window is the current hour plus the 23 before it, so it covers between
+23 and 24 hours.
+"""
+import calendar
+from collections import Counter
+from datetime import timedelta
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.utils.timezone import now
+
+
+# Number of direct messages a user can have sent in the window and still have
+# their next one approved automatically
+DIRECT_MESSAGE_LIMIT = 10
+
+DIRECT_MESSAGE_WINDOW_HOURS = 24
+DIRECT_MESSAGE_BUCKET_TIMEOUT = (DIRECT_MESSAGE_WINDOW_HOURS + 1)*60*60
+DIRECT_MESSAGE_RECONCILE_INTERVAL = 60*60
+
+
+def current_hour():
+    """The number of hours since the epoch"""
+    return int(time.time() // 3600)
+
+
+def direct_message_bucket_key(user_id, hour):
+    """The cache key counting a user's direct messages sent in an hour"""
+    return 'dmlimit_{user_id}_{hour}'.format(user_id=user_id, hour=hour)
+
+
+def direct_message_seeded_key(user_id):
+    """The cache key present while a user's buckets are trusted"""
+    return 'dmlimit_{user_id}_seeded'.format(user_id=user_id)
+
+
+def seed_direct_message_counts(user_id):
+    """
+    Count a user's recent direct messages from the database into the cache
+
+    Returns the number of direct messages in the window.
+    """
+    message_model = apps.get_model('connectmessages', 'Message')
+    hour = current_hour()
+    first_hour = hour - DIRECT_MESSAGE_WINDOW_HOURS + 1
+    sent_at = message_model.objects.filter(
+        sender_id=user_id, thread__thread_type='direct',
+        created_at__gte=now() - timedelta(hours=DIRECT_MESSAGE_WINDOW_HOURS)
+    ).values_list('created_at', flat=True)
+
+    counts = Counter(
+        calendar.timegm(created_at.utctimetuple()) // 3600
+        for created_at in sent_at)
+    buckets = {
+        direct_message_bucket_key(user_id, bucket_hour): counts[bucket_hour]
+        for bucket_hour in range(first_hour, hour + 1)
+    }
+    cache.set_many(buckets, DIRECT_MESSAGE_BUCKET_TIMEOUT)
+    cache.set(
+        direct_message_seeded_key(user_id), True,
+        DIRECT_MESSAGE_RECONCILE_INTERVAL)
+    return sum(buckets.values())
+
+
+def direct_messages_sent_recently(user_id):
+    """The number of direct messages a user has sent in the window"""
+    hour = current_hour()
+    seeded_key = direct_message_seeded_key(user_id)
+    keys = [
+        direct_message_bucket_key(user_id, bucket_hour) for bucket_hour
+        in range(hour - DIRECT_MESSAGE_WINDOW_HOURS + 1, hour + 1)
+    ]
+    cached = cache.get_many(keys + [seeded_key])
+    if seeded_key not in cached:
+        return seed_direct_message_counts(user_id)
+    return sum(cached.get(key, 0) for key in keys)
+
+
+def can_send_direct_message(user_id):
+    """Whether a user's next direct message can be approved automatically"""
+    return direct_messages_sent_recently(user_id) <= DIRECT_MESSAGE_LIMIT
+
+
+def record_direct_message(user_id):
+    """
+    Count a direct message a user has just sent
+
+    If the message can't be counted in the cache the user's counts are
+    forgotten, so they're recounted from the database on the next check.
+    """
+    key = direct_message_bucket_key(user_id, current_hour())
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, DIRECT_MESSAGE_BUCKET_TIMEOUT)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.delete(direct_message_seeded_key(user_id))
@@ -156,10 +156,8 @@ def send_system_message(recipient, subject, message_content):
 
     # Use BeautifulSoup to remove any HTML from the message to make the
     # plaintext email version of the message
-    notification, created = Notification.objects.get_or_create(
-        recipient_id=recipient.pk,
-        message=message
-    )
+    created = Notification.objects.create_missing(
+        message.pk, [(recipient.pk, None)])
 
     if created and recipient.group_notification_period == 'immediate':
-        send_immediate_notification.delay(notification.pk)
+        send_immediate_notification.delay(created[recipient.pk])
@@ -0,0 +1,82 @@
+"""Tests for connectmessages.rate_limits."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from open_connect.connectmessages import rate_limits
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DirectMessageRateLimitTest(ConnectTestMixin, TestCase):
+    """Tests for limiting unmoderated direct messages."""
+    def setUp(self):
+        """Create a user with no messages."""
+        self.user = self.create_user()
+
+    def forget_counts(self):
+        """Lose everything cached about the user's direct messages."""
+        cache.delete(rate_limits.direct_message_seeded_key(self.user.pk))
+        cache.delete(rate_limits.direct_message_bucket_key(
+            self.user.pk, rate_limits.current_hour()))
+
+    def test_direct_messages_counted(self):
+        """Sending a direct message should be counted in the cache."""
+        self.create_thread(direct=True, sender=self.user)
+        self.create_thread(direct=True, sender=self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                rate_limits.direct_messages_sent_recently(self.user.pk), 2)
+
+    def test_group_messages_not_counted(self):
+        """Only direct messages should count towards the limit."""
+        self.create_thread(sender=self.user)
+        self.assertEqual(
+            rate_limits.direct_messages_sent_recently(self.user.pk), 0)
+
+    def test_counts_recovered_from_database(self):
+        """If the cache loses the counts they should be recounted."""
+        self.create_thread(direct=True, sender=self.user)
+        self.create_thread(direct=True, sender=self.user)
+        self.forget_counts()
+
+        self.assertEqual(
+            rate_limits.direct_messages_sent_recently(self.user.pk), 2)
+        self.assertEqual(cache.get(rate_limits.direct_message_bucket_key(
+            self.user.pk, rate_limits.current_hour())), 2)
+
+    def test_reconcile_corrects_drift(self):
+        """Reseeding should replace counts which have drifted."""
+        self.create_thread(direct=True, sender=self.user)
+        cache.set(rate_limits.direct_message_bucket_key(
+            self.user.pk, rate_limits.current_hour()), 50)
+
+        self.assertEqual(
+            rate_limits.seed_direct_message_counts(self.user.pk), 1)
+        self.assertTrue(rate_limits.can_send_direct_message(self.user.pk))
+
+    def test_limit(self):
+        """Users over the limit can't send direct messages unmoderated."""
+        self.assertTrue(rate_limits.can_send_direct_message(self.user.pk))
+        for _ in range(rate_limits.DIRECT_MESSAGE_LIMIT):
+            rate_limits.record_direct_message(self.user.pk)
+        self.assertTrue(rate_limits.can_send_direct_message(self.user.pk))
+
+        rate_limits.record_direct_message(self.user.pk)
+        self.assertFalse(rate_limits.can_send_direct_message(self.user.pk))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class DirectMessageRateLimitWithoutCacheTest(ConnectTestMixin, TestCase):
+    """Tests for limiting direct messages when nothing can be cached."""
+    def test_counted_from_database(self):
+        """Direct messages should be counted from the database instead."""
+        user = self.create_user()
+        rate_limits.record_direct_message(user.pk)
+        self.create_thread(direct=True, sender=user)
+
+        self.assertEqual(
+            rate_limits.direct_messages_sent_recently(user.pk), 1)
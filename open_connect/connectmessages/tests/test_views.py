@@ -466,6 +466,25 @@ class DirectMessageCreateViewTest(ConnectTestMixin, DjangoTestCase):
             str(response.cookies)
         )
 
+    def test_over_direct_message_limit_shows_pending(self):
+        """Users over the direct message limit should be told to expect
+        their message to be moderated"""
+        sender = self.create_user()
+        staff_member = self.create_user(is_staff=True)
+        self.login(sender)
+        url = reverse(
+            'create_direct_message', kwargs={'user_uuid': staff_member.uuid})
+
+        response = self.client.get(url)
+        self.assertFalse(response.context['direct_message_pending'])
+        self.assertNotContains(response, 'Your message is pending approval')
+
+        with patch.object(
+                views, 'can_send_direct_message', return_value=False):
+            response = self.client.get(url)
+        self.assertTrue(response.context['direct_message_pending'])
+        self.assertContains(response, 'Your message is pending approval')
+
     def test_regular_user_can_direct_message_staff(self):
         """Test that regular users can direct message staff"""
         sender = self.create_user()
@@ -1271,10 +1290,10 @@ class UnreadMessageCountViewTest(ConnectTestMixin, DjangoTestCase):
         self.assertEqual(content['success'], True)
         self.assertEqual(content['errors'], [])
 
-    @patch('open_connect.accounts.models.cache')
-    def test_count_includes_moderation_tasks(self, mock_cache):
+    @patch('open_connect.accounts.models.get_many_or_compute')
+    def test_count_includes_moderation_tasks(self, mock_get_many):
         """Count should include any moderation tasks."""
-        mock_cache.get_many.return_value = {
+        mock_get_many.return_value = {
             '{}_messages_to_mod'.format(self.user.pk): 1,
             '{}_groups_to_mod'.format(self.user.pk): 1
         }
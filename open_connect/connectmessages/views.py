@@ -31,6 +31,7 @@ from open_connect.connectmessages.forms import (
 from open_connect.connectmessages.models import (
     Message, UserThread, Thread, ImageAttachment
 )
+from open_connect.connectmessages.rate_limits import can_send_direct_message
 from open_connect.connect_core.utils.mixins import SortableListMixin
 from open_connect.connect_core.utils.stringhelp import str_to_bool
 from open_connect.connect_core.utils.views import (
@@ -367,6 +368,11 @@ class SingleGroupMessageCreateView(CommonViewMixin, MessageCreateView):
         return context
 
 
+def direct_message_pending(user):
+    """Whether a user's next direct message will need to be approved"""
+    return not user.is_superuser and not can_send_direct_message(user.pk)
+
+
 # pylint: disable=attribute-defined-outside-init
 class DirectMessageCreateView(MessageCreateView):
     """View for creating a new message to another user."""
@@ -394,6 +400,8 @@ class DirectMessageCreateView(MessageCreateView):
         context = super(
             DirectMessageCreateView, self).get_context_data(**kwargs)
         context['recipient'] = self.recipient
+        context['direct_message_pending'] = direct_message_pending(
+            self.request.user)
         context['nav_active_item'] = 'Threads'
         return context
 
@@ -469,6 +477,8 @@ class DirectMessageReplyView(MessageReplyView):
             DirectMessageReplyView, self).get_context_data(**kwargs)
         context['recipient'] = self.thread.recipients.exclude(
             pk=self.request.user.pk).get()
+        context['direct_message_pending'] = direct_message_pending(
+            self.request.user)
         return context
 
     def form_valid(self, form):
@@ -1,7 +1,114 @@
 """ Connect Context Processor """
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.conf import settings
 
+from open_connect.connect_core.utils.generations import user_cache_key
+
+
+# Navigation only changes when a user's permissions or groups change, both of
+# which bump the user's cache generation, so it can be cached for a while
+NAV_CACHE_TIMEOUT = 60*60
+
+# Links which are the same for everyone, resolved once per process
+_NAV_URLS = {}
+
+
+def nav_url(name):
+    """Reverse a URL which takes no arguments, caching the result"""
+    if name not in _NAV_URLS:
+        _NAV_URLS[name] = reverse(name)
+    return _NAV_URLS[name]
+
+
+def nav_cache_key(user):
+    """The cache key of a user's navigation"""
+    # Staff and superuser status aren't part of the user's generation
+    return user_cache_key(user.pk, 'nav_{staff:d}{superuser:d}'.format(
+        staff=user.is_staff, superuser=user.is_superuser))
+
+
+def build_nav(user):
+    """Build the navigation menus for an authenticated user"""
+    nav_items = [
+        {'label': 'Messages',
+         'link': nav_url('threads'), 'class': 'threads'},
+        {'label': 'Explore', 'link': nav_url('explore')},
+        {'label': 'Resources', 'link': nav_url('resources')},
+
+    ]
+
+    nav2_items = [
+        {'label': 'My Profile',
+         'link': nav_url('user_profile')},
+        {'label': 'Manage My Account',
+         'link': reverse('update_user', args=(user.uuid,))},
+        {'label': 'Update My Email Address',
+         'link': nav_url('account_email')},
+        {'label': 'Change My Password',
+         'link': nav_url('account_change_password')},
+        {'label': 'Logout', 'link': nav_url('account_logout')},
+    ]
+
+    admin_items = []
+    # This will need to be changed to find if a user is a moderator
+    # once we start allowing non-staff moderators
+    if user.can_moderate:
+        admin_items.append({
+            'label': 'Message Moderation',
+            'link': nav_url('mod_admin')
+        })
+        admin_items.append({
+            'label': 'Flag Moderation Log',
+            'link': nav_url('flag_log')
+        })
+        admin_items.append({
+            'label': 'Group Moderation',
+            'link': nav_url('moderate_requests')
+        })
+    if user.has_perm('media.can_access_admin_gallery'):
+        admin_items.append(
+            {'label': 'Admin Gallery', 'link': nav_url('admin_gallery')}
+        )
+    if user.has_perm('media.can_access_popular_urls'):
+        admin_items.append(
+            {'label': 'Popular URLs', 'link': nav_url('url_popularity')}
+        )
+    if user.has_perm('accounts.add_invite'):
+        admin_items.append(
+            {'label': 'Invites', 'link': nav_url('invites')}
+        )
+    if user.has_perm('groups.change_category') and user.is_staff:
+        admin_items.append(
+            {'label': 'Category Admin',
+             'link': nav_url('admin:groups_category_changelist')}
+        )
+    if user.has_perm('accounts.can_view_user_report'):
+        admin_items.append({
+            'label': 'User Report', 'link': nav_url('users_report')
+        })
+    if user.has_perm('accounts.can_view_group_report'):
+        admin_items.append({
+            'label': 'Group Report', 'link': nav_url('groups_report')
+        })
+    if user.has_perm('mailer.can_view_email_report'):
+        admin_items.append({
+            'label': 'Email Report', 'link': nav_url('emails_report')
+        })
+    if user.has_perm('taggit.add_tag'):
+        admin_items.append(
+            {'label': 'Tag Admin',
+             'link': nav_url('admin:taggit_tag_changelist')}
+        )
+
+    if admin_items:
+        nav_items.insert(
+            -1,
+            {'label': 'Admin', 'link': '#', 'menu': admin_items}
+        )
+
+    return {'nav_items': nav_items, 'nav2_items': nav2_items}
+
 
 def connect_processor(request):
     """Connect context processor configured to send simple information"""
@@ -12,88 +119,24 @@ def connect_processor(request):
     context['icon_prefix'] = settings.ICON_PREFIX
 
     if user.is_authenticated():
-        context['nav_items'] = [
-            {'label': 'Messages',
-             'link': reverse('threads'), 'class': 'threads'},
-            {'label': 'Explore', 'link': reverse('explore')},
-            {'label': 'Resources', 'link': reverse('resources')},
-
-        ]
-
-        context['nav2_items'] = [
-            {'label': 'My Profile',
-             'link': reverse('user_profile')},
-            {'label': 'Manage My Account',
-             'link': reverse('update_user', args=(user.uuid,))},
-            {'label': 'Update My Email Address',
-             'link': reverse('account_email')},
-            {'label': 'Change My Password',
-             'link': reverse('account_change_password')},
-            {'label': 'Logout', 'link': reverse('account_logout')},
-        ]
-
-        admin_items = []
-        # This will need to be changed to find if a user is a moderator
-        # once we start allowing non-staff moderators
-        if user.can_moderate:
-            admin_items.append({
-                'label': 'Message Moderation',
-                'link': reverse('mod_admin')
-            })
-            admin_items.append({
-                'label': 'Flag Moderation Log',
-                'link': reverse('flag_log')
-            })
-            admin_items.append({
-                'label': 'Group Moderation',
-                'link': reverse('moderate_requests')
-            })
-        if user.has_perm('media.can_access_admin_gallery'):
-            admin_items.append(
-                {'label': 'Admin Gallery', 'link': reverse('admin_gallery')}
-            )
-        if user.has_perm('media.can_access_popular_urls'):
-            admin_items.append(
-                {'label': 'Popular URLs', 'link': reverse('url_popularity')}
-            )
-        if user.has_perm('accounts.add_invite'):
-            admin_items.append(
-                {'label': 'Invites', 'link': reverse('invites')}
-            )
-        if user.has_perm('groups.change_category') and user.is_staff:
-            admin_items.append(
-                {'label': 'Category Admin',
-                 'link': reverse('admin:groups_category_changelist')}
-            )
-        if user.has_perm('accounts.can_view_user_report'):
-            admin_items.append({
-                'label': 'User Report', 'link': reverse('users_report')
-            })
-        if user.has_perm('accounts.can_view_group_report'):
-            admin_items.append({
-                'label': 'Group Report', 'link': reverse('groups_report')
-            })
-        if user.has_perm('taggit.add_tag'):
-            admin_items.append(
-                {'label': 'Tag Admin',
-                 'link': reverse('admin:taggit_tag_changelist')}
-            )
-
-        if admin_items:
-            context['nav_items'].insert(
-                -1,
-                {'label': 'Admin', 'link': '#', 'menu': admin_items}
-            )
+        # The cached menus may be shared between requests, so they must never
+        # be modified
+        key = nav_cache_key(user)
+        nav = cache.get(key)
+        if nav is None:
+            nav = build_nav(user)
+            cache.set(key, nav, NAV_CACHE_TIMEOUT)
+        context.update(nav)
 
     else:
         context['nav_items'] = []
         context['nav2_items'] = [{
             'label': 'Login',
-            'link': reverse('account_login')
+            'link': nav_url('account_login')
         }, {
             'label': 'Signup',
-            'link': reverse('account_signup')
+            'link': nav_url('account_signup')
         }]
-        context['login_url'] = reverse('account_login')
+        context['login_url'] = nav_url('account_login')
 
     return context
@@ -8,7 +8,9 @@ from mock import patch
 from open_connect.context_processors.connect_processor import connect_processor
 from open_connect.media.models import Image
 from open_connect.connectmessages.tests import ConnectMessageTestCase
-from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
 
 
 class TestConnectProcessor(ConnectTestMixin, ConnectMessageTestCase):
@@ -133,3 +135,33 @@ class TestConnectProcessor(ConnectTestMixin, ConnectMessageTestCase):
             response['nav_items'][-2]['menu'][0]['link'],
             reverse('admin_gallery')
         )
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_nav_is_cached(self):
+        """Rendering the nav again should not query the database."""
+        user = self.create_user()
+        request = self.request_factory.get('/')
+        request.user = user
+        first_response = connect_processor(request)
+
+        with self.assertNumQueries(0):
+            response = connect_processor(request)
+        self.assertEqual(response['nav_items'], first_response['nav_items'])
+        self.assertEqual(response['nav2_items'], first_response['nav2_items'])
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_permission_change_rebuilds_nav(self):
+        """Gaining a permission should show up in the cached nav."""
+        user = self.create_user()
+        request = self.request_factory.get('/')
+        request.user = user
+        response = connect_processor(request)
+        self.assertNotIn(
+            'Admin', [item['label'] for item in response['nav_items']])
+
+        self.add_perm(user, 'can_view_user_report', 'accounts', 'user')
+        # Load the user again so the permissions aren't cached on the object
+        request.user = type(user).objects.get(pk=user.pk)
+        response = connect_processor(request)
+        self.assertEqual(
+            response['nav_items'][-2]['menu'][0]['label'], 'User Report')
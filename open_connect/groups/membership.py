@@ -0,0 +1,80 @@
+"""
+Cached ids of the groups a user has joined, owns or is whitelisted in
+
+Membership is cached as a sorted tuple of group ids rather than a queryset,
+so it is small to store and can be checked against without a query. The
+cache lives in the user's generation, which is bumped whenever their
+membership changes.
+"""
+from django.apps import apps
+from django.core.cache import cache
+
+from open_connect.connect_core.utils.generations import user_cache_key
+
+
+# Change whenever the format of the cached membership changes
+MEMBERSHIP_CACHE_VERSION = 1
+
+# Membership is invalidated as it changes, so it can be cached for 1 week
+MEMBERSHIP_CACHE_TIMEOUT = 7*24*60*60
+
+MEMBERSHIP_KINDS = ('joined', 'owned', 'whitelisted')
+
+
+def membership_cache_key(user_id, kind):
+    """The cache key of one kind of membership for a user"""
+    return user_cache_key(user_id, 'membership_{kind}_v{version}'.format(
+        kind=kind, version=MEMBERSHIP_CACHE_VERSION))
+
+
+def query_group_ids(user_id, kind):
+    """Get a sorted tuple of group ids for a user from the database"""
+    group_model = apps.get_model('groups', 'Group')
+    if kind == 'joined':
+        group_ids = group_model.objects.filter(
+            group__user__id=user_id).values_list('pk', flat=True)
+    elif kind == 'owned':
+        group_ids = group_model.owners.through.objects.filter(
+            user_id=user_id).values_list('group_id', flat=True)
+    elif kind == 'whitelisted':
+        group_ids = group_model.whitelist_users.through.objects.filter(
+            user_id=user_id).values_list('group_id', flat=True)
+    else:
+        raise ValueError('Unknown membership kind %s' % kind)
+    return tuple(sorted(group_ids))
+
+
+def get_group_ids(user_id, kind):
+    """Get a frozenset of the ids of the groups a user has a membership in"""
+    key = membership_cache_key(user_id, kind)
+    group_ids = cache.get(key)
+    if group_ids is None:
+        group_ids = query_group_ids(user_id, kind)
+        cache.set(key, group_ids, MEMBERSHIP_CACHE_TIMEOUT)
+    return frozenset(group_ids)
+
+
+def get_memberships(user_id):
+    """
+    Get every kind of membership for a user with one trip to the cache
+
+    Returns a dictionary of frozensets of group ids keyed by kind.
+    """
+    keys = {
+        kind: membership_cache_key(user_id, kind)
+        for kind in MEMBERSHIP_KINDS}
+    cached = cache.get_many(keys.values())
+
+    memberships = {}
+    missing = {}
+    for kind, key in keys.items():
+        if key in cached:
+            group_ids = cached[key]
+        else:
+            group_ids = query_group_ids(user_id, kind)
+            missing[key] = group_ids
+        memberships[kind] = frozenset(group_ids)
+
+    if missing:
+        cache.set_many(missing, MEMBERSHIP_CACHE_TIMEOUT)
+    return memberships
@@ -2,7 +2,6 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group as AuthGroup, Permission
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
 from django.db import models
@@ -15,6 +14,7 @@ import autocomplete_light
 
 from open_connect.media.models import Image, ShortenedURL
 from open_connect.connectmessages.models import Thread, Message
+from open_connect.connect_core.utils.generations import bump_user_generations
 from open_connect.connect_core.utils.location import get_coordinates, STATES
 from open_connect.connect_core.utils.models import TimestampModel
 from open_connect.groups.tasks import remove_user_from_group
@@ -302,6 +302,18 @@ class Group(TimestampModel):
             message__status='approved')
 
 
+def reset_authorization(user):
+    """
+    Forget the memberships memoized for a user during the current request
+
+    Only a user changed through their own side of a relation (such as
+    `user.owned_groups_set.add(group)`) can be reset, as the other side only
+    passes the ids of the users changed.
+    """
+    if user.authorization is not None:
+        user.authorization.reset()
+
+
 def group_owners_changed(**kwargs):
     """
     Handle changes in group ownership.
@@ -313,9 +325,13 @@ def group_owners_changed(**kwargs):
     if kwargs['action'] in ['post_add', 'post_remove']:
         users = get_user_model().objects.filter(pk__in=kwargs['pk_set'])
 
-        # Clear the user's 'owned_groups' cache
-        for user in users:
-            cache.delete(user.cache_key + 'owned_groups')
+        # Invalidate the users' cached group ownership
+        if kwargs['reverse']:
+            user_ids = [kwargs['instance'].pk]
+            reset_authorization(kwargs['instance'])
+        else:
+            user_ids = kwargs['pk_set']
+        bump_user_generations(user_ids)
 
     # Make sure group owners can direct message all other users
     if kwargs['action'] == 'post_add':
@@ -329,6 +345,20 @@ def group_owners_changed(**kwargs):
 m2m_changed.connect(group_owners_changed, Group.owners.through)
 
 
+def group_whitelist_changed(**kwargs):
+    """Invalidate the cached whitelisted groups of users added or removed"""
+    if kwargs['action'] in ['post_add', 'post_remove']:
+        if kwargs['reverse']:
+            user_ids = [kwargs['instance'].pk]
+            reset_authorization(kwargs['instance'])
+        else:
+            user_ids = kwargs['pk_set']
+        bump_user_generations(user_ids)
+
+
+m2m_changed.connect(group_whitelist_changed, Group.whitelist_users.through)
+
+
 class GroupRequestManager(models.Manager):
     """Manager for GroupRequest."""
     def unapproved(self):
@@ -3,7 +3,6 @@
 import logging
 
 from celery import shared_task
-from django.core.cache import cache
 from django.db import connection
 from django.template.loader import render_to_string
 
@@ -81,9 +80,6 @@ def add_user_to_group(user_id, group_id, notification=None, period=None):
     # Create all the new userthreads
     UserThread.objects.bulk_create(new_userthreads)
 
-    # Clear the user's 'groups joined' cache
-    cache.delete(user.cache_key + 'groups_joined')
-
     # If necessary, notify the user they've been added to the group
     if notification:
         send_system_message.delay(
@@ -174,9 +170,6 @@ def remove_user_from_group(user, group):
     # Remove the user from the django group
     user.groups.remove(group.group)
 
-    # Clear the user's 'groups joined' cache
-    cache.delete(user.cache_key + 'groups_joined')
-
     # Send a signal notifying that a group member was removed
     group_member_removed.send(Group, user=user, group=group)
 
@@ -0,0 +1,55 @@
+"""Tests for groups.membership."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from mock import patch
+
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
+from open_connect.groups import membership
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GetGroupIdsTest(ConnectTestMixin, TestCase):
+    """Tests for get_group_ids."""
+    def setUp(self):
+        """Setup the get_group_ids tests"""
+        cache.clear()
+        self.user = self.create_user()
+        self.group = self.create_group()
+        self.user.add_to_group(self.group.pk)
+
+    def test_caches_sorted_tuple(self):
+        """Group ids should be cached as a sorted tuple."""
+        other_group = self.create_group()
+        self.user.add_to_group(other_group.pk)
+
+        group_ids = membership.get_group_ids(self.user.pk, 'joined')
+
+        self.assertEqual(group_ids, frozenset([self.group.pk, other_group.pk]))
+        self.assertEqual(
+            cache.get(membership.membership_cache_key(self.user.pk, 'joined')),
+            tuple(sorted([self.group.pk, other_group.pk])))
+
+    @patch.object(membership, 'query_group_ids')
+    def test_cached_ids_are_used(self, mock_query):
+        """The database should only be queried when nothing is cached."""
+        mock_query.return_value = (self.group.pk,)
+
+        membership.get_group_ids(self.user.pk, 'owned')
+        membership.get_group_ids(self.user.pk, 'owned')
+
+        self.assertEqual(mock_query.call_count, 1)
+
+    def test_leaving_group_clears_cache(self):
+        """Leaving a group should remove it from the cached ids."""
+        self.assertIn(self.group.pk, self.user.joined_group_ids)
+
+        self.user.remove_from_group(self.group)
+
+        self.assertNotIn(self.group.pk, self.user.joined_group_ids)
+
+    def test_unknown_kind(self):
+        """Asking for an unknown kind of membership should raise an error."""
+        with self.assertRaises(ValueError):
+            membership.get_group_ids(self.user.pk, 'banned')
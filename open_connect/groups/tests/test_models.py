@@ -12,6 +12,7 @@ from django.utils.timezone import now
 from mock import patch
 from model_mommy import mommy
 
+from open_connect.accounts.authorization import AuthorizationContext
 from open_connect.connect_core.utils.basetests import ConnectTestMixin
 from open_connect.groups import models
 from open_connect.groups.models import Category, Group, GroupRequest
@@ -386,7 +387,7 @@ class GroupOwnersChangedReceiverTest(ConnectTestMixin, TestCase):
         group.owners.add(user)
         self.assertTrue(user.has_perm('accounts.can_initiate_direct_messages'))
 
-    @patch('open_connect.groups.models.cache')
+    @patch('open_connect.groups.models.bump_user_generations')
     def test_adding_clears_cache(self, mock):
         """Test that the cache is cleared for each owner added"""
         group = self.create_group()
@@ -396,8 +397,8 @@ class GroupOwnersChangedReceiverTest(ConnectTestMixin, TestCase):
         group.owners.add(user1)
         group.owners.add(user2)
 
-        mock.delete.assert_any_call(user1.cache_key + 'owned_groups')
-        mock.delete.assert_any_call(user2.cache_key + 'owned_groups')
+        mock.assert_any_call(set([user1.pk]))
+        mock.assert_any_call(set([user2.pk]))
 
     def test_removing_clears_cache(self):
         """Test that the cache is cleared for each owner removing"""
@@ -408,23 +409,61 @@ class GroupOwnersChangedReceiverTest(ConnectTestMixin, TestCase):
         # Because the cache is cleared when we add the user to the group using
         # the same receiver, we should separate out those calls and confirm
         # they happened
-        with patch('open_connect.groups.models.cache') as cache_add_mock:
+        with patch(
+                'open_connect.groups.models.bump_user_generations'
+        ) as add_mock:
             group.owners.add(user1)
             group.owners.add(user2)
-            cache_add_mock.delete.assert_any_call(
-                user1.cache_key + 'owned_groups')
-            cache_add_mock.delete.assert_any_call(
-                user2.cache_key + 'owned_groups')
-            self.assertEqual(cache_add_mock.delete.call_count, 2)
+            add_mock.assert_any_call(set([user1.pk]))
+            add_mock.assert_any_call(set([user2.pk]))
+            self.assertEqual(add_mock.call_count, 2)
 
-        with patch('open_connect.groups.models.cache') as cache_remove_mock:
+        with patch(
+                'open_connect.groups.models.bump_user_generations'
+        ) as remove_mock:
             group.owners.remove(user1)
             group.owners.remove(user2)
-            cache_remove_mock.delete.assert_any_call(
-                user1.cache_key + 'owned_groups')
-            cache_remove_mock.delete.assert_any_call(
-                user2.cache_key + 'owned_groups')
-            self.assertEqual(cache_remove_mock.delete.call_count, 2)
+            remove_mock.assert_any_call(set([user1.pk]))
+            remove_mock.assert_any_call(set([user2.pk]))
+            self.assertEqual(remove_mock.call_count, 2)
+
+    def test_owning_group_updates_owned_group_ids(self):
+        """Adding and removing owners should update owned_group_ids"""
+        group = self.create_group()
+        user = self.create_user()
+        self.assertNotIn(group.pk, user.owned_group_ids)
+
+        group.owners.add(user)
+        self.assertIn(group.pk, user.owned_group_ids)
+
+        user.owned_groups_set.remove(group)
+        self.assertNotIn(group.pk, user.owned_group_ids)
+
+    def test_whitelisting_updates_whitelisted_group_ids(self):
+        """Whitelisting a user should update whitelisted_group_ids"""
+        group = self.create_group()
+        user = self.create_user()
+        self.assertNotIn(group.pk, user.whitelisted_group_ids)
+
+        group.whitelist_users.add(user)
+        self.assertIn(group.pk, user.whitelisted_group_ids)
+
+        group.whitelist_users.remove(user)
+        self.assertNotIn(group.pk, user.whitelisted_group_ids)
+
+    def test_changes_reset_authorization(self):
+        """Owning or whitelisting through the user should reset their memo"""
+        group = self.create_group()
+        user = self.create_user()
+        user.authorization = AuthorizationContext(user)
+        self.assertNotIn(group.pk, user.owned_group_ids)
+        self.assertNotIn(group.pk, user.whitelisted_group_ids)
+
+        user.owned_groups_set.add(group)
+        self.assertIn(group.pk, user.owned_group_ids)
+
+        user.whitelist_set.add(group)
+        self.assertIn(group.pk, user.whitelisted_group_ids)
 
 
 class GroupImagesTest(ConnectTestMixin, TestCase):
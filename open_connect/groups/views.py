@@ -114,7 +114,7 @@ class GroupUpdateView(GroupCreateView, CommonViewMixin):
     def dispatch(self, request, *args, **kwargs):
         """Disallow non-owners or permissioned admins from accessing"""
         if not (self.request.user.has_perm('groups.can_edit_any_group') or
-                self.group in self.request.user.groups_moderating):
+                self.group.pk in self.request.user.owned_group_ids):
             raise Http404
         return super(GroupUpdateView, self).dispatch(request, *args, **kwargs)
 
@@ -160,7 +160,7 @@ class GroupDetailView(CommonViewMixin, DetailView):
     def get_context_data(self, **kwargs):
         """Add public threads to view context"""
         context = super(GroupDetailView, self).get_context_data(**kwargs)
-        if self.object in self.request.user.groups_joined:
+        if self.object.pk in self.request.user.joined_group_ids:
             threads = self.object.public_threads_by_user(
                 self.request.user
             ).select_related(
@@ -242,9 +242,8 @@ class GroupListView(CommonViewMixin, ListView):
             requested_ids = GroupRequest.objects.filter(
                 user=user, approved__isnull=True).values_list(
                     'group_id', flat=True)
-            subscribed_ids = user.groups_joined.values_list('pk', flat=True)
-            moderating_ids = user.groups_moderating.values_list(
-                'id', flat=True)
+            subscribed_ids = user.joined_group_ids
+            moderating_ids = user.owned_group_ids
         else:
             requested_ids = []
             subscribed_ids = []
@@ -407,8 +406,8 @@ class GroupMemberListView(PaginationMixin, ListView):
         context['group'] = group
         context['total_members'] = group.get_members().count()
         context['q'] = self.request.GET.get('q', '')
-        context['user_is_owner'] = self.request.user.groups_moderating.filter(
-            pk=self.kwargs.get('pk'))
+        context['user_is_owner'] = (
+            group.pk in self.request.user.owned_group_ids)
         context['group_owners'] = group.owners.all().select_related(
             'image').order_by('first_name')
         return context
@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 
-from open_connect.mailer.models import Unsubscribe
+from open_connect.mailer.models import OutgoingEmail, Unsubscribe
 
 
 class UnsubscribeAdmin(admin.ModelAdmin):
@@ -27,4 +27,15 @@ class UnsubscribeAdmin(admin.ModelAdmin):
         return queryset
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Admin for the outbound email spool"""
+    list_display = (
+        'email', 'subject', 'status', 'attempts', 'created_at',
+        'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    readonly_fields = ['attempts', 'sent_at', 'last_error']
+    search_fields = ['email', 'subject']
+
+
 admin.site.register(Unsubscribe, UnsubscribeAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1 @@
+"""Management command functionality for the mailer app"""
@@ -0,0 +1,53 @@
+"""Command to unsubscribe a large number of email addresses at once"""
+from datetime import timedelta
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from django_bouncy.models import Bounce, Complaint
+
+from open_connect.mailer.models import Unsubscribe
+
+
+class Command(BaseCommand):
+    """Command to bulk unsubscribe addresses from files or bounce reports"""
+    help = ("Unsubscribe every address listed (one per line) in the given"
+            " files, or standard input, or reported by django_bouncy")
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', type=str)
+        parser.add_argument(
+            '--source', default='bounce',
+            choices=[choice[0] for choice in Unsubscribe._meta.get_field(
+                'source').choices])
+        parser.add_argument(
+            '--bouncy', action='store_true', default=False,
+            help='Suppress hard bounces and complaints from django_bouncy')
+        parser.add_argument(
+            '--days', type=int, default=1,
+            help='How many days of bounces and complaints to suppress')
+
+    def handle(self, *args, **options):
+        """Handle command."""
+        if options['bouncy']:
+            since = now() - timedelta(days=options['days'])
+            bounces = Bounce.objects.filter(
+                hard=True, created_at__gte=since).values_list(
+                    'address', flat=True)
+            complaints = Complaint.objects.filter(
+                created_at__gte=since).values_list('address', flat=True)
+            created = (
+                Unsubscribe.objects.bulk_suppress(bounces, 'bounce')
+                + Unsubscribe.objects.bulk_suppress(complaints, 'complaint'))
+        else:
+            addresses = []
+            for filename in options['files'] or ['-']:
+                if filename == '-':
+                    addresses.extend(sys.stdin)
+                else:
+                    with open(filename) as address_file:
+                        addresses.extend(address_file)
+            created = Unsubscribe.objects.bulk_suppress(
+                addresses, options['source'])
+
+        self.stdout.write('Unsubscribed %s new addresses' % created)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0002_emailopen_opened_at_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailopen',
+            name='opened_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, db_index=True),
+        ),
+    ]
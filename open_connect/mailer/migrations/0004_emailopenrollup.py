@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0003_emailopen_opened_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailopen',
+            name='email_type',
+            field=models.CharField(max_length=50, null=True, blank=True),
+        ),
+        migrations.CreateModel(
+            name='EmailOpenRollup',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('day', models.DateField()),
+                ('email_type', models.CharField(max_length=50, blank=True)),
+                ('breakdown', models.CharField(default=b'browser', max_length=20, choices=[(b'browser', b'Browser'), (b'operating_system', b'Operating System'), (b'device_family', b'Device Family')])),
+                ('value', models.CharField(max_length=255, blank=True)),
+                ('opens', models.IntegerField(default=0)),
+                ('unique_opens', models.IntegerField(default=0)),
+            ],
+            options={
+                'permissions': (('can_view_email_report', 'Can view email engagement report.'),),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='emailopenrollup',
+            unique_together=set([('day', 'email_type', 'breakdown', 'value')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='emailopenrollup',
+            index_together=set([('day', 'breakdown', 'email_type')]),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+import open_connect.connect_core.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0004_emailopenrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('email', models.EmailField(max_length=254)),
+                ('from_email', models.CharField(max_length=255)),
+                ('subject', models.TextField()),
+                ('text', models.TextField()),
+                ('html', models.TextField()),
+                ('status', models.CharField(default=b'pending', max_length=20, choices=[(b'pending', b'Pending'), (b'sending', b'Sending'), (b'sent', b'Sent'), (b'failed', b'Failed')])),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('leased_until', models.DateTimeField(null=True, blank=True)),
+                ('sent_at', models.DateTimeField(null=True, blank=True)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(open_connect.connect_core.utils.models.CacheMixinModel, models.Model),
+        ),
+        migrations.AlterIndexTogether(
+            name='outgoingemail',
+            index_together=set([('status', 'next_attempt_at')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0005_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='unsubscribe',
+            name='source',
+            field=models.CharField(max_length=50, choices=[(b'bounce', b'Bounce Report'), (b'complaint', b'Complaint Report'), (b'user', b'End User')]),
+        ),
+    ]
@@ -6,15 +6,35 @@ import logging
 from django.core.cache import cache
 from django.conf import settings
 from django.db import models
+from django.utils.timezone import now
 
 from open_connect.accounts.models import User
 from open_connect.connect_core.utils.models import TimestampModel
 
 UNSUBSCRIBE_SOURCES = (
     ('bounce', 'Bounce Report'),
+    ('complaint', 'Complaint Report'),
     ('user', 'End User'),
 )
 
+# Number of addresses to look up and insert at once when suppressing in bulk
+SUPPRESS_BATCH_SIZE = 1000
+
+OUTGOING_EMAIL_STATUSES = (
+    ('pending', 'Pending'),
+    ('sending', 'Sending'),
+    ('sent', 'Sent'),
+    ('failed', 'Failed'),
+)
+
+# The client attributes email opens are rolled up by. Each open is rolled up
+# once per breakdown so that unique opens are counted per breakdown value.
+EMAIL_OPEN_BREAKDOWNS = (
+    ('browser', 'Browser'),
+    ('operating_system', 'Operating System'),
+    ('device_family', 'Device Family'),
+)
+
 
 LOGGER = logging.getLogger('mailer.models')
 
@@ -27,7 +47,10 @@ def _cache_name(address):
 
 class EmailOpen(models.Model):
     """Email open model"""
-    opened_at = models.DateTimeField(auto_now_add=True)
+    # Opens are buffered and saved in batches, so `opened_at` is set when the
+    # open is recorded rather than when the row is inserted. It is indexed so
+    # that expired opens can be found quickly by the retention task.
+    opened_at = models.DateTimeField(default=now, db_index=True)
     email = models.EmailField(db_index=True)
     key = models.CharField(max_length=50, db_index=True)
     timestamp = models.DateTimeField()
@@ -42,6 +65,7 @@ class EmailOpen(models.Model):
         max_length=50, null=True, blank=True, db_index=True)
     referrer = models.URLField(max_length=255, null=True, blank=True)
     referrer_netloc = models.URLField(max_length=255, null=True, blank=True)
+    email_type = models.CharField(max_length=50, null=True, blank=True)
 
     def save(self, *args, **kwargs):
         """Save the instance."""
@@ -60,6 +84,54 @@ class EmailOpen(models.Model):
         return super(EmailOpen, self).save(*args, **kwargs)
 
 
+class EmailOpenRollup(models.Model):
+    """Number of email opens per day by email type and client attribute"""
+    day = models.DateField()
+    email_type = models.CharField(max_length=50, blank=True)
+    breakdown = models.CharField(
+        choices=EMAIL_OPEN_BREAKDOWNS, max_length=20, default='browser')
+    value = models.CharField(max_length=255, blank=True)
+    opens = models.IntegerField(default=0)
+    unique_opens = models.IntegerField(default=0)
+
+    class Meta(object):
+        """Meta class for EmailOpenRollup model"""
+        unique_together = ['day', 'email_type', 'breakdown', 'value']
+        index_together = [['day', 'breakdown', 'email_type']]
+        permissions = (
+            ('can_view_email_report', 'Can view email engagement report.'),
+        )
+
+    def __unicode__(self):
+        """Unicode method for EmailOpenRollup model"""
+        return u"{day} {email_type} {opens} opens".format(
+            day=self.day, email_type=self.email_type, opens=self.opens)
+
+
+class OutgoingEmail(TimestampModel):
+    """A rendered email waiting in (or delivered from) the outbound spool"""
+    email = models.EmailField()
+    from_email = models.CharField(max_length=255)
+    subject = models.TextField()
+    text = models.TextField()
+    html = models.TextField()
+    status = models.CharField(
+        choices=OUTGOING_EMAIL_STATUSES, max_length=20, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta(object):
+        """Meta class for OutgoingEmail model"""
+        index_together = [['status', 'next_attempt_at']]
+
+    def __unicode__(self):
+        """Unicode method for OutgoingEmail model"""
+        return u"Email to %s: %s" % (self.email, self.subject)
+
+
 class UnsubscribeManager(models.Manager):
     """Manager for the Unsubscribe model"""
     def address_exists(self, address):
@@ -84,6 +156,46 @@ class UnsubscribeManager(models.Manager):
                 cache.set(_cache_name(address), False)
                 return False
 
+    def bulk_suppress(self, addresses, source='bounce'):
+        """
+        Unsubscribe a large number of addresses at once
+
+        Addresses are de-duplicated, users are matched and new records are
+        inserted `SUPPRESS_BATCH_SIZE` at a time rather than one `save()` per
+        address, then the suppression cache is warmed for every address.
+
+        Returns the number of new unsubscribe records created.
+        """
+        addresses = sorted(set(
+            address.strip() for address in addresses if address.strip()))
+        created = 0
+
+        for start in range(0, len(addresses), SUPPRESS_BATCH_SIZE):
+            batch = addresses[start:start + SUPPRESS_BATCH_SIZE]
+            existing = set(self.get_queryset().filter(
+                address__in=batch).values_list('address', flat=True))
+            users = dict(User.objects.filter(
+                email__in=batch).values_list('email', 'pk'))
+
+            new_records = [
+                Unsubscribe(
+                    address=address, source=source,
+                    user_id=users.get(address))
+                for address in batch if address not in existing
+            ]
+            self.bulk_create(new_records)
+            created += len(new_records)
+
+            # `address_exists` treats any cached value other than `False` as
+            # an unsubscribed address
+            cache.set_many(
+                {_cache_name(address): True for address in batch})
+
+        LOGGER.info(
+            'Bulk Unsubscribe Type: %s Addresses: %s New: %s',
+            source, len(addresses), created)
+        return created
+
 
 class Unsubscribe(TimestampModel):
     """Unsubscribe action model"""
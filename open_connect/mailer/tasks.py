@@ -1,16 +1,155 @@
 """Tasks for mailer app"""
 # pylint: disable=not-callable
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+import logging
 
-from django.utils.timezone import now
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils.timezone import now, utc
 from celery import shared_task
 
-from open_connect.mailer.models import EmailOpen
+from open_connect.connect_core.utils import buffers
+from open_connect.connect_core.utils.retention import apply_retention_policies
+from open_connect.mailer.models import (
+    EMAIL_OPEN_BREAKDOWNS, EmailOpen, EmailOpenRollup, OutgoingEmail
+)
+from open_connect.mailer.utils import (
+    build_open, deliver_outgoing_email, email_spool_stats,
+    lease_outgoing_email, useragent_cache_stats, OPEN_BUFFER_KEY
+)
+
+
+LOGGER = logging.getLogger('mailer.tasks')
+
+# Number of buffered opens to read from the cache and insert at once
+OPEN_BUFFER_BATCH_SIZE = 500
+
+# Maximum number of spooled emails to attempt in a single run
+EMAIL_SPOOL_BATCH_SIZE = 500
+EMAIL_SPOOL_LOCK_KEY = 'outgoingemail_spool_lock'
 
 
 @shared_task()
 def wipe_old_email_opens():
     """Clear old email opens"""
-    # We don't need/care about email opens older than 2 weeks
-    EmailOpen.objects.exclude(
-        opened_at__gte=now()-timedelta(weeks=2)).delete()
+    # Email opens are now purged along with the other tracking tables by
+    # `connect_core.tasks.enforce_retention_policies`
+    apply_retention_policies(
+        policies={'mailer.EmailOpen': settings.RETENTION_POLICIES[
+            'mailer.EmailOpen']})
+
+
+def save_buffered_opens(records):
+    """Save a batch of buffered email opens"""
+    opens = []
+    for record in records:
+        try:
+            opens.append(build_open(
+                record['data'], record['headers'], record['opened_at']))
+        except (KeyError, ValueError, TypeError):
+            LOGGER.warning('Discarding malformed email open %s', record)
+
+    EmailOpen.objects.bulk_create(opens)
+    return len(opens)
+
+
+@shared_task()
+def process_buffered_opens():
+    """Save all email opens waiting in the open buffer"""
+    total = buffers.drain(
+        OPEN_BUFFER_KEY, save_buffered_opens, OPEN_BUFFER_BATCH_SIZE)
+    if total:
+        LOGGER.info(
+            'Saved %s buffered email opens. Useragent cache: %s',
+            total, useragent_cache_stats())
+
+
+def rollup_email_opens_for_day(day):
+    """Replace the `EmailOpenRollup` rows for a single (UTC) day"""
+    start = datetime.combine(day, time.min).replace(tzinfo=utc)
+    day_opens = EmailOpen.objects.filter(
+        opened_at__gte=start, opened_at__lt=start + timedelta(days=1))
+
+    # Unique opens can't be added up across client attributes (one person
+    # can open an email in two browsers), so each breakdown is counted
+    # separately rather than summed from a combined row.
+    rollups = []
+    for breakdown, _ in EMAIL_OPEN_BREAKDOWNS:
+        opens = day_opens.values('email_type', breakdown).annotate(
+            total=Count('id'), unique=Count('email', distinct=True)
+        ).order_by()
+        rollups.extend(
+            EmailOpenRollup(
+                day=day,
+                email_type=row['email_type'] or '',
+                breakdown=breakdown,
+                value=row[breakdown] or '',
+                opens=row['total'],
+                unique_opens=row['unique']
+            ) for row in opens
+        )
+
+    # If the raw opens have already been purged keep the existing rollup
+    if not rollups:
+        return 0
+
+    with transaction.atomic():
+        EmailOpenRollup.objects.filter(day=day).delete()
+        EmailOpenRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+@shared_task()
+def rollup_email_opens():
+    """Summarize email opens into daily `EmailOpenRollup` rows"""
+    today = now().date()
+
+    # The most recent day already rolled up may have been incomplete at the
+    # time, so it is rolled up again along with every day since.
+    day = EmailOpenRollup.objects.aggregate(last=Max('day'))['last']
+    if day is None:
+        first_open = EmailOpen.objects.aggregate(
+            first=Min('opened_at'))['first']
+        if first_open is None:
+            return
+        day = first_open.astimezone(utc).date()
+
+    while day <= today:
+        rows = rollup_email_opens_for_day(day)
+        LOGGER.info('Rolled up email opens for %s into %s rows', day, rows)
+        day += timedelta(days=1)
+
+
+@shared_task()
+def drain_email_spool():
+    """Retry spooled emails that are due another delivery attempt"""
+    # Only one worker should ever be draining the spool at a time
+    if not cache.add(EMAIL_SPOOL_LOCK_KEY, True, 10*60):
+        return
+
+    try:
+        # Emails being sent by another process are skipped until their lease
+        # expires, which only happens if that process died
+        due = OutgoingEmail.objects.filter(
+            Q(status='pending', next_attempt_at__lte=now())
+            | Q(status='sending', leased_until__lte=now())
+        ).order_by('next_attempt_at')[:EMAIL_SPOOL_BATCH_SIZE]
+
+        sent = 0
+        attempted = 0
+        for outgoing in due:
+            if not lease_outgoing_email(outgoing):
+                continue
+            attempted += 1
+            if deliver_outgoing_email(outgoing):
+                sent += 1
+
+        stats = email_spool_stats()
+        LOGGER.info(
+            'Email spool: sent %s of %s due emails. %s emails pending, oldest'
+            ' %.0f seconds old', sent, attempted, stats['depth'],
+            stats['oldest_age'])
+    finally:
+        cache.delete(EMAIL_SPOOL_LOCK_KEY)
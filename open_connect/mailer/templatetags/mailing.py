@@ -60,7 +60,7 @@ def email_image_max_width(image, max_width, extras=''):
 
 
 @register.simple_tag
-def tracking_pixel(email, notification_id=None):
+def tracking_pixel(email, notification_id=None, email_type=None):
     """Returns a mailing tracking pixel"""
     data = {
         # Email Address
@@ -74,6 +74,10 @@ def tracking_pixel(email, notification_id=None):
     if notification_id:
         data['n'] = notification_id
 
+    # Add the type of email (if available) for engagement reporting
+    if email_type:
+        data['y'] = email_type
+
     encoded_data, verification_hash = url_representation_encode(data)
     gif_url = reverse(
         'email_open',
@@ -0,0 +1,64 @@
+"""Tests for the mailer app's management commands"""
+from StringIO import StringIO
+from tempfile import NamedTemporaryFile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django_bouncy.models import Bounce, Complaint
+from mock import patch
+from model_mommy import mommy
+
+from open_connect.mailer.models import Unsubscribe
+
+
+class TestSuppressAddresses(TestCase):
+    """Tests for the suppress_addresses command"""
+    def setUp(self):
+        """Setup the TestSuppressAddresses TestCase"""
+        cache_patcher = patch('open_connect.mailer.models.cache')
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+    def suppress(self, *args, **kwargs):
+        """Run the command and return what it wrote"""
+        out = StringIO()
+        call_command('suppress_addresses', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_suppress_files(self):
+        """Every address listed in the given files should be unsubscribed"""
+        with NamedTemporaryFile() as address_file:
+            address_file.write('file1@example.com\nfile2@example.com\n')
+            address_file.flush()
+            output = self.suppress(address_file.name, source='user')
+
+        self.assertIn('Unsubscribed 2 new addresses', output)
+        self.assertEqual(
+            set(Unsubscribe.objects.filter(source='user').values_list(
+                'address', flat=True)),
+            {'file1@example.com', 'file2@example.com'})
+
+    def test_suppress_stdin(self):
+        """Addresses should be read from standard input without any files"""
+        with patch('sys.stdin', StringIO('stdin@example.com\n')):
+            output = self.suppress()
+
+        self.assertIn('Unsubscribed 1 new addresses', output)
+        self.assertTrue(Unsubscribe.objects.filter(
+            address='stdin@example.com', source='bounce').exists())
+
+    def test_suppress_bouncy(self):
+        """Hard bounces and complaints should be unsubscribed"""
+        mommy.make(Bounce, address='hard@example.com', hard=True)
+        mommy.make(Bounce, address='soft@example.com', hard=False)
+        mommy.make(Complaint, address='complaint@example.com')
+
+        output = self.suppress(bouncy=True)
+
+        self.assertIn('Unsubscribed 2 new addresses', output)
+        self.assertTrue(Unsubscribe.objects.filter(
+            address='hard@example.com', source='bounce').exists())
+        self.assertTrue(Unsubscribe.objects.filter(
+            address='complaint@example.com', source='complaint').exists())
+        self.assertFalse(Unsubscribe.objects.filter(
+            address='soft@example.com').exists())
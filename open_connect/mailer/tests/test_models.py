@@ -72,6 +72,41 @@ class TestUnsubscribeManager(TestCase):
         self.mockcache.set.assert_called_with(
             models._cache_name('nope@example.com'), first_unsub)
 
+    def test_bulk_suppress(self):
+        """Test unsubscribing many addresses at once"""
+        user = maker.make('accounts.User', email='bulk1@example.com')
+        maker.make(models.Unsubscribe, address='bulk2@example.com')
+
+        created = models.Unsubscribe.objects.bulk_suppress([
+            'bulk1@example.com', 'bulk2@example.com', ' bulk3@example.com\n',
+            'bulk1@example.com', ''
+        ], 'complaint')
+
+        self.assertEqual(created, 2)
+        first = models.Unsubscribe.objects.get(address='bulk1@example.com')
+        self.assertEqual(first.user, user)
+        self.assertEqual(first.source, 'complaint')
+        self.assertEqual(models.Unsubscribe.objects.filter(
+            address='bulk2@example.com').count(), 1)
+        self.assertTrue(models.Unsubscribe.objects.filter(
+            address='bulk3@example.com', user__isnull=True).exists())
+
+        # Every address, including those already unsubscribed, is cached
+        self.mockcache.set_many.assert_called_once_with({
+            models._cache_name('bulk1@example.com'): True,
+            models._cache_name('bulk2@example.com'): True,
+            models._cache_name('bulk3@example.com'): True
+        })
+
+    @patch.object(models, 'SUPPRESS_BATCH_SIZE', 2)
+    def test_bulk_suppress_batches(self):
+        """Test that addresses are suppressed in batches"""
+        created = models.Unsubscribe.objects.bulk_suppress(
+            ['batch%s@example.com' % num for num in range(5)])
+
+        self.assertEqual(created, 5)
+        self.assertEqual(self.mockcache.set_many.call_count, 3)
+
 
 class TestUnsubscribeModel(TestCase):
     """Tests for the Unsubscribe model"""
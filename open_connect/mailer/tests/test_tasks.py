@@ -1,13 +1,20 @@
 """Test for mailer tasks"""
 # pylint: disable=invalid-name
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 
-from django.test import TestCase
-from django.utils.timezone import now
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.timezone import now, utc
+from mock import patch
 from model_mommy import mommy
 
-from open_connect.mailer.models import EmailOpen
+from open_connect.connect_core.utils.basetests import LOCMEM_CACHES
+from open_connect.mailer.models import (
+    EmailOpen, EmailOpenRollup, OutgoingEmail
+)
 from open_connect.mailer import tasks
+from open_connect.mailer.utils import buffer_open, OPEN_BUFFER_HEAD_KEY
+from open_connect.mailer.tests.test_utils import OPEN_DATA, DEMO_USER_AGENT
 
 
 class TestWipeOldEmailOpens(TestCase):
@@ -44,3 +51,194 @@ class TestWipeOldEmailOpens(TestCase):
         all_email_opens_post = EmailOpen.objects.all()
         self.assertIn(latest_email_open, all_email_opens_post)
         self.assertNotIn(old_email_open, all_email_opens_post)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestProcessBufferedOpens(TestCase):
+    """Tests for process_buffered_opens"""
+    def setUp(self):
+        """Setup the TestProcessBufferedOpens TestCase"""
+        cache.clear()
+        self.headers = {
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_USER_AGENT': DEMO_USER_AGENT
+        }
+
+    def test_opens_saved(self):
+        """Buffered opens should be saved to the database"""
+        initial_count = EmailOpen.objects.count()
+        buffer_open(OPEN_DATA, self.headers)
+        buffer_open(OPEN_DATA, self.headers)
+
+        tasks.process_buffered_opens()
+
+        self.assertEqual(EmailOpen.objects.count(), initial_count + 2)
+        new_open = EmailOpen.objects.latest('pk')
+        self.assertEqual(new_open.email, 'me@razzmatazz.local')
+        self.assertEqual(new_open.browser, 'Chrome 33.0.1750')
+        self.assertEqual(cache.get(OPEN_BUFFER_HEAD_KEY), 2)
+
+    def test_opens_only_saved_once(self):
+        """Running the task twice should not save an open twice"""
+        initial_count = EmailOpen.objects.count()
+        buffer_open(OPEN_DATA, self.headers)
+
+        tasks.process_buffered_opens()
+        tasks.process_buffered_opens()
+
+        self.assertEqual(EmailOpen.objects.count(), initial_count + 1)
+
+    def test_locked(self):
+        """If another worker holds the lock nothing should be processed"""
+        initial_count = EmailOpen.objects.count()
+        buffer_open(OPEN_DATA, self.headers)
+        cache.add(OPEN_BUFFER_HEAD_KEY + '_lock', True)
+
+        tasks.process_buffered_opens()
+
+        self.assertEqual(EmailOpen.objects.count(), initial_count)
+
+
+class TestRollupEmailOpens(TestCase):
+    """Tests for rollup_email_opens"""
+    def make_open(self, opened_at, **kwargs):
+        """Make an EmailOpen opened at a specific time"""
+        kwargs.setdefault('email', 'me@razzmatazz.local')
+        return mommy.make(
+            EmailOpen, opened_at=opened_at, user_agent='', **kwargs)
+
+    def test_rollup_for_day(self):
+        """Opens should be counted by email type and client"""
+        opened_at = datetime(2015, 3, 2, 12, tzinfo=utc)
+        for _ in range(2):
+            self.make_open(
+                opened_at, email_type='digest', browser='Chrome 40',
+                operating_system='Mac OS X', device_family='Other')
+        self.make_open(
+            opened_at, email='you@razzmatazz.local', email_type='digest',
+            browser='Chrome 40', operating_system='Mac OS X',
+            device_family='Other')
+        self.make_open(opened_at, browser='Firefox 35')
+        # The next (UTC) day should not be counted
+        self.make_open(
+            datetime(2015, 3, 3, 0, 30, tzinfo=utc), email_type='digest',
+            browser='Chrome 40', operating_system='Mac OS X',
+            device_family='Other')
+
+        # Two email types in each of the three breakdowns
+        self.assertEqual(tasks.rollup_email_opens_for_day(date(2015, 3, 2)), 6)
+
+        digest = EmailOpenRollup.objects.get(
+            day=date(2015, 3, 2), email_type='digest', breakdown='browser')
+        self.assertEqual(digest.value, 'Chrome 40')
+        self.assertEqual(digest.opens, 3)
+        self.assertEqual(digest.unique_opens, 2)
+
+        other = EmailOpenRollup.objects.get(
+            day=date(2015, 3, 2), email_type='', breakdown='browser')
+        self.assertEqual(other.value, 'Firefox 35')
+        self.assertEqual(other.opens, 1)
+
+    def test_unique_opens_per_breakdown(self):
+        """Unique opens should not be summed across other client attributes"""
+        opened_at = datetime(2015, 3, 2, 12, tzinfo=utc)
+        self.make_open(
+            opened_at, email_type='digest', browser='Chrome 40',
+            device_family='Other')
+        self.make_open(
+            opened_at, email_type='digest', browser='Chrome 40',
+            device_family='iPhone')
+
+        tasks.rollup_email_opens_for_day(date(2015, 3, 2))
+
+        browser = EmailOpenRollup.objects.get(
+            day=date(2015, 3, 2), breakdown='browser')
+        self.assertEqual(browser.opens, 2)
+        self.assertEqual(browser.unique_opens, 1)
+        self.assertEqual(
+            EmailOpenRollup.objects.filter(
+                day=date(2015, 3, 2), breakdown='device_family').count(),
+            2)
+
+    def test_rollup_replaces_existing_day(self):
+        """Rolling up a day again should replace the old rows"""
+        opened_at = datetime(2015, 3, 2, 12, tzinfo=utc)
+        self.make_open(opened_at, email_type='digest')
+        tasks.rollup_email_opens_for_day(date(2015, 3, 2))
+        self.make_open(opened_at, email_type='digest')
+        tasks.rollup_email_opens_for_day(date(2015, 3, 2))
+
+        rollup = EmailOpenRollup.objects.get(
+            day=date(2015, 3, 2), breakdown='browser')
+        self.assertEqual(rollup.opens, 2)
+
+    def test_purged_day_is_kept(self):
+        """A day without raw opens should keep its existing rollup"""
+        mommy.make(EmailOpenRollup, day=date(2015, 3, 2), opens=5)
+        self.assertEqual(tasks.rollup_email_opens_for_day(date(2015, 3, 2)), 0)
+        self.assertEqual(
+            EmailOpenRollup.objects.get(day=date(2015, 3, 2)).opens, 5)
+
+    def test_rollup_since_last_day(self):
+        """Every day from the last rolled up day until today is rolled up"""
+        today = now().date()
+        mommy.make(EmailOpenRollup, day=today - timedelta(days=2))
+        with patch.object(tasks, 'rollup_email_opens_for_day') as mock_rollup:
+            mock_rollup.return_value = 0
+            tasks.rollup_email_opens()
+
+        self.assertEqual(
+            [call[0][0] for call in mock_rollup.call_args_list],
+            [today - timedelta(days=2), today - timedelta(days=1), today])
+
+
+class TestDrainEmailSpool(TestCase):
+    """Tests for drain_email_spool"""
+    def setUp(self):
+        """Setup the TestDrainEmailSpool TestCase"""
+        cache.clear()
+
+    @patch.object(tasks, 'deliver_outgoing_email')
+    def test_due_emails_are_delivered(self, mock_deliver):
+        """Only pending emails that are due should be attempted"""
+        mock_deliver.return_value = True
+        due = mommy.make(
+            OutgoingEmail, next_attempt_at=now() - timedelta(minutes=1))
+        mommy.make(
+            OutgoingEmail, next_attempt_at=now() + timedelta(minutes=5))
+        mommy.make(
+            OutgoingEmail, status='sent',
+            next_attempt_at=now() - timedelta(minutes=1))
+
+        tasks.drain_email_spool()
+
+        mock_deliver.assert_called_once_with(due)
+
+    @patch.object(tasks, 'deliver_outgoing_email')
+    def test_emails_being_sent_are_skipped(self, mock_deliver):
+        """Emails leased to another process are only retried once the lease
+        has expired"""
+        mock_deliver.return_value = True
+        mommy.make(
+            OutgoingEmail, status='sending',
+            next_attempt_at=now() - timedelta(minutes=5),
+            leased_until=now() + timedelta(minutes=5))
+        expired = mommy.make(
+            OutgoingEmail, status='sending',
+            next_attempt_at=now() - timedelta(minutes=30),
+            leased_until=now() - timedelta(minutes=1))
+
+        tasks.drain_email_spool()
+
+        mock_deliver.assert_called_once_with(expired)
+
+    @patch.object(tasks, 'deliver_outgoing_email')
+    def test_locked(self, mock_deliver):
+        """Nothing should be sent while another worker drains the spool"""
+        mommy.make(
+            OutgoingEmail, next_attempt_at=now() - timedelta(minutes=1))
+        cache.add(tasks.EMAIL_SPOOL_LOCK_KEY, True)
+
+        tasks.drain_email_spool()
+
+        self.assertFalse(mock_deliver.called)
@@ -61,3 +61,20 @@ class TestTrackingPixel(TestCase):
                                              gif=gif_url)
 
         self.assertIn(pixel_code, result)
+
+    @patch('open_connect.mailer.templatetags.mailing.generate_code')
+    @patch('open_connect.mailer.templatetags.mailing.now')
+    @patch('open_connect.mailer.templatetags.mailing.url_representation_encode')
+    def test_tracking_pixel_email_type(
+            self, mock_url_rep, mock_now, mock_generate_code):
+        """Test that the email type is added to the tracking data"""
+        mock_url_rep.return_value = ('VerifiedDataHere', 'HashIsHere')
+        mock_generate_code.return_value = 'uLSbgASwWk'
+        mock_now().replace(
+            ).isoformat.return_value = '2014-04-07 17:01:12+00:00'
+
+        tracking_pixel('me@razzmatazz.local', '10', 'digest')
+
+        expected = OPEN_DATA.copy()
+        expected['y'] = 'digest'
+        mock_url_rep.assert_called_once_with(expected)
@@ -1,16 +1,21 @@
 """Test the utils file for the mailer app"""
 # pylint: disable=invalid-name
+from datetime import timedelta
 import base64
 
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
 
 from mock import Mock, patch
+from model_mommy import mommy
 from open_connect.accounts.utils import generate_nologin_hash
+from open_connect.connect_core.utils.basetests import LOCMEM_CACHES
 from open_connect.mailer import utils
-from open_connect.mailer.models import EmailOpen
+from open_connect.mailer.models import EmailOpen, OutgoingEmail
 
 
 # The proper url_represenatation_encode version of OPEN_DATA
@@ -180,6 +185,32 @@ class TestUserAgentProcessing(TestCase):
         self.assertEqual(browser, 'Chrome 33.0.1750')
         self.assertEqual(device, 'Other')
 
+    def test_process_useragent_memoized(self):
+        """A useragent should only be parsed once per process"""
+        utils.USER_AGENT_CACHE.clear()
+        utils.process_useragent(DEMO_USER_AGENT)
+        with patch.object(utils, 'parse_useragent') as mock_parse:
+            result = utils.process_useragent(DEMO_USER_AGENT)
+        self.assertFalse(mock_parse.called)
+        self.assertEqual(
+            result, ('Mac OS X 10.9.2', 'Chrome 33.0.1750', 'Other'))
+
+        stats = utils.useragent_cache_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    @override_settings(USER_AGENT_SHARED_CACHE=True, CACHES=LOCMEM_CACHES)
+    def test_process_useragent_shared_cache(self):
+        """A useragent parsed by another process should be used"""
+        cache.clear()
+        utils.USER_AGENT_CACHE.clear()
+        utils.process_useragent(DEMO_USER_AGENT)
+        utils.USER_AGENT_CACHE.clear()
+        with patch.object(utils, 'parse_useragent') as mock_parse:
+            result = utils.process_useragent(DEMO_USER_AGENT)
+        self.assertFalse(mock_parse.called)
+        self.assertEqual(result[1], 'Chrome 33.0.1750')
+
     def test_process_user_agent_mobile(self):
         """Test the process useragent function with a mobile client"""
         user_agent = ('Mozilla/5.0 (iPhone; CPU iPhone OS 6_0 like Mac OS X)'
@@ -243,6 +274,15 @@ class TestCreateOpen(TestCase):
         new_open = EmailOpen.objects.latest('pk')
         self.assertIsNone(new_open.notification)
 
+    def test_open_email_type(self):
+        """Test creating an open with an email type"""
+        data = OPEN_DATA.copy()
+        data['y'] = 'digest'
+        utils.create_open(data, self.headers)
+
+        new_open = EmailOpen.objects.latest('pk')
+        self.assertEqual(new_open.email_type, 'digest')
+
     def test_open_no_referrer(self):
         """Test creating an open without a referrer"""
         initial_count = EmailOpen.objects.count()
@@ -286,6 +326,42 @@ class TestCreateOpen(TestCase):
         self.assertEqual(new_open.ip_address, '1.1.1.1')
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestBufferOpen(TestCase):
+    """Test the buffer_open function"""
+    def setUp(self):
+        """Setup the Buffer Open Test"""
+        cache.clear()
+        self.headers = {
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_USER_AGENT': DEMO_USER_AGENT,
+            'HTTP_COOKIE': 'sessionid=abcd'
+        }
+
+    def test_open_buffered(self):
+        """An open should be stored in the buffer instead of the database"""
+        initial_count = EmailOpen.objects.count()
+        utils.buffer_open(OPEN_DATA, self.headers)
+        utils.buffer_open(OPEN_DATA, self.headers)
+
+        self.assertEqual(EmailOpen.objects.count(), initial_count)
+        self.assertEqual(cache.get(utils.OPEN_BUFFER_TAIL_KEY), 2)
+
+        record = cache.get(utils.open_buffer_slot_key(2))
+        self.assertEqual(record['data'], OPEN_DATA)
+        self.assertEqual(record['headers']['HTTP_USER_AGENT'], DEMO_USER_AGENT)
+        # Headers that aren't needed to build an open aren't stored
+        self.assertNotIn('HTTP_COOKIE', record['headers'])
+
+    def test_open_saved_without_cache(self):
+        """If the open can't be buffered it should be saved straight away"""
+        initial_count = EmailOpen.objects.count()
+        with patch.object(utils.buffers, 'push', return_value=False):
+            utils.buffer_open(OPEN_DATA, self.headers)
+
+        self.assertEqual(EmailOpen.objects.count(), initial_count + 1)
+
+
 @patch.object(utils, 'EmailMultiAlternatives')
 class TestSendEmail(TestCase):
     """Test the send_email helper"""
@@ -312,3 +388,64 @@ class TestSendEmail(TestCase):
         email_mock.attach_alternative.assert_called_once_with(
             mimetype='text/html', content='this is my snippet someurl'
         )
+
+        outgoing = OutgoingEmail.objects.get(
+            email='gracegrant@razzmatazz.local')
+        self.assertEqual(outgoing.status, 'sent')
+        self.assertEqual(outgoing.attempts, 1)
+        self.assertIsNotNone(outgoing.sent_at)
+        self.assertIsNone(outgoing.leased_until)
+
+    def test_lease_outgoing_email(self, mock):
+        """A due email should only be leased to one process at a time"""
+        outgoing = mommy.make(
+            OutgoingEmail, next_attempt_at=now() - timedelta(minutes=1))
+
+        self.assertTrue(utils.lease_outgoing_email(outgoing))
+        self.assertEqual(outgoing.status, 'sending')
+        self.assertFalse(utils.lease_outgoing_email(
+            OutgoingEmail.objects.get(pk=outgoing.pk)))
+
+    @override_settings(EMAIL_SPOOL_BACKOFF=60, EMAIL_SPOOL_MAX_ATTEMPTS=3)
+    def test_send_email_failure_is_spooled(self, mock):
+        """A failed send should be kept in the spool and retried later"""
+        mock.return_value.send.side_effect = IOError('Relay unavailable')
+
+        utils.send_email(
+            email='gracegrant@razzmatazz.local',
+            from_email='no-reply@razzmatazz.local',
+            subject='Updates',
+            text='You have a new message. someurl',
+            html='this is my snippet someurl'
+        )
+
+        outgoing = OutgoingEmail.objects.get(
+            email='gracegrant@razzmatazz.local')
+        self.assertEqual(outgoing.status, 'pending')
+        self.assertEqual(outgoing.attempts, 1)
+        self.assertEqual(outgoing.last_error, 'IOError: Relay unavailable')
+        self.assertAlmostEqual(
+            outgoing.next_attempt_at, now() + timedelta(seconds=60),
+            delta=timedelta(seconds=10))
+
+        # The backoff doubles after every failure
+        utils.deliver_outgoing_email(outgoing)
+        self.assertAlmostEqual(
+            outgoing.next_attempt_at, now() + timedelta(seconds=120),
+            delta=timedelta(seconds=10))
+
+        # After the maximum number of attempts the email is given up on
+        utils.deliver_outgoing_email(outgoing)
+        self.assertEqual(outgoing.status, 'failed')
+        self.assertEqual(outgoing.attempts, 3)
+
+    def test_email_spool_stats(self, mock):
+        """The stats should count pending emails and the oldest's age"""
+        mommy.make(OutgoingEmail, status='sent')
+        pending = mommy.make(OutgoingEmail, status='pending')
+        OutgoingEmail.objects.filter(pk=pending.pk).update(
+            created_at=now() - timedelta(minutes=10))
+
+        stats = utils.email_spool_stats()
+        self.assertEqual(stats['depth'], 1)
+        self.assertAlmostEqual(stats['oldest_age'], 600, delta=10)
@@ -44,7 +44,7 @@ class TestOpenView(TestCase):
                       encoded_data=representation,
                       request_hash=verification_hash)
 
-    @patch('open_connect.mailer.views.create_open')
+    @patch('open_connect.mailer.views.buffer_open')
     def test_process_request(self, mock):
         """Test a valid call to process_request"""
         result = self.view(
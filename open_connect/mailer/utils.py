@@ -1,4 +1,5 @@
 """Utility functions for the mailer app"""
+from datetime import timedelta
 from email.utils import getaddresses
 import base64
 import hashlib
@@ -10,14 +11,19 @@ import string
 import uuid
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.core.mail import EmailMultiAlternatives
+from django.db.models import Q
 from django.utils.dateparse import parse_datetime
-from django.utils.encoding import force_text
+from django.utils.encoding import force_bytes, force_text
+from django.utils.timezone import now
 from flanker.addresslib import address
 from ua_parser import user_agent_parser
 
 from open_connect.accounts.utils import generate_nologin_hash
+from open_connect.connect_core.utils import buffers
+from open_connect.connect_core.utils.lru import LRUCache
 
 ALLOWED_CHARS = (string.ascii_uppercase +
                  string.ascii_lowercase + string.digits)
@@ -27,6 +33,20 @@ ALLOWED_CHARS_PATTERN = '[^{alphabet}]'.format(alphabet=ALLOWED_CHARS)
 LOGGER = logging.getLogger('mailer.utils')
 
 
+# Parsed useragents are memoized in-process and optionally in the shared cache
+USER_AGENT_CACHE = LRUCache(maxsize=settings.USER_AGENT_CACHE_SIZE)
+USER_AGENT_SHARED_CACHE_TIMEOUT = 7*24*60*60
+
+
+# Email opens are buffered in the cache (see `connect_core.utils.buffers`)
+OPEN_BUFFER_KEY = 'emailopen_buffer'
+OPEN_BUFFER_TAIL_KEY = buffers.tail_key(OPEN_BUFFER_KEY)
+OPEN_BUFFER_HEAD_KEY = buffers.head_key(OPEN_BUFFER_KEY)
+OPEN_BUFFER_TIMEOUT = 24*60*60
+OPEN_BUFFER_HEADERS = (
+    'HTTP_X_FORWARDED_FOR', 'REMOTE_ADDR', 'HTTP_USER_AGENT', 'HTTP_REFERER')
+
+
 def unsubscribe_url(email):
     """Unsubscribe URL to unsubscribe from all mailings"""
     origin = settings.ORIGIN
@@ -112,8 +132,8 @@ def prettify_agent_version(element):
         family=family, version=major, minor=minor, patch=patch)
 
 
-def process_useragent(useragent):
-    """Convert a useragent into something useful"""
+def parse_useragent(useragent):
+    """Parse a useragent into an (operating system, browser, device) tuple"""
     parsed_agent = user_agent_parser.Parse(useragent)
 
     browser = prettify_agent_version(parsed_agent['user_agent'])
@@ -122,8 +142,40 @@ def process_useragent(useragent):
     return (operating_system, browser, device)
 
 
-def create_open(data, headers):
-    """Create and save the new EmailOpen object"""
+def process_useragent(useragent):
+    """Convert a useragent into something useful
+
+    `ua_parser` runs hundreds of regular expressions against every useragent
+    but nearly all traffic comes from a few hundred distinct useragents, so
+    results are memoized in a per-process LRU cache and, if
+    `USER_AGENT_SHARED_CACHE` is enabled, in the shared cache.
+    """
+    result = USER_AGENT_CACHE.get(useragent)
+    if result is not None:
+        return result
+
+    shared_key = None
+    if settings.USER_AGENT_SHARED_CACHE:
+        shared_key = 'useragent_{hash}'.format(
+            hash=hashlib.md5(force_bytes(useragent)).hexdigest())
+        result = cache.get(shared_key)
+
+    if result is None:
+        result = parse_useragent(useragent)
+        if shared_key:
+            cache.set(shared_key, result, USER_AGENT_SHARED_CACHE_TIMEOUT)
+
+    USER_AGENT_CACHE.set(useragent, result)
+    return result
+
+
+def useragent_cache_stats():
+    """Hit rate statistics for the in-process useragent cache"""
+    return USER_AGENT_CACHE.stats()
+
+
+def build_open(data, headers, opened_at=None):
+    """Build (but do not save) an EmailOpen object from a pixel request"""
     # We must import EmailOpen here to avoid nasty import problems
     from open_connect.mailer.models import EmailOpen
     open_object = EmailOpen()
@@ -131,23 +183,29 @@ def create_open(data, headers):
     open_object.timestamp = parse_datetime(data['t'])
     open_object.key = data['k']
 
+    if opened_at:
+        open_object.opened_at = opened_at
+
     # If there is a notification ID, it needs to be an integer
     if 'n' in data:
         open_object.notification = int(data['n'])
 
+    if 'y' in data:
+        open_object.email_type = data['y'][:50]
+
     ip_addresses = headers.get(
         'HTTP_X_FORWARDED_FOR', headers.get('REMOTE_ADDR')).split(',')
     if ip_addresses:
         open_object.ip_address = ip_addresses[0]
 
     user_agent = headers.get('HTTP_USER_AGENT', '')
-    open_object.user_agent = user_agent[0:1000]
+    open_object.user_agent = user_agent[0:255]
     raw_referrer = headers.get('HTTP_REFERER', None)
     if raw_referrer:
         referrer = force_text(raw_referrer, errors='replace')
         parsed_referrer = urlparse.urlparse(referrer)
-        open_object.referrer_netloc = parsed_referrer.netloc[0:1000]
-        open_object.referrer = referrer[0:1000]
+        open_object.referrer_netloc = parsed_referrer.netloc[0:255]
+        open_object.referrer = referrer[0:255]
 
     if user_agent:
         operating_system, browser, device = process_useragent(user_agent)
@@ -155,21 +213,139 @@ def create_open(data, headers):
         open_object.browser = browser
         open_object.device_family = device
 
-    # Create the object
-    open_object.save()
+    return open_object
+
+
+def create_open(data, headers):
+    """Create and save the new EmailOpen object"""
+    build_open(data, headers).save()
+
+
+def buffer_open(data, headers):
+    """Push the details of an email open into the open buffer
+
+    Only the handful of headers needed to build an `EmailOpen` are stored.
+    Parsing the user agent and writing to the database is left to the
+    `process_buffered_opens` task, which saves opens in batches. If the open
+    can't be buffered it's saved straight away.
+    """
+    record = {
+        'data': data,
+        'headers': {
+            header: headers[header] for header in OPEN_BUFFER_HEADERS
+            if header in headers
+        },
+        'opened_at': now()
+    }
+
+    if not buffers.push(OPEN_BUFFER_KEY, record, OPEN_BUFFER_TIMEOUT):
+        create_open(data, headers)
+
+
+def open_buffer_slot_key(index):
+    """The cache key for an individual slot in the open buffer"""
+    return buffers.slot_key(OPEN_BUFFER_KEY, index)
 
 
 def send_email(email, from_email, subject, text, html):
-    """Quick 'send email' shortcut"""
-    message = EmailMultiAlternatives(
-        subject=subject,
-        body=text,
+    """Quick 'send email' shortcut
+
+    The rendered email is saved to the outbound spool before it is sent, so if
+    the email backend fails the email is retried by the `drain_email_spool`
+    task rather than lost or re-rendered.
+    """
+    # We must import OutgoingEmail here to avoid nasty import problems
+    from open_connect.mailer.models import OutgoingEmail
+    outgoing = OutgoingEmail.objects.create(
+        email=email,
         from_email=from_email,
-        to=(email,)
+        subject=subject,
+        text=text,
+        html=html,
+        # The email is leased to this process while it's sent. If this process
+        # dies mid-send the spool picks the email up once the lease expires.
+        status='sending',
+        leased_until=now() + timedelta(seconds=settings.EMAIL_SPOOL_LEASE)
+    )
+    deliver_outgoing_email(outgoing)
+
+
+def lease_outgoing_email(outgoing):
+    """
+    Lease a spooled email to this process so that it can be sent
+
+    Only an email which is due another attempt, or whose previous lease has
+    expired, can be leased. Returns whether the email was leased; if it wasn't
+    another process is already sending it.
+    """
+    from open_connect.mailer.models import OutgoingEmail
+    current_time = now()
+    leased_until = current_time + timedelta(
+        seconds=settings.EMAIL_SPOOL_LEASE)
+    leased = OutgoingEmail.objects.filter(
+        Q(status='pending', next_attempt_at__lte=current_time)
+        | Q(status='sending', leased_until__lte=current_time),
+        pk=outgoing.pk
+    ).update(status='sending', leased_until=leased_until)
+    if leased:
+        outgoing.status = 'sending'
+        outgoing.leased_until = leased_until
+    return bool(leased)
+
+
+def deliver_outgoing_email(outgoing):
+    """Attempt to send a spooled email, scheduling a retry if it fails"""
+    message = EmailMultiAlternatives(
+        subject=outgoing.subject,
+        body=outgoing.text,
+        from_email=outgoing.from_email,
+        to=(outgoing.email,)
     )
     message.attach_alternative(
-        content=html,
+        content=outgoing.html,
         mimetype='text/html'
     )
-    message.send()
-    LOGGER.info(u"Email: %s Subject: %s", email, subject)
+
+    outgoing.attempts += 1
+    try:
+        message.send()
+    # pylint: disable=broad-except
+    except Exception as error:
+        outgoing.last_error = u'{name}: {error}'.format(
+            name=type(error).__name__, error=error)
+        outgoing.leased_until = None
+        if outgoing.attempts >= settings.EMAIL_SPOOL_MAX_ATTEMPTS:
+            outgoing.status = 'failed'
+            LOGGER.error(
+                u"Email Failed: %s Subject: %s Error: %s",
+                outgoing.email, outgoing.subject, outgoing.last_error)
+        else:
+            outgoing.status = 'pending'
+            outgoing.next_attempt_at = now() + timedelta(
+                seconds=settings.EMAIL_SPOOL_BACKOFF * 2 ** (
+                    outgoing.attempts - 1))
+            LOGGER.warning(
+                u"Email Deferred: %s Subject: %s Attempt: %s Error: %s",
+                outgoing.email, outgoing.subject, outgoing.attempts,
+                outgoing.last_error)
+        outgoing.save()
+        return False
+
+    outgoing.status = 'sent'
+    outgoing.leased_until = None
+    outgoing.sent_at = now()
+    outgoing.save()
+    LOGGER.info(u"Email: %s Subject: %s", outgoing.email, outgoing.subject)
+    return True
+
+
+def email_spool_stats():
+    """The number of emails waiting in the spool and the age of the oldest"""
+    from open_connect.mailer.models import OutgoingEmail
+    pending = OutgoingEmail.objects.filter(status__in=['pending', 'sending'])
+    oldest = pending.order_by('created_at').values_list(
+        'created_at', flat=True).first()
+    return {
+        'depth': pending.count(),
+        'oldest_age': (now() - oldest).total_seconds() if oldest else 0
+    }
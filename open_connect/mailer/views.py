@@ -8,9 +8,10 @@ from django.views.generic import CreateView, TemplateView, View
 from open_connect.accounts.utils import generate_nologin_hash
 from open_connect.accounts.models import User
 from open_connect.mailer.models import Unsubscribe
-from open_connect.mailer.utils import url_representation_decode, create_open
+from open_connect.mailer.utils import url_representation_decode, buffer_open
 
 BASE64_TRANS_GIF = 'R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+TRANS_GIF = BASE64_TRANS_GIF.decode('base64')
 
 
 class OpenView(View):
@@ -29,11 +30,10 @@ class OpenView(View):
         if not all([key in result for key in necessary_keys]):
             raise Http404
 
-        create_open(result, request.META)
+        # The open is saved later in a batch by `process_buffered_opens`
+        buffer_open(result, request.META)
 
-        return HttpResponse(
-            BASE64_TRANS_GIF.decode('base64'), content_type='image/gif'
-        )
+        return HttpResponse(TRANS_GIF, content_type='image/gif')
 
 
 class UnsubscribeView(CreateView):
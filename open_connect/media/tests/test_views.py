@@ -45,10 +45,10 @@ class ImageViewsTest(ConnectTestMixin, TestCase):
         small_image = Image.objects.get(pk=image.pk)
         self.assertEqual(small_image.view_count, 0)
 
-    @patch('open_connect.media.views.cache')
+    @patch('open_connect.media.views.get_or_compute')
     def test_image_view_uses_correct_hash_key(self, mock):
-        """Viewing an alternate size (thumbnail) should not increment count."""
-        mock.get.return_value = None
+        """The signed URL should be cached under the correct key."""
+        mock.side_effect = lambda key, compute, timeout: compute()
         image = get_in_memory_image_instance(self.user)
         image.uuid = 'uuid-here'
         image.save()
@@ -56,20 +56,16 @@ class ImageViewsTest(ConnectTestMixin, TestCase):
         response = image_view(
             self.request, image.uuid, image_type='display_image')
         self.assertEqual(response.url, image.get_display_image.url)
-        mock.get.assert_called_once_with(
-            'imageurlcache_display_image_uuid-here')
-        mock.set.assert_called_once_with(
-            'imageurlcache_display_image_uuid-here',
-            image.get_display_image.url,
-            2700
-        )
+        self.assertEqual(
+            mock.call_args[0][0], 'imageurlcache_display_image_uuid-here')
+        self.assertEqual(mock.call_args[0][2], 2700)
         display_image = Image.objects.get(pk=image.pk)
         self.assertEqual(display_image.view_count, 1)
 
-    @patch('open_connect.media.views.cache')
+    @patch('open_connect.media.views.get_or_compute')
     def test_image_view_returns_cache_if_possible(self, mock):
         """If possible, return what's in the cache"""
-        mock.get.return_value = 'http://razzmatazz.local/great.gif'
+        mock.return_value = 'http://razzmatazz.local/great.gif'
         image = get_in_memory_image_instance(self.user)
         image.uuid = 'uuid-here'
         image.save()
@@ -77,8 +73,7 @@ class ImageViewsTest(ConnectTestMixin, TestCase):
         response = image_view(
             self.request, image.uuid, image_type='display_image')
         self.assertEqual(response.url, 'http://razzmatazz.local/great.gif')
-        mock.get.assert_called_once_with(
-            'imageurlcache_display_image_uuid-here')
+        self.assertEqual(mock.call_count, 1)
         display_image = Image.objects.get(pk=image.pk)
         self.assertEqual(display_image.view_count, 1)
 
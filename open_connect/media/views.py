@@ -3,7 +3,6 @@
 import json
 
 from django.contrib.auth.decorators import permission_required
-from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.conf import settings
 from django.db.models import F
@@ -13,6 +12,7 @@ from django.views.generic.list import ListView
 from pure_pagination.mixins import PaginationMixin
 
 from open_connect.media.models import Image, ShortenedURL
+from open_connect.connect_core.utils.caching import get_or_compute
 from open_connect.connect_core.utils.mixins import SortableListMixin
 from open_connect.connect_core.utils.views import CommonViewMixin
 
@@ -24,19 +24,19 @@ def image_view(request, image_uuid, image_type='display_image'):
     # an entire hour, we can cache the resulting redirect for a bit of time
     cache_key = 'imageurlcache_{type}_{uuid}'.format(
         type=image_type, uuid=image_uuid)
-    response = cache.get(cache_key)
     image = Image.objects.defer("exif").filter(uuid=image_uuid)
-    if response == None:
+
+    def sign_url():
+        """Get the signed URL of the requested version of the image"""
         if image_type == 'thumbnail':
-            response = image.first().get_thumbnail.url
+            return image.first().get_thumbnail.url
+        elif image_type == 'display_image':
+            return image.first().get_display_image.url
         else:
-            if image_type == 'display_image':
-                response = image.first().get_display_image.url
-            else:
-                response = image.first().image.url
+            return image.first().image.url
 
-        # Remove the URL from the cache after 45 minutes
-        cache.set(cache_key, response, 45*60)
+    # Remove the URL from the cache after 45 minutes
+    response = get_or_compute(cache_key, sign_url, 45*60)
 
     if image_type != 'thumbnail':
         # Using F queries means we never need to actually select the image
@@ -0,0 +1,93 @@
+"""Middleware which keeps users out of the site until they're allowed in."""
+# pylint: disable=no-self-use
+import json
+import re
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.http import HttpResponseRedirect, HttpResponseBadRequest
+from django.views.decorators.cache import patch_cache_control
+
+
+def compile_exempt_urls(patterns):
+    """Combine a list of URL regular expressions into a single expression"""
+    return re.compile(
+        '|'.join('(?:{pattern})'.format(pattern=pattern)
+                 for pattern in patterns))
+
+
+# Paths (without their leading slash) which every user can view
+EXEMPT_URLS = compile_exempt_urls(
+    [re.escape(settings.LOGIN_URL.lstrip('/'))] +
+    list(getattr(settings, 'LOGIN_EXEMPT_URLS', [])))
+
+
+class AccessGateMiddleware(object):
+    """
+    Middleware that keeps users out of every page other than LOGIN_URL and
+    LOGIN_EXEMPT_URLS until they have:
+
+        * logged in
+        * entered an invite code, if `REQUIRE_INVITE` is set
+        * accepted the terms of service and code of conduct
+
+    Exempt paths are matched against a single combined regular expression
+    before the user is looked at, so requests for static files and other
+    exempt pages never load the user. The root of the site is exempt from
+    logging in only.
+
+    Requires authentication middleware and template context processors to be
+    loaded. You'll get an error if they aren't.
+    """
+    def process_request(self, request):
+        """Redirect the user if they're not allowed in yet."""
+        path = request.path_info.lstrip('/')
+        if EXEMPT_URLS.match(path):
+            return
+
+        user = request.user
+        if not user.is_authenticated():
+            if path == '':
+                return
+            return self.login_required(request)
+
+        if settings.REQUIRE_INVITE and not user.invite_verified:
+            return HttpResponseRedirect('{url}?next={next}'.format(
+                url=reverse('enter_invite'), next=request.path_info))
+
+        # AJAX requests aren't sent through the terms flow
+        if request.is_ajax():
+            return
+        if not (user.tos_accepted_at and user.ucoc_accepted_at):
+            return HttpResponseRedirect('{url}?next={next}'.format(
+                url=reverse('accept_terms_and_conduct'),
+                next=request.path_info))
+
+    def login_required(self, request):
+        """The response for an unauthenticated user"""
+        if request.is_ajax():
+            # For AJAX requests, return a 400 (which will trigger jquery's
+            # ajax error functionality) and include the error in a way
+            # consistent with the rest of Connect. This is to prevent AJAX
+            # requests from ever being sent through the login flow (which can
+            # cause problems.)
+            response = HttpResponseBadRequest(
+                json.dumps({
+                    'success': False,
+                    'errors': [
+                        'You Must Be Logged In',
+                    ]
+                }),
+                content_type='application/json'
+            )
+        else:
+            redirect_to = '%s?next=%s' % (settings.LOGIN_URL, request.path_info)
+            response = HttpResponseRedirect(redirect_to)
+
+        # Break the client-side cache on all possible browsers on all
+        # protocols.
+        patch_cache_control(
+            response, no_cache=True, no_store=True,
+            must_revalidate=True, max_age=0, private=True,
+            proxy_revalidate=True, s_maxage=0)
+        return response
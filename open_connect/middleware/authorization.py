@@ -0,0 +1,26 @@
+"""Middleware to memoize authorization checks for the length of a request."""
+from django.utils.functional import SimpleLazyObject
+
+from open_connect.accounts.authorization import AuthorizationContext
+
+
+def attach_authorization(user):
+    """Give an authenticated user a new AuthorizationContext"""
+    if user.is_authenticated():
+        user.authorization = AuthorizationContext(user)
+    return user
+
+
+class AuthorizationMiddleware(object):
+    """
+    Attach an AuthorizationContext to the request's user.
+
+    The context is attached the first time the user is used, so requests
+    which never look at the user (such as those `AccessGateMiddleware` lets
+    through without checking) never load it.
+    """
+    # pylint: disable=no-self-use
+    def process_request(self, request):
+        """Start a new authorization context for the user."""
+        user = request.user
+        request.user = SimpleLazyObject(lambda: attach_authorization(user))
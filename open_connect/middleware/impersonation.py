@@ -1,24 +1,70 @@
 """Middleware to impersonate another user."""
+import copy
+import time
+
 from django.contrib.auth import get_user_model
 
+from open_connect.connect_core.utils.generations import get_user_generation
+
+
+# Session key holding the result of the last impersonation check
+IMPERSONATION_SESSION_KEY = 'impersonation'
+
+# Changes to either user's groups or permissions bump their generation and
+# invalidate the check straight away, but other changes to the impersonated
+# user (such as their name) are only picked up once the check expires
+IMPERSONATION_CHECK_TIMEOUT = 5*60
+
+
+def impersonation_state(impersonator, impersonate_id):
+    """Everything the cached result of an impersonation check depends on"""
+    return {
+        'impersonator_id': impersonator.pk,
+        'impersonate_id': impersonate_id,
+        'is_active': impersonator.is_active,
+        'is_superuser': impersonator.is_superuser,
+        'generations': (
+            get_user_generation(impersonator.pk),
+            get_user_generation(impersonate_id))
+    }
+
 
 class ImpersonationMiddleware(object):
     """Middleware to impersonate another user."""
     # pylint: disable=no-self-use
     def process_request(self, request):
         """Set the request user to user to impersonate."""
-        # pylint: disable=invalid-name
-        User = get_user_model()
         impersonate_id = request.session.get('impersonate_id', None)
-        request.user.impersonating = False
-        if not impersonate_id:
-            return
-        if not request.user.can_impersonate():
-            return
-        try:
-            user = User.objects.get(pk=impersonate_id)
-        except User.DoesNotExist:
+        if not impersonate_id or not request.user.is_authenticated():
             return
+
+        session = request.session
+        state = impersonation_state(request.user, impersonate_id)
+        cached = session.get(IMPERSONATION_SESSION_KEY)
+        if (cached and cached['state'] == state
+                and cached['expires'] > time.time()):
+            user = cached['user']
         else:
-            request.user = user
+            user = self.get_user_to_impersonate(request.user, impersonate_id)
+            # The user is copied so that nothing attached to it while
+            # handling this request is saved in the session
+            session[IMPERSONATION_SESSION_KEY] = {
+                'state': state,
+                'expires': time.time() + IMPERSONATION_CHECK_TIMEOUT,
+                'user': copy.copy(user)
+            }
+
+        if user is not None:
+            request.user = copy.copy(user)
             request.user.impersonating = True
+
+    def get_user_to_impersonate(self, impersonator, impersonate_id):
+        """The user to impersonate, or None if they can't be impersonated"""
+        # pylint: disable=invalid-name
+        User = get_user_model()
+        if not impersonator.can_impersonate():
+            return None
+        try:
+            return User.objects.get(pk=impersonate_id)
+        except User.DoesNotExist:
+            return None
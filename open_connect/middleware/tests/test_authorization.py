@@ -0,0 +1,68 @@
+"""Tests for the authorization middleware."""
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, RequestFactory
+from django.utils.functional import SimpleLazyObject
+from mock import Mock, patch
+
+from open_connect.accounts.authorization import AuthorizationContext
+from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.groups.membership import get_memberships
+from open_connect.middleware.authorization import AuthorizationMiddleware
+
+
+class AuthorizationMiddlewareTest(ConnectTestMixin, TestCase):
+    """Tests for AuthorizationMiddleware."""
+    def setUp(self):
+        """Setup the AuthorizationMiddlewareTest TestCase"""
+        self.request = RequestFactory().get('/')
+        self.middleware = AuthorizationMiddleware()
+
+    def test_anonymous_user(self):
+        """Anonymous users shouldn't get an authorization context."""
+        self.request.user = AnonymousUser()
+        self.middleware.process_request(self.request)
+        self.assertFalse(hasattr(self.request.user, 'authorization'))
+
+    def test_user_not_loaded(self):
+        """The user shouldn't be loaded until something uses it."""
+        get_user = Mock(return_value=AnonymousUser())
+        self.request.user = SimpleLazyObject(get_user)
+        self.middleware.process_request(self.request)
+        self.assertFalse(get_user.called)
+
+        self.assertFalse(self.request.user.is_authenticated())
+        self.assertEqual(get_user.call_count, 1)
+
+    def test_memberships_fetched_once(self):
+        """Memberships should only be fetched once per request."""
+        user = self.create_user()
+        group = self.create_group()
+        group.owners.add(user)
+        user.add_to_group(group.pk)
+        self.request.user = user
+        self.middleware.process_request(self.request)
+        user = self.request.user
+        self.assertIsInstance(user.authorization, AuthorizationContext)
+
+        with patch(
+                'open_connect.accounts.authorization.get_memberships',
+                return_value=get_memberships(user.pk)) as mock_get:
+            self.assertIn(group.pk, user.joined_group_ids)
+            self.assertIn(group.pk, user.owned_group_ids)
+            self.assertTrue(user.can_send_to_group(group))
+            self.assertTrue(user.can_moderate)
+
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_joining_group_resets_context(self):
+        """Joining a group during the request should be reflected."""
+        user = self.create_user()
+        group = self.create_group()
+        self.request.user = user
+        self.middleware.process_request(self.request)
+        user = self.request.user
+        self.assertNotIn(group.pk, user.joined_group_ids)
+
+        user.add_to_group(group.pk, immediate=True)
+
+        self.assertIn(group.pk, user.joined_group_ids)
@@ -3,9 +3,14 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.core.urlresolvers import reverse
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
+from mock import patch
 
-from open_connect.middleware.impersonation import ImpersonationMiddleware
+from open_connect.connect_core.utils.basetests import LOCMEM_CACHES
+from open_connect.connect_core.utils.generations import bump_user_generations
+from open_connect.middleware.impersonation import (
+    ImpersonationMiddleware, IMPERSONATION_SESSION_KEY
+)
 
 
 User = get_user_model()
@@ -93,3 +98,80 @@ class ImpersonationMiddlewareTest(TestCase):
         request.user = self.admin
         middleware.process_request(request)
         self.assertEqual(request.user, self.admin)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_process_request_check_is_cached(self):
+        """The check should be reused from the session on later requests."""
+        self.admin.is_superuser = True
+        self.admin.save()
+        middleware = ImpersonationMiddleware()
+        session = {'impersonate_id': self.user.pk}
+
+        request = self.request_factory.get('/')
+        request.session = session
+        request.user = self.admin
+        middleware.process_request(request)
+        self.assertIn(IMPERSONATION_SESSION_KEY, session)
+
+        request = self.request_factory.get('/')
+        request.session = session
+        request.user = self.admin
+        with self.assertNumQueries(0):
+            middleware.process_request(request)
+        self.assertEqual(request.user, self.user)
+        self.assertTrue(request.user.impersonating)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_process_request_check_invalidated(self):
+        """Changes to the impersonator should invalidate the cached check."""
+        self.admin.is_superuser = True
+        self.admin.save()
+        middleware = ImpersonationMiddleware()
+        session = {'impersonate_id': self.user.pk}
+
+        request = self.request_factory.get('/')
+        request.session = session
+        request.user = self.admin
+        middleware.process_request(request)
+
+        # A change to the impersonator's permissions bumps their generation
+        bump_user_generations([self.admin.pk])
+        request = self.request_factory.get('/')
+        request.session = session
+        request.user = self.admin
+        with patch.object(
+                ImpersonationMiddleware, 'get_user_to_impersonate',
+                return_value=None) as mock_get_user:
+            middleware.process_request(request)
+        self.assertTrue(mock_get_user.called)
+        self.assertEqual(request.user, self.admin)
+
+    def test_process_request_superuser_revoked(self):
+        """Losing superuser status should take effect straight away."""
+        self.admin.is_superuser = True
+        self.admin.save()
+        middleware = ImpersonationMiddleware()
+        session = {'impersonate_id': self.user.pk}
+
+        request = self.request_factory.get('/')
+        request.session = session
+        request.user = self.admin
+        middleware.process_request(request)
+
+        self.admin.is_superuser = False
+        self.admin.save()
+        request = self.request_factory.get('/')
+        request.session = session
+        request.user = self.admin
+        middleware.process_request(request)
+        self.assertEqual(request.user, self.admin)
+
+    def test_process_request_no_impersonation_untouched(self):
+        """Users who aren't impersonating shouldn't be modified."""
+        middleware = ImpersonationMiddleware()
+        request = self.request_factory.get('/')
+        request.session = {}
+        request.user = self.admin
+        middleware.process_request(request)
+        self.assertNotIn('impersonating', request.user.__dict__)
+        self.assertFalse(request.user.impersonating)
@@ -2,6 +2,7 @@
 # pylint: disable=invalid-name
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase, RequestFactory
 
@@ -11,7 +12,10 @@ from model_mommy import mommy
 
 from open_connect.middleware.visit_tracking import VisitTrackingMiddleware
 from open_connect.accounts.models import Visit
-from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.accounts.tasks import process_buffered_visits
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
 
 
 User = get_user_model()
@@ -24,9 +28,13 @@ if 'open_connect.middleware.visit_tracking.VisitTrackingMiddleware' not in middl
         0, 'open_connect.middleware.visit_tracking.VisitTrackingMiddleware')
 
 
-@override_settings(MIDDLEWARE_CLASSES=middleware)
+@override_settings(MIDDLEWARE_CLASSES=middleware, CACHES=LOCMEM_CACHES)
 class VisitTrackingMiddlewareTest(ConnectTestMixin, TestCase):
     """Tests for visit tracking middleware."""
+    def setUp(self):
+        """Start each test with an empty visit buffer."""
+        cache.clear()
+
     def test_no_user_attribute(self):
         """Test that a request without a user attr won't trigger an error"""
         user = mommy.make(User)
@@ -46,12 +54,14 @@ class VisitTrackingMiddlewareTest(ConnectTestMixin, TestCase):
         request2.user = user
         self.assertTrue(hasattr(request2, 'user'))
         visit_tracking_mw.process_response(request2, response2)
+        process_buffered_visits()
         self.assertEqual(Visit.objects.count(), visit_count + 1)
 
     def test_unauthenticated_requests_not_logged(self):
         """Anonymous users shouldn't have their visits logged."""
         visit_count = Visit.objects.count()
         self.client.get('/')
+        process_buffered_visits()
         self.assertIsNone(self.client.cookies.get('visit_logged'))
         self.assertEqual(Visit.objects.count(), visit_count)
 
@@ -63,6 +73,7 @@ class VisitTrackingMiddlewareTest(ConnectTestMixin, TestCase):
             reverse('account_login'),
             {'login': 'a@b.local', 'password': 'moo'})
         self.client.get('/')
+        process_buffered_visits()
         self.assertEqual(self.client.cookies.get('visit_logged').value, '1')
         self.assertEqual(Visit.objects.count(), visit_count + 1)
 
@@ -74,6 +85,22 @@ class VisitTrackingMiddlewareTest(ConnectTestMixin, TestCase):
             reverse('account_login'),
             {'login': 'a@b.local', 'password': 'moo'})
         self.client.get('/')
+        process_buffered_visits()
         self.assertEqual(Visit.objects.count(), visit_count + 1)
         self.client.get('/')
+        process_buffered_visits()
+        self.assertEqual(Visit.objects.count(), visit_count + 1)
+
+    def test_not_logged_twice_without_cookie(self):
+        """A user without the cookie should still only be logged 1x/day."""
+        user = mommy.make(User)
+        visit_tracking_mw = VisitTrackingMiddleware()
+        visit_count = Visit.objects.count()
+
+        for _ in range(2):
+            request = RequestFactory().get('/')
+            request.user = user
+            visit_tracking_mw.process_response(request, Mock())
+        process_buffered_visits()
+
         self.assertEqual(Visit.objects.count(), visit_count + 1)
@@ -1,12 +1,18 @@
 """Middleware for storing details about a user's visit."""
-from open_connect.accounts.models import Visit
+from open_connect.accounts.visits import buffer_visit
 
 
 class VisitTrackingMiddleware(object):
     """Stores details about a user's visits."""
     # pylint: disable=no-self-use
     def process_response(self, request, response):
-        """Store visit data if this is the first visit from user in 24 hours."""
+        """Record the user's first visit of the day.
+
+        The cookie saves a trip to the cache on most requests. Visits are
+        deduplicated per user per day in the cache and saved in bulk by the
+        `process_buffered_visits` task, so even without the cookie a request
+        does no more than touch the cache.
+        """
 
         if not hasattr(request, 'user'):
             return response
@@ -14,8 +20,8 @@ class VisitTrackingMiddleware(object):
         is_tracked = request.COOKIES.get('visit_logged')
         if is_tracked or not request.user.is_authenticated():
             return response
-        Visit.objects.create(
-            user=request.user,
+        buffer_visit(
+            user_id=request.user.pk,
             ip_address=request.META.get(
                 'HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', '')
             ),
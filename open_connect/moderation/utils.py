@@ -17,7 +17,7 @@ def moderate_messages(actions, moderator):
         # can be moderated by that staff member
         if not moderator.has_perm('accounts.can_moderate_all_messages'):
             messages = messages.filter(
-                thread__group__in=moderator.groups_moderating)
+                thread__group_id__in=moderator.owned_group_ids)
         total_changes += messages.update(status=action)
 
         # Process each item
@@ -156,6 +156,7 @@ class FlagLogView(PaginationMixin, PaginateByMixin, DateTimeRangeListMixin,
         queryset = super(FlagLogView, self).get_queryset()
         if not self.request.user.global_moderator:
             queryset = queryset.filter(
-                message__thread__group__in=self.request.user.groups_moderating
+                message__thread__group_id__in=(
+                    self.request.user.owned_group_ids)
             ).distinct()
         return queryset
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import open_connect.connect_core.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_add_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestBucket',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('bucket', models.DateTimeField(unique=True)),
+            ],
+            bases=(open_connect.connect_core.utils.models.CacheMixinModel, models.Model),
+        ),
+    ]
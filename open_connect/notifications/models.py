@@ -1,7 +1,7 @@
 """Models for the notifications application."""
 
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
 from open_connect.connect_core.utils.models import TimestampModel
 
@@ -58,6 +58,61 @@ class Subscription(TimestampModel):
             group=self.group, user=self.user)
 
 
+class NotificationManager(models.Manager):
+    """Manager for the Notification model."""
+    def create_missing(self, message_id, recipients):
+        """Create notifications for a message, skipping any that exist
+
+        `recipients` is a list of `(recipient_id, subscription_id)` tuples.
+        Recipients who already have a notification for this message are
+        skipped and the rest are created with a single `bulk_create`. If
+        another process creates one of them first, each notification is
+        created on its own instead, so re-running a send never raises an
+        `IntegrityError`.
+
+        Returns a dictionary of recipient id to notification id for only the
+        notifications that were newly created.
+        """
+        subscriptions = dict(recipients)
+        if not subscriptions:
+            return {}
+
+        existing = set(self.get_queryset().filter(
+            message_id=message_id, recipient_id__in=subscriptions.keys()
+        ).values_list('recipient_id', flat=True))
+        missing = [
+            recipient_id for recipient_id in subscriptions
+            if recipient_id not in existing
+        ]
+        if not missing:
+            return {}
+
+        notifications = [
+            self.model(
+                recipient_id=recipient_id, message_id=message_id,
+                subscription_id=subscriptions[recipient_id])
+            for recipient_id in missing
+        ]
+        try:
+            with transaction.atomic():
+                self.bulk_create(notifications)
+        except IntegrityError:
+            created = []
+            for notification in notifications:
+                try:
+                    with transaction.atomic():
+                        notification.save()
+                except IntegrityError:
+                    continue
+                created.append(notification.recipient_id)
+            missing = created
+
+        # `bulk_create` doesn't set primary keys, so they're looked up
+        return dict(self.get_queryset().filter(
+            message_id=message_id, recipient_id__in=missing
+        ).values_list('recipient_id', 'id'))
+
+
 class Notification(TimestampModel):
     """Information about an individual notification."""
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL)
@@ -65,7 +120,22 @@ class Notification(TimestampModel):
     subscription = models.ForeignKey(Subscription, blank=True, null=True)
     message = models.ForeignKey('connectmessages.Message')
 
+    objects = NotificationManager()
+
     class Meta(object):
         """Meta options for Notification model."""
         # There should only ever be 1 notification per message
         unique_together = ['recipient', 'message']
+
+
+class DigestBucket(TimestampModel):
+    """An hourly daily-digest bucket that has been claimed by a beat run.
+
+    The unique `bucket` column is what guarantees a given hour is only ever
+    processed once, even with several beat schedulers or workers running.
+    """
+    bucket = models.DateTimeField(unique=True)
+
+    def __unicode__(self):
+        """Unicode representation of the model."""
+        return u'Digest bucket {bucket}'.format(bucket=self.bucket)
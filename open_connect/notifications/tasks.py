@@ -6,19 +6,27 @@ import logging
 
 from celery import shared_task
 from django.conf import settings
-from django.db import IntegrityError
-from django.db.models import Q
+from django.core.cache import cache
+from django.db.models import (
+    Case, Count, IntegerField, Q, Sum, When
+)
 from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now
 from django.utils.translation import ngettext
 from django.template.loader import render_to_string
 
 from open_connect.mailer.utils import send_email
-from open_connect.notifications.models import Notification
+from open_connect.notifications.models import DigestBucket, Notification
+from open_connect.notifications.utils import (
+    get_digest_fragments, timezones_at_local_hour
+)
 
 
 LOGGER = logging.getLogger('notifications.tasks')
 
+# Moderator notification periods must be a factor of 24
+MODERATION_PERIOD_FACTORS = (1, 2, 3, 4, 6, 8, 12, 24)
+
 
 @shared_task()
 def create_group_notifications(message_id):
@@ -58,18 +66,12 @@ def create_group_notification(message_id, userthread_id):
         params=[message.thread.group_id]
     ).get(id=userthread_id)
 
-    try:
-        notification = Notification.objects.create(
-            recipient_id=userthread.user.pk,
-            subscription_id=userthread.subscription_id,
-            message=message
-        )
+    created = Notification.objects.create_missing(
+        message.pk, [(userthread.user.pk, userthread.subscription_id)])
 
-        if userthread.subscription_period == 'immediate':
-            send_immediate_notification.delay(notification.pk)
-    except IntegrityError as exception:
-        LOGGER.error(
-            'Create Group Notification ' + exception.__cause__)
+    if created and userthread.subscription_period == 'immediate':
+        queue_immediate_notification(
+            created[userthread.user.pk], userthread.user.pk, message.thread_id)
 
 
 @shared_task()
@@ -78,18 +80,32 @@ def create_recipient_notifications(message_id):
     # Import here to avoid circular import
     from open_connect.connectmessages.models import Message
     message = Message.objects.get(pk=message_id)
-    for recipient in message.thread.recipients.exclude(
-            pk=message.sender.pk).exclude(unsubscribed=True):
-        try:
-            notification = Notification.objects.create(
-                recipient_id=recipient.pk,
-                message=message
-            )
-            if recipient.direct_notification_period == 'immediate':
-                send_immediate_notification.delay(notification.pk)
-        except IntegrityError as exception:
-            LOGGER.error(
-                'Create Recipient Notification ' + exception.__cause__)
+    recipients = message.thread.recipients.exclude(
+        pk=message.sender_id).exclude(unsubscribed=True).only(
+            'pk', 'direct_notification_period')
+    recipients = list(recipients)
+
+    created = Notification.objects.create_missing(
+        message.pk, [(recipient.pk, None) for recipient in recipients])
+
+    for recipient in recipients:
+        if (recipient.pk in created
+                and recipient.direct_notification_period == 'immediate'):
+            queue_immediate_notification(
+                created[recipient.pk], recipient.pk, message.thread_id)
+
+
+def sender_from_address(sender):
+    """The from address of an email sent on behalf of a message's sender"""
+    if sender.is_staff:
+        from_name = u'{name}, Staff Member, {brand}'.format(
+            name=sender.get_full_name(),
+            brand=settings.BRAND_TITLE)
+    else:
+        from_name = u'{name}, {brand}'.format(
+            name=sender.get_full_name(),
+            brand=settings.BRAND_TITLE)
+    return formataddr((from_name, settings.DEFAULT_FROM_ADDRESS))
 
 
 @shared_task()
@@ -103,7 +119,8 @@ def send_immediate_notification(notification_id):
         'notification': notification,
         'message': message,
         'recipient': recipient,
-        'email': recipient.email
+        'email': recipient.email,
+        'email_type': 'immediate'
     }
     text = render_to_string(
         'notifications/email/email_immediate.txt', context)
@@ -118,15 +135,7 @@ def send_immediate_notification(notification_id):
     subject = subject_format.format(
         group=message.thread.group, subject=message.thread.subject)
 
-    if message.sender.is_staff:
-        from_name = u'{name}, Staff Member, {brand}'.format(
-            name=message.sender.get_full_name(),
-            brand=settings.BRAND_TITLE)
-    else:
-        from_name = u'{name}, {brand}'.format(
-            name=message.sender.get_full_name(),
-            brand=settings.BRAND_TITLE)
-    from_email = formataddr((from_name, settings.DEFAULT_FROM_ADDRESS))
+    from_email = sender_from_address(message.sender)
 
     to_email_tup = (recipient.get_full_name(), notification.recipient.email)
     to_address = formataddr(to_email_tup)
@@ -143,6 +152,102 @@ def send_immediate_notification(notification_id):
     notification.save()
 
 
+def coalesce_cache_key(recipient_id, thread_id):
+    """Cache key marking a recent immediate email for a recipient/thread"""
+    return 'notification_coalesce_{recipient}_{thread}'.format(
+        recipient=recipient_id, thread=thread_id)
+
+
+def queue_immediate_notification(notification_id, recipient_id, thread_id):
+    """Queue an immediate notification, coalescing it if necessary
+
+    If `NOTIFICATION_COALESCE_WINDOW` is set, only the first notification for
+    a recipient and thread within that many seconds is emailed right away.
+    Any further notifications arriving within the window are merged into a
+    single email sent when the window closes.
+    """
+    window = settings.NOTIFICATION_COALESCE_WINDOW
+    if not window:
+        send_immediate_notification.delay(notification_id)
+        return
+
+    key = coalesce_cache_key(recipient_id, thread_id)
+
+    # `cache.add` is atomic, so only one notification can open a window
+    if cache.add(key, True, window):
+        send_immediate_notification.delay(notification_id)
+    elif cache.add(key + '_pending', True, window):
+        send_coalesced_notification.apply_async(
+            args=[recipient_id, thread_id], countdown=window)
+
+
+@shared_task()
+def send_coalesced_notification(recipient_id, thread_id):
+    """Send a single email for all pending immediate notifications in a thread
+    """
+    notifications = Notification.objects.filter(
+        Q(subscription__period='immediate')
+        | Q(subscription__isnull=True),
+        recipient_id=recipient_id,
+        message__thread_id=thread_id,
+        message__status='approved',
+        consumed=False
+    ).select_related(
+        'recipient', 'message', 'message__sender', 'message__thread',
+        'message__thread__group', 'message__thread__group__group'
+    ).order_by('message__pk')
+
+    # Start a fresh window so replies arriving after this email are also
+    # coalesced instead of being sent one at a time
+    key = coalesce_cache_key(recipient_id, thread_id)
+    cache.set(key, True, settings.NOTIFICATION_COALESCE_WINDOW)
+    cache.delete(key + '_pending')
+
+    notifications = list(notifications)
+    if not notifications:
+        return
+    elif len(notifications) == 1:
+        send_immediate_notification(notifications[0].pk)
+        return
+
+    recipient = notifications[0].recipient
+    thread = notifications[0].message.thread
+    context = {
+        'messages': [notification.message for notification in notifications],
+        'thread': thread,
+        'recipient': recipient,
+        'email': recipient.email,
+        'email_type': 'coalesced'
+    }
+    text = render_to_string(
+        'notifications/email/email_coalesced.txt', context)
+    html = render_to_string(
+        'notifications/email/email_coalesced.html', context)
+
+    if thread.thread_type == 'direct':
+        subject_format = u"{subject} - {num} New Messages"
+    else:
+        subject_format = u"[{group}] {subject} - {num} New Messages"
+    subject = subject_format.format(
+        group=thread.group, subject=thread.subject, num=len(notifications))
+
+    to_address = formataddr((recipient.get_full_name(), recipient.email))
+
+    # The email is sent on behalf of the sender of the latest message, as it
+    # would have been without coalescing
+    send_email(
+        email=to_address,
+        from_email=sender_from_address(notifications[-1].message.sender),
+        subject=subject,
+        text=text,
+        html=html
+    )
+
+    Notification.objects.filter(
+        pk__in=[notification.pk for notification in notifications]
+    ).update(consumed=True)
+
+
 @shared_task()
 def send_daily_digest_notification(user_id):
     """Send a daily digest notification for an individual user"""
@@ -169,10 +274,17 @@ def send_daily_digest_notification(user_id):
         return
     recipient = notifications[0].recipient
 
+    # Every message is rendered once and shared between all the digests it
+    # appears in, so only the wrapper is rendered per-recipient
+    fragments = get_digest_fragments(
+        [notification.message for notification in notifications])
+
     context = {
         'notifications': notifications,
+        'fragments': fragments,
         'recipient': recipient,
-        'email': recipient.email
+        'email': recipient.email,
+        'email_type': 'digest'
     }
     text = render_to_string('notifications/email/email_digest.txt', context)
     html = render_to_string('notifications/email/email_digest.html', context)
@@ -196,8 +308,13 @@ def send_daily_digest_notification(user_id):
 
 
 @shared_task()
-def send_daily_email_notifications():
-    """Sends emails for subscriptions that are daily digests."""
+def send_daily_email_notifications(timezones=None):
+    """Sends emails for subscriptions that are daily digests.
+
+    If a list of `timezones` is passed only users in those timezones will
+    have their digest queued, otherwise every user with pending daily
+    notifications will.
+    """
     from open_connect.accounts.models import User
     users_with_notifications = User.objects.filter(
         notification__subscription__period='daily',
@@ -205,44 +322,82 @@ def send_daily_email_notifications():
         notification__message__status='approved'
         ).distinct().only("id")
 
+    if timezones is not None:
+        users_with_notifications = users_with_notifications.filter(
+            timezone__in=timezones)
+
     for user in users_with_notifications:
         send_daily_digest_notification.delay(user.pk)
 
 
 @shared_task()
-def send_moderation_notification(group_owner_id, top_current_hour_iso):
-    """Send an individual moderation notification"""
+def send_timezone_digest_notifications():
+    """Queue daily digests for users whose local time is the digest hour
+
+    This runs at the top of every hour. Each hour is a "bucket" which is
+    claimed in the database before any digests are queued, so a bucket is
+    only processed once no matter how many beat schedulers fire it.
+    """
+    from open_connect.accounts.models import User
+    top_current_hour = now().replace(minute=0, second=0, microsecond=0)
+
+    _, claimed = DigestBucket.objects.get_or_create(bucket=top_current_hour)
+    if not claimed:
+        LOGGER.info('Digest bucket %s already claimed', top_current_hour)
+        return
+
+    user_timezones = User.objects.order_by().values_list(
+        'timezone', flat=True).distinct()
+    timezones = timezones_at_local_hour(
+        user_timezones, top_current_hour, settings.DAILY_DIGEST_HOUR)
+
+    if timezones:
+        send_daily_email_notifications(timezones=timezones)
+
+
+@shared_task()
+def send_moderation_notification(group_owner_id, top_current_hour_iso,
+                                 total_new_messages=None, total_messages=None):
+    """Send an individual moderation notification
+
+    `send_moderation_notifications` passes in the number of new and total
+    messages pending so this task only has to render and send the email. If
+    they're not passed in they're calculated from the moderator's queue.
+    """
     from open_connect.accounts.models import User
     owner = User.objects.get(pk=group_owner_id)
-    top_current_hour = parse_datetime(top_current_hour_iso)
 
-    # Find the last time we would've used as a cut off as a message
-    # moderation notification time
-    notification_start = top_current_hour - timedelta(
-        hours=owner.moderator_notification_period)
+    if total_new_messages is None or total_messages is None:
+        top_current_hour = parse_datetime(top_current_hour_iso)
+
+        # Find the last time we would've used as a cut off as a message
+        # moderation notification time
+        notification_start = top_current_hour - timedelta(
+            hours=owner.moderator_notification_period)
 
-    # Grab all the messages that were modified before the current top hour and
-    # after the last cut-off point for messages
-    all_messages = owner.messages_to_moderate
+        # Grab all the messages that were modified before the current top hour
+        # and after the last cut-off point for messages
+        all_messages = owner.messages_to_moderate
 
-    total_new_messages = all_messages.filter(
-        modified_at__lt=top_current_hour,
-        modified_at__gte=notification_start
-    ).count()
+        total_new_messages = all_messages.filter(
+            modified_at__lt=top_current_hour,
+            modified_at__gte=notification_start
+        ).count()
+
+        # We'll include the total number of pending messages in the template
+        total_messages = all_messages.count()
 
     # We don't want to re-notify users of the same pending messages, so we need
     # to bail out here if there are no new pending messages
     if total_new_messages == 0:
         return
 
-    # We'll include the total number of pending messages in the template
-    total_messages = all_messages.count()
-
     context = {
         'total_messages': total_messages,
         'total_new_messages': total_new_messages,
         'recipient': owner,
-        'email': owner.email
+        'email': owner.email,
+        'email_type': 'moderation'
     }
 
     subject = u"You have {count} new {word} to moderate on Connect".format(
@@ -262,41 +417,96 @@ def send_moderation_notification(group_owner_id, top_current_hour_iso):
     )
 
 
+def pending_moderation_counts(top_current_hour, periods):
+    """Count pending messages per group in a single grouped query
+
+    Returns a dictionary keyed by group id (`None` for direct messages) where
+    each value is a dictionary containing the `total` number of pending
+    messages and, for each notification period in `periods`, the number of
+    messages that became pending during that period before the current hour.
+    """
+    from open_connect.connectmessages.models import Message
+
+    annotations = {'total': Count('pk')}
+    for period in periods:
+        annotations['new_%s' % period] = Sum(Case(
+            When(
+                modified_at__lt=top_current_hour,
+                modified_at__gte=top_current_hour - timedelta(hours=period),
+                then=1),
+            default=0,
+            output_field=IntegerField()
+        ))
+
+    rows = Message.objects.filter(
+        status__in=['pending', 'flagged']
+    ).exclude(
+        sender__is_banned=True
+    ).order_by().values('thread__group_id').annotate(**annotations)
+
+    return {row.pop('thread__group_id'): row for row in rows}
+
+
 @shared_task()
 def send_moderation_notifications():
     """Queue up notifications of new messages to moderate"""
     from open_connect.accounts.models import User
+    from open_connect.groups.models import Group
     # Get the top of the current hour. We use the top of the hour so we don't
     # have to worry about this task running at exactly the same time after each
     # hour.
     top_current_hour = now().replace(minute=0, second=0, microsecond=0)
 
-    # Because we allow notification periods upto 24 hours previous, but still
-    # want to limit the total number of owners checked against, we'll want to
-    # exclude owners with pending messages greater than 24 hours old.
-    top_hour_yesterday = top_current_hour - timedelta(days=1)
+    # We search for a remainder of 0 between the notification time period
+    # and the current hour (which can be between 0 and 24.) This means that
+    # notification time periods must ALWAYS be factors of 24 (or 0)
+    due_periods = [period for period in MODERATION_PERIOD_FACTORS
+                   if top_current_hour.hour % period == 0]
 
-    # Get all the messages that are marked as pending that have been modified
-    # previous to the current hour
-    owners_with_messages = User.objects.filter(
-        owned_groups_set__thread__message__status__in=['pending', 'flagged'],
-        owned_groups_set__thread__message__modified_at__lt=top_current_hour,
-        owned_groups_set__thread__message__modified_at__gte=top_hour_yesterday
-    ).distinct().only('moderator_notification_period')
+    counts = pending_moderation_counts(top_current_hour, due_periods)
+    if not counts:
+        return
 
-    can_moderate_all = User.objects.filter(
+    # Every moderator due a notification this hour, along with the groups they
+    # own that have pending messages. Global moderators are able to moderate
+    # every pending message regardless of which groups they own.
+    moderators = {}
+    global_moderators = set(User.objects.filter(
         Q(user_permissions__codename='can_moderate_all_messages')
-        | Q(groups__permissions__codename='can_moderate_all_messages')
-    )
-
-    users_to_notify = set(list(owners_with_messages) + list(can_moderate_all))
-
-    for user_to_notify in users_to_notify:
-        time_period = user_to_notify.moderator_notification_period
-
-        # We search for a remainder of 0 between the notification time period
-        # and the current hour (which can be between 0 and 24.) This means that
-        # notification time periods must ALWAYS be factors of 24 (or 0)
-        if time_period != 0 and (top_current_hour.hour % time_period) == 0:
-            send_moderation_notification.delay(
-                user_to_notify.pk, top_current_hour.isoformat())
+        | Q(groups__permissions__codename='can_moderate_all_messages'),
+        moderator_notification_period__in=due_periods
+    ).values_list('pk', 'moderator_notification_period').distinct())
+    for user_id, period in global_moderators:
+        moderators[user_id] = (period, None)
+
+    ownerships = Group.owners.through.objects.filter(
+        group_id__in=[group_id for group_id in counts if group_id],
+        user__moderator_notification_period__in=due_periods
+    ).values_list(
+        'user_id', 'group_id', 'user__moderator_notification_period',
+        'user__is_superuser')
+    for user_id, group_id, period, is_superuser in ownerships:
+        if is_superuser:
+            moderators[user_id] = (period, None)
+            continue
+        _, group_ids = moderators.setdefault(user_id, (period, set()))
+        if group_ids is not None:
+            group_ids.add(group_id)
+
+    for user_id, (period, group_ids) in moderators.items():
+        if group_ids is None:
+            group_counts = counts.values()
+        else:
+            group_counts = [counts[group_id] for group_id in group_ids]
+
+        total_new_messages = sum(
+            group_count['new_%s' % period] for group_count in group_counts)
+        if not total_new_messages:
+            continue
+
+        total_messages = sum(
+            group_count['total'] for group_count in group_counts)
+
+        send_moderation_notification.delay(
+            user_id, top_current_hour.isoformat(),
+            total_new_messages, total_messages)
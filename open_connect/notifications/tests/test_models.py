@@ -1,9 +1,11 @@
 """Tests for the models in the notification app"""
+from django.db import IntegrityError
 from django.test import TestCase
+from mock import patch
 from model_mommy import mommy
 
 from open_connect.connectmessages.models import Thread, Message, UserThread
-from open_connect.notifications.models import Subscription
+from open_connect.notifications.models import Notification, Subscription
 from open_connect.connect_core.utils.basetests import ConnectTestMixin
 
 
@@ -49,3 +51,66 @@ class TestSubscription(ConnectTestMixin, TestCase):
         # Confirm that I'm again subscribed to the threads in the group
         userthread3 = UserThread.objects.get(thread=thread, user=user2)
         self.assertTrue(userthread3.subscribed_email)
+
+
+class TestNotificationManager(ConnectTestMixin, TestCase):
+    """Tests for the NotificationManager"""
+    def setUp(self):
+        """Setup the TestNotificationManager TestCase"""
+        self.thread = self.create_thread()
+        self.message = self.thread.first_message
+        self.user1 = self.create_user()
+        self.user2 = self.create_user()
+
+    def test_create_missing(self):
+        """New notifications should be created and their ids returned"""
+        created = Notification.objects.create_missing(
+            self.message.pk, [(self.user1.pk, None), (self.user2.pk, None)])
+
+        self.assertEqual(set(created.keys()), {self.user1.pk, self.user2.pk})
+        notification = Notification.objects.get(
+            recipient=self.user1, message=self.message)
+        self.assertEqual(created[self.user1.pk], notification.pk)
+        self.assertFalse(notification.consumed)
+
+    def test_create_missing_skips_existing(self):
+        """Existing notifications should be skipped without an error"""
+        existing = Notification.objects.create(
+            recipient=self.user1, message=self.message)
+
+        created = Notification.objects.create_missing(
+            self.message.pk, [(self.user1.pk, None), (self.user2.pk, None)])
+
+        self.assertEqual(created.keys(), [self.user2.pk])
+        self.assertEqual(
+            Notification.objects.filter(
+                recipient=self.user1, message=self.message).get(),
+            existing)
+
+        # Running the same insert again should be a no-op
+        self.assertEqual(
+            Notification.objects.create_missing(
+                self.message.pk, [(self.user2.pk, None)]),
+            {})
+
+    def test_create_missing_conflict(self):
+        """If the bulk insert conflicts each notification is created alone"""
+        with patch.object(
+                Notification.objects, 'bulk_create',
+                side_effect=IntegrityError):
+            created = Notification.objects.create_missing(
+                self.message.pk,
+                [(self.user1.pk, None), (self.user2.pk, None)])
+
+        self.assertEqual(set(created.keys()), {self.user1.pk, self.user2.pk})
+        self.assertEqual(
+            Notification.objects.filter(
+                message=self.message,
+                recipient__in=[self.user1, self.user2]).count(),
+            2)
+
+    def test_create_missing_no_recipients(self):
+        """Passing no recipients should not touch the database"""
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                Notification.objects.create_missing(self.message.pk, []), {})
@@ -2,6 +2,7 @@
 # pylint: disable=invalid-name
 from django.conf import settings
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase, override_settings
 from django.utils.dateparse import parse_datetime
@@ -11,8 +12,10 @@ from model_mommy import mommy
 from open_connect.connectmessages.models import Message
 from open_connect.connectmessages.tests import ConnectMessageTestCase
 from open_connect.notifications import tasks
-from open_connect.notifications.models import Notification
-from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.notifications.models import DigestBucket, Notification
+from open_connect.connect_core.utils.basetests import (
+    ConnectTestMixin, LOCMEM_CACHES
+)
 
 
 class TestCreateGroupNotifications(TestCase):
@@ -251,6 +254,100 @@ class TestSendImmediateNotification(ConnectMessageTestCase):
         self.assertIn(user.unsubscribe_url, args['text'])
 
 
+@override_settings(NOTIFICATION_COALESCE_WINDOW=300, CACHES=LOCMEM_CACHES)
+@patch.object(tasks, 'send_coalesced_notification')
+@patch.object(tasks, 'send_immediate_notification')
+class TestQueueImmediateNotification(ConnectTestMixin, TestCase):
+    """Tests for queue_immediate_notification"""
+    def setUp(self):
+        """Setup the TestQueueImmediateNotification TestCase"""
+        cache.clear()
+        self.thread = self.create_thread()
+        self.user = self.create_user()
+
+    @override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+    def test_no_window_sends_immediately(self, mock_send, mock_coalesce):
+        """Without a window every notification is sent immediately"""
+        notification = mommy.make(
+            Notification, recipient=self.user,
+            message=self.thread.first_message)
+        tasks.queue_immediate_notification(
+            notification.pk, self.user.pk, self.thread.pk)
+        tasks.queue_immediate_notification(
+            notification.pk, self.user.pk, self.thread.pk)
+        self.assertEqual(mock_send.delay.call_count, 2)
+        self.assertFalse(mock_coalesce.apply_async.called)
+
+    def test_notifications_in_window_coalesced(self, mock_send, mock_coalesce):
+        """Only the first notification in a window is sent immediately"""
+        notification = mommy.make(
+            Notification, recipient=self.user,
+            message=self.thread.first_message)
+        tasks.queue_immediate_notification(
+            notification.pk, self.user.pk, self.thread.pk)
+        tasks.queue_immediate_notification(
+            notification.pk, self.user.pk, self.thread.pk)
+        tasks.queue_immediate_notification(
+            notification.pk, self.user.pk, self.thread.pk)
+
+        mock_send.delay.assert_called_once_with(notification.pk)
+        mock_coalesce.apply_async.assert_called_once_with(
+            args=[self.user.pk, self.thread.pk], countdown=300)
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=300, CACHES=LOCMEM_CACHES)
+@patch.object(tasks, 'send_email')
+class TestSendCoalescedNotification(ConnectTestMixin, TestCase):
+    """Tests for send_coalesced_notification"""
+    def setUp(self):
+        """Setup the TestSendCoalescedNotification TestCase"""
+        cache.clear()
+        self.user = self.create_user()
+        self.group = self.create_group()
+        self.user.add_to_group(self.group.pk, period='immediate')
+        self.thread = self.create_thread(group=self.group)
+        self.sender = self.create_user()
+        self.sender.add_to_group(self.group.pk)
+        self.reply1 = mommy.make(
+            'connectmessages.Message', thread=self.thread, sender=self.sender,
+            status='approved')
+        self.reply2 = mommy.make(
+            'connectmessages.Message', thread=self.thread, sender=self.sender,
+            status='approved')
+        Notification.objects.update(consumed=True)
+
+    def test_replies_merged(self, mock):
+        """All pending replies should be sent in a single email"""
+        subscription = self.user.subscriptions.get(group=self.group)
+        notification1, _ = Notification.objects.update_or_create(
+            recipient=self.user, message=self.reply1,
+            defaults={'subscription': subscription, 'consumed': False})
+        notification2, _ = Notification.objects.update_or_create(
+            recipient=self.user, message=self.reply2,
+            defaults={'subscription': subscription, 'consumed': False})
+
+        tasks.send_coalesced_notification(self.user.pk, self.thread.pk)
+
+        mock.assert_called_once()
+        args = mock.call_args[1]
+        self.assertIn(self.user.email, args['email'])
+        self.assertIn('2 New Messages', args['subject'])
+        self.assertIn(self.reply1.text, args['html'])
+        self.assertIn(self.reply2.text, args['html'])
+        self.assertIn(self.reply2.clean_text, args['text'])
+        self.assertIn(settings.DEFAULT_FROM_ADDRESS, args['from_email'])
+        self.assertIn(self.sender.get_full_name(), args['from_email'])
+        self.assertTrue(
+            Notification.objects.get(pk=notification1.pk).consumed)
+        self.assertTrue(
+            Notification.objects.get(pk=notification2.pk).consumed)
+
+    def test_nothing_pending(self, mock):
+        """If everything has been consumed no email should be sent"""
+        tasks.send_coalesced_notification(self.user.pk, self.thread.pk)
+        self.assertFalse(mock.called)
+
+
 @patch.object(tasks, 'send_email')
 class TestSendDailyDigestNotification(ConnectTestMixin, TestCase):
     """Tests for send_daily_digest_notification"""
@@ -460,6 +557,46 @@ class SendDailyEmailNotifications(ConnectTestMixin, TestCase):
         mock.delay.assert_called_once_with(user1.pk)
 
 
+@patch.object(tasks, 'send_daily_digest_notification')
+class SendTimezoneDigestNotifications(ConnectTestMixin, TestCase):
+    """Tests for send_timezone_digest_notifications"""
+    def setUp(self):
+        """Setup the test"""
+        # Mark all existing notifications as sent
+        Notification.objects.update(consumed=True)
+
+        # Patch now() to 12:20 UTC, which is 7:20 in US/Eastern during EST
+        now_patcher = patch('open_connect.notifications.tasks.now')
+        self.mock_now = now_patcher.start()
+        self.mock_now.return_value = parse_datetime(
+            '2014-12-01T12:20:00+00:00')
+        self.addCleanup(now_patcher.stop)
+
+        self.group = self.create_group()
+        self.eastern_user = self.create_user(timezone='US/Eastern')
+        self.central_user = self.create_user(timezone='US/Central')
+        self.eastern_user.add_to_group(self.group.pk, period='daily')
+        self.central_user.add_to_group(self.group.pk, period='daily')
+        self.create_thread(group=self.group)
+
+    @override_settings(DAILY_DIGEST_HOUR=7)
+    def test_only_local_hour_users_sent(self, mock):
+        """Only users whose local time is the digest hour get a digest"""
+        tasks.send_timezone_digest_notifications()
+
+        mock.delay.assert_called_once_with(self.eastern_user.pk)
+        self.assertTrue(DigestBucket.objects.filter(
+            bucket=parse_datetime('2014-12-01T12:00:00+00:00')).exists())
+
+    @override_settings(DAILY_DIGEST_HOUR=7)
+    def test_bucket_only_processed_once(self, mock):
+        """A claimed bucket should not be processed a second time"""
+        tasks.send_timezone_digest_notifications()
+        tasks.send_timezone_digest_notifications()
+
+        self.assertEqual(mock.delay.call_count, 1)
+
+
 class ModerationNotificationsTest(ConnectTestMixin, TestCase):
     """A useful mixin for tests that interact with moderator notifications"""
     def setUp(self):
@@ -606,6 +743,19 @@ class TestSendModerationNotification(ModerationNotificationsTest):
         self.assertIn(reverse('mod_admin'), call_kwargs['text'])
         self.assertIn(reverse('mod_admin'), call_kwargs['html'])
 
+    @patch.object(tasks, 'send_email')
+    def test_precomputed_counts(self, mock):
+        """Test that counts passed into the task are used as-is"""
+        moderator = self.create_user(moderator_notification_period=1)
+
+        tasks.send_moderation_notification(
+            moderator.pk, '2014-09-22T22:00:00+00:00', 3, 5)
+
+        call_kwargs = mock.call_args_list[0][1]
+        self.assertEqual(call_kwargs['subject'],
+                         'You have 3 new messages to moderate on Connect')
+        self.assertIn('You have 5 to moderate total', call_kwargs['html'])
+
 
 class TestSendModerationNotifications(ModerationNotificationsTest):
     """Test the send_moderation_notifications task"""
@@ -639,35 +789,62 @@ class TestSendModerationNotifications(ModerationNotificationsTest):
         self.assertFalse(self.mock_modmessage.delay.called)
 
     def test_one_recent_message(self):
-        """At least one message marked pending in the past 24 hours"""
+        """A message marked pending in the moderator's notification period"""
         group = mommy.make('groups.Group')
         moderator = self.create_user(moderator_notification_period=1)
         group.owners.add(moderator)
 
-        message = self.generate_pending_message(group, self.one_day_ago)
+        message = self.generate_pending_message(group, self.one_hour_ago)
 
         tasks.send_moderation_notifications()
 
         self.assertIn(message, moderator.messages_to_moderate)
         self.assertTrue(self.mock_modmessage.delay.called)
         self.mock_modmessage.delay.assert_called_once_with(
-            moderator.pk, '2014-09-22T22:00:00+00:00')
+            moderator.pk, '2014-09-22T22:00:00+00:00', 1, 1)
 
     def test_one_recent_message_flagged(self):
-        """At least one message flagged in the past 24 hours"""
+        """A message flagged in the moderator's notification period"""
         group = mommy.make('groups.Group')
         moderator = self.create_user(moderator_notification_period=1)
         group.owners.add(moderator)
 
         message = self.generate_pending_message(
-            group, self.one_day_ago, status='flagged')
+            group, self.one_hour_ago, status='flagged')
 
         tasks.send_moderation_notifications()
 
         self.assertIn(message, moderator.messages_to_moderate)
         self.assertTrue(self.mock_modmessage.delay.called)
         self.mock_modmessage.delay.assert_called_once_with(
-            moderator.pk, '2014-09-22T22:00:00+00:00')
+            moderator.pk, '2014-09-22T22:00:00+00:00', 1, 1)
+
+    def test_message_outside_notification_period(self):
+        """A message older than the moderator's period shouldn't notify"""
+        group = mommy.make('groups.Group')
+        moderator = self.create_user(moderator_notification_period=1)
+        group.owners.add(moderator)
+
+        message = self.generate_pending_message(group, self.two_hours_ago)
+
+        tasks.send_moderation_notifications()
+
+        self.assertIn(message, moderator.messages_to_moderate)
+        self.assertFalse(self.mock_modmessage.delay.called)
+
+    def test_counts_include_older_pending_messages(self):
+        """The total count should include messages outside the period"""
+        group = mommy.make('groups.Group')
+        moderator = self.create_user(moderator_notification_period=1)
+        group.owners.add(moderator)
+
+        self.generate_pending_message(group, self.one_hour_ago)
+        self.generate_pending_message(group, self.two_days_ago)
+
+        tasks.send_moderation_notifications()
+
+        self.mock_modmessage.delay.assert_called_once_with(
+            moderator.pk, '2014-09-22T22:00:00+00:00', 1, 2)
 
     def test_recent_message_non_notification_period(self):
         """Ensure a moderator who is not scheduled to get notified doesn't"""
@@ -692,7 +869,7 @@ class TestSendModerationNotifications(ModerationNotificationsTest):
         group.owners.add(moderator1)
         group.owners.add(moderator2)
 
-        message = self.generate_pending_message(group, self.one_day_ago)
+        message = self.generate_pending_message(group, self.one_hour_ago)
 
         tasks.send_moderation_notifications()
 
@@ -721,14 +898,14 @@ class TestSendModerationNotifications(ModerationNotificationsTest):
         self.add_perm(
             moderator, 'can_moderate_all_messages', 'accounts', 'user')
 
-        message = self.generate_pending_message(group, self.one_day_ago)
+        message = self.generate_pending_message(group, self.one_hour_ago)
 
         tasks.send_moderation_notifications()
 
         self.assertIn(message, moderator.messages_to_moderate)
         self.assertTrue(self.mock_modmessage.delay.called)
         self.mock_modmessage.delay.assert_called_once_with(
-            moderator.pk, '2014-09-22T22:00:00+00:00')
+            moderator.pk, '2014-09-22T22:00:00+00:00', 1, 1)
 
     def test_user_in_group_with_moderate_all_messages_perm(self):
         """A user in a group with can_moderate_all_messages should get all."""
@@ -740,11 +917,11 @@ class TestSendModerationNotifications(ModerationNotificationsTest):
         perm_group.group.permissions.add(permission)
         perm_group.group.user_set.add(moderator)
 
-        message = self.generate_pending_message(group, self.one_day_ago)
+        message = self.generate_pending_message(group, self.one_hour_ago)
 
         tasks.send_moderation_notifications()
 
         self.assertIn(message, moderator.messages_to_moderate)
         self.assertTrue(self.mock_modmessage.delay.called)
         self.mock_modmessage.delay.assert_called_once_with(
-            moderator.pk, '2014-09-22T22:00:00+00:00')
+            moderator.pk, '2014-09-22T22:00:00+00:00', 1, 1)
@@ -1,11 +1,14 @@
 """Tests for notifications.utils."""
 # pylint: disable=attribute-defined-outside-init
 
+from django.core.cache import cache
 from django.db import models
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils.dateparse import parse_datetime
 from mock import patch
 
 from open_connect.notifications import utils
+from open_connect.connect_core.utils.basetests import ConnectTestMixin
 
 
 class FakeModel(models.Model):
@@ -36,3 +39,55 @@ class GetNotificationModelsTest(TestCase):
         ]
         result = utils.get_notification_models()
         self.assertEqual(result, [notification_model])
+
+
+class TimezonesAtLocalHourTest(TestCase):
+    """Tests for timezones_at_local_hour."""
+    def test_matching_timezones_returned(self):
+        """Only timezones where it is currently the given hour match."""
+        # 12:00 UTC is 7:00 in US/Eastern (EST) and 6:00 in US/Central (CST)
+        utc_datetime = parse_datetime('2014-12-01T12:00:00+00:00')
+        result = utils.timezones_at_local_hour(
+            ['US/Eastern', 'US/Central', 'US/Pacific'], utc_datetime, 7)
+        self.assertEqual(result, ['US/Eastern'])
+
+    @override_settings(TIME_ZONE='US/Central')
+    def test_unknown_timezone_uses_default(self):
+        """An unknown timezone should be bucketed with the site timezone."""
+        utc_datetime = parse_datetime('2014-12-01T13:00:00+00:00')
+        result = utils.timezones_at_local_hour(
+            ['Not/AZone', 'US/Eastern'], utc_datetime, 7)
+        self.assertEqual(result, ['Not/AZone'])
+
+
+class GetDigestFragmentsTest(ConnectTestMixin, TestCase):
+    """Tests for get_digest_fragments."""
+    def setUp(self):
+        """Setup the GetDigestFragmentsTest TestCase"""
+        cache.clear()
+        self.thread = self.create_thread()
+        self.message = self.thread.first_message
+
+    def test_fragment_rendered(self):
+        """A fragment should include the html and text of the message."""
+        fragments = utils.get_digest_fragments([self.message])
+        self.assertEqual(len(fragments), 1)
+        self.assertIn(self.message.text, fragments[0]['html'])
+        self.assertIn(self.thread.subject, fragments[0]['html'])
+        self.assertIn(self.message.clean_text, fragments[0]['text'])
+
+    def test_fragment_only_rendered_once(self):
+        """Subsequent digests should use the cached fragment."""
+        utils.get_digest_fragments([self.message])
+        with patch.object(utils, 'render_to_string') as mock_render:
+            fragments = utils.get_digest_fragments([self.message])
+        self.assertFalse(mock_render.called)
+        self.assertIn(self.message.text, fragments[0]['html'])
+
+    def test_modified_message_rerendered(self):
+        """Changing a message should result in a newly rendered fragment."""
+        utils.get_digest_fragments([self.message])
+        self.message.text = 'An entirely new message body'
+        self.message.save()
+        fragments = utils.get_digest_fragments([self.message])
+        self.assertIn('An entirely new message body', fragments[0]['html'])
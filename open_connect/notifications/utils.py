@@ -1,8 +1,73 @@
 """Utilities for the notification app"""
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.template.loader import render_to_string
+import pytz
+
+
+# Rendered digest fragments only need to live for as long as a day's worth of
+# digest buckets takes to be sent out
+DIGEST_FRAGMENT_CACHE_TIMEOUT = 24*60*60
 
 
 def get_notification_models():
     """Utility that gets all notification models"""
     return [model for model in models.get_models()
             if getattr(model, 'create_notification', False) is True]
+
+
+def timezones_at_local_hour(timezones, utc_datetime, hour):
+    """Return the subset of `timezones` where it is currently `hour` o'clock
+
+    Unknown timezone names are treated as the site-wide `TIME_ZONE` so that
+    users with a legacy or malformed timezone still land in exactly one
+    hourly bucket.
+    """
+    matching = []
+    for timezone_name in timezones:
+        try:
+            zone = pytz.timezone(timezone_name)
+        except pytz.UnknownTimeZoneError:
+            zone = pytz.timezone(settings.TIME_ZONE)
+        if utc_datetime.astimezone(zone).hour == hour:
+            matching.append(timezone_name)
+    return matching
+
+
+def digest_fragment_cache_key(message):
+    """The cache key for a message's pre-rendered digest fragment"""
+    # `cache_key` includes both the message's primary key and `modified_at`,
+    # so any edit or moderation action on a message invalidates the fragment
+    return message.cache_key + 'digest_fragment'
+
+
+def get_digest_fragments(messages):
+    """Return a list of rendered digest fragments for a list of messages
+
+    Each fragment is a dictionary with an `html` and a `text` key. Fragments
+    do not contain anything specific to a recipient, so they're shared between
+    every digest a message appears in and only rendered once per message.
+    """
+    keys = [digest_fragment_cache_key(message) for message in messages]
+    cached = cache.get_many(keys)
+
+    fragments = []
+    new_fragments = {}
+    for key, message in zip(keys, messages):
+        fragment = cached.get(key) or new_fragments.get(key)
+        if fragment is None:
+            context = {'message': message}
+            fragment = {
+                'html': render_to_string(
+                    'notifications/email/digest_message.html', context),
+                'text': render_to_string(
+                    'notifications/email/digest_message.txt', context)
+            }
+            new_fragments[key] = fragment
+        fragments.append(fragment)
+
+    if new_fragments:
+        cache.set_many(new_fragments, DIGEST_FRAGMENT_CACHE_TIMEOUT)
+
+    return fragments
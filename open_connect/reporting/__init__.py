@@ -0,0 +1,4 @@
+"""Reporting app"""
+
+# pylint: disable=invalid-name
+default_app_config = 'open_connect.reporting.apps.ReportingConfig'
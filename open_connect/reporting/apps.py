@@ -0,0 +1,17 @@
+"""Application Configuration for the Reporting application"""
+from django.apps import AppConfig
+
+
+class ReportingConfig(AppConfig):
+    """App configuration for the Reporting application"""
+    name = 'open_connect.reporting'
+    verbose_name = 'Reporting'
+
+    # pylint: disable=no-self-use
+    def ready(self):
+        """Functionality to execute with the app is ready"""
+        # pylint: disable=wildcard-import
+
+        # We import our signals here to ensure they're attached to the correct
+        # events.
+        from open_connect.reporting.signals import *
@@ -0,0 +1 @@
+"""Reporting management command functionality"""
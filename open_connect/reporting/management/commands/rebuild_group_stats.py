@@ -0,0 +1,19 @@
+"""Command to recount the statistics shown on the group report"""
+from django.core.management.base import BaseCommand
+
+from open_connect.reporting.models import GroupStats
+
+
+class Command(BaseCommand):
+    """Command to rebuild the precomputed statistics of groups"""
+    help = ("Recount the statistics of every group, or only the groups with"
+            " the given ids")
+
+    def add_arguments(self, parser):
+        parser.add_argument('group_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        """Handle command."""
+        refreshed = GroupStats.objects.refresh(
+            group_ids=options['group_ids'] or None)
+        self.stdout.write('Rebuilt statistics for %s groups' % refreshed)
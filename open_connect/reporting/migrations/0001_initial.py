@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+import open_connect.connect_core.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportExport',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('report', models.CharField(max_length=50, choices=[(b'users', b'User Report'), (b'groups', b'Group Report')])),
+                ('query_string', models.TextField(blank=True)),
+                ('fingerprint', models.CharField(max_length=40, db_index=True)),
+                ('status', models.CharField(default=b'pending', max_length=20, choices=[(b'pending', b'Pending'), (b'running', b'Running'), (b'complete', b'Complete'), (b'failed', b'Failed')])),
+                ('rows_exported', models.IntegerField(default=0)),
+                ('total_rows', models.IntegerField(null=True, blank=True)),
+                ('export_file', models.FileField(max_length=255, upload_to=b'reports', blank=True)),
+                ('completed_at', models.DateTimeField(null=True, blank=True)),
+                ('notify_users', models.ManyToManyField(related_name='awaited_report_exports', to=settings.AUTH_USER_MODEL)),
+                ('requested_by', models.ForeignKey(to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(open_connect.connect_core.utils.models.CacheMixinModel, models.Model),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reporting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(related_name='stats', primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('visit_count', models.IntegerField(default=0, db_index=True)),
+                ('messages_sent', models.IntegerField(default=0, db_index=True)),
+                ('total_groups_joined', models.IntegerField(default=0, db_index=True)),
+                ('flags_received', models.IntegerField(default=0, db_index=True)),
+                ('reconciled_at', models.DateTimeField(null=True, blank=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0001_initial'),
+        ('reporting', '0002_userstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(related_name='stats', primary_key=True, serialize=False, to='groups.Group')),
+                ('message_count', models.IntegerField(default=0, db_index=True)),
+                ('thread_count', models.IntegerField(default=0, db_index=True)),
+                ('reply_count', models.IntegerField(default=0, db_index=True)),
+                ('posters', models.IntegerField(default=0, db_index=True)),
+                ('member_count', models.IntegerField(default=0, db_index=True)),
+                ('owner_count', models.IntegerField(default=0, db_index=True)),
+                ('stale_since', models.DateTimeField(db_index=True, null=True, blank=True)),
+                ('refreshed_at', models.DateTimeField(null=True, blank=True)),
+            ],
+        ),
+    ]
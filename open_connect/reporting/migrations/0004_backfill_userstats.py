@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# Count the statistics of every user who joined before `UserStats` existed so
+# that every user has a row and the user report can sort on the stats columns
+BACKFILL_USER_STATS_SQL = """
+    INSERT INTO reporting_userstats (
+        user_id,
+        visit_count,
+        messages_sent,
+        total_groups_joined,
+        flags_received,
+        reconciled_at)
+    SELECT
+        users.id,
+        COALESCE(visits.total, 0),
+        COALESCE(messages.total, 0),
+        COALESCE(subscriptions.total, 0),
+        COALESCE(flags.total, 0),
+        now()
+    FROM accounts_user users
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total FROM accounts_visit
+        GROUP BY user_id
+    ) visits ON visits.user_id = users.id
+    LEFT JOIN (
+        SELECT sender_id, COUNT(*) AS total FROM connectmessages_message
+        GROUP BY sender_id
+    ) messages ON messages.sender_id = users.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total FROM notifications_subscription
+        GROUP BY user_id
+    ) subscriptions ON subscriptions.user_id = users.id
+    LEFT JOIN (
+        SELECT message.sender_id, COUNT(*) AS total
+        FROM connectmessages_message message
+        JOIN connectmessages_message_flags message_flags
+            ON message_flags.message_id = message.id
+        GROUP BY message.sender_id
+    ) flags ON flags.sender_id = users.id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM reporting_userstats
+        WHERE reporting_userstats.user_id = users.id)
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('connectmessages', '0002_message_flags'),
+        ('notifications', '0002_add_foreign_keys'),
+        ('reporting', '0003_groupstats'),
+    ]
+
+    operations = [
+        # Going backwards the rows are left for the previous migration to drop
+        migrations.RunSQL(BACKFILL_USER_STATS_SQL, migrations.RunSQL.noop),
+    ]
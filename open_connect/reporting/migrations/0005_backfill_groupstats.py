@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# Count the statistics of every group created before `GroupStats` existed so
+# that every group has a row and the group report can sort on the stats columns
+BACKFILL_GROUP_STATS_SQL = """
+    INSERT INTO reporting_groupstats (
+        group_id,
+        message_count,
+        thread_count,
+        reply_count,
+        posters,
+        member_count,
+        owner_count,
+        stale_since,
+        refreshed_at)
+    SELECT
+        groups.id,
+        COALESCE(messages.total, 0),
+        COALESCE(threads.total, 0),
+        COALESCE(messages.replies, 0),
+        COALESCE(messages.posters, 0),
+        COALESCE(members.total, 0),
+        COALESCE(owners.total, 0),
+        NULL,
+        now()
+    FROM groups_group groups
+    LEFT JOIN (
+        SELECT
+            thread.group_id,
+            COUNT(*) AS total,
+            SUM(CASE WHEN message.id != thread.first_message_id
+                THEN 1 ELSE 0 END) AS replies,
+            COUNT(DISTINCT message.sender_id) AS posters
+        FROM connectmessages_message message
+        JOIN connectmessages_thread thread ON message.thread_id = thread.id
+        JOIN accounts_user sender ON message.sender_id = sender.id
+        WHERE message.status = 'approved' AND sender.is_banned <> TRUE
+        GROUP BY thread.group_id
+    ) messages ON messages.group_id = groups.id
+    LEFT JOIN (
+        SELECT thread.group_id, COUNT(*) AS total
+        FROM connectmessages_thread thread
+        JOIN connectmessages_message first_message
+            ON thread.first_message_id = first_message.id
+        JOIN accounts_user sender ON first_message.sender_id = sender.id
+        WHERE first_message.status = 'approved' AND sender.is_banned <> TRUE
+        GROUP BY thread.group_id
+    ) threads ON threads.group_id = groups.id
+    LEFT JOIN (
+        SELECT user_groups.group_id, COUNT(*) AS total
+        FROM accounts_user_groups user_groups
+        JOIN accounts_user member ON user_groups.user_id = member.id
+        WHERE member.is_banned <> TRUE
+        GROUP BY user_groups.group_id
+    ) members ON members.group_id = groups.group_id
+    LEFT JOIN (
+        SELECT group_id, COUNT(*) AS total FROM groups_group_owners
+        GROUP BY group_id
+    ) owners ON owners.group_id = groups.id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM reporting_groupstats
+        WHERE reporting_groupstats.group_id = groups.id)
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_add_foreign_keys'),
+        ('connectmessages', '0001_initial'),
+        ('groups', '0001_initial'),
+        ('reporting', '0004_backfill_userstats'),
+    ]
+
+    operations = [
+        # Going backwards the rows are left for the previous migration to drop
+        migrations.RunSQL(BACKFILL_GROUP_STATS_SQL, migrations.RunSQL.noop),
+    ]
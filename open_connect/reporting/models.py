@@ -0,0 +1,452 @@
+"""Models for the reporting app."""
+from collections import Counter, defaultdict
+from datetime import timedelta
+import hashlib
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Q
+from django.http import QueryDict
+from django.utils.timezone import now
+
+from open_connect.connect_core.utils.models import TimestampModel
+
+
+REPORT_CHOICES = (
+    ('users', 'User Report'),
+    ('groups', 'Group Report'),
+)
+
+# The permission a user needs to request or download each report
+REPORT_PERMISSIONS = {
+    'users': 'accounts.can_view_user_report',
+    'groups': 'accounts.can_view_group_report',
+}
+
+EXPORT_STATUSES = (
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('complete', 'Complete'),
+    ('failed', 'Failed'),
+)
+
+# Query string arguments that don't change the contents of an export
+IGNORED_EXPORT_ARGUMENTS = ('export', 'page', 'per_page')
+
+
+def normalize_export_query(query_string):
+    """Remove unused arguments from a query string and sort the rest"""
+    query = QueryDict(query_string, mutable=True)
+    for argument in IGNORED_EXPORT_ARGUMENTS:
+        query.pop(argument, None)
+    return '&'.join(sorted(query.urlencode().split('&'))) if query else ''
+
+
+class ReportExportManager(models.Manager):
+    """Manager for the ReportExport model"""
+    def request_export(self, report, query_string, user):
+        """
+        Get or create the export of a report for a user
+
+        If an identical export is pending, running or finished within the last
+        `REPORT_EXPORT_REUSE_MINUTES` it is returned instead of creating a new
+        one. Returns a tuple of the export and whether it was created.
+        """
+        query_string = normalize_export_query(query_string)
+        fingerprint = hashlib.sha1(
+            u'{report}?{query}'.format(
+                report=report, query=query_string).encode('utf-8')
+        ).hexdigest()
+
+        existing = self.get_queryset().filter(
+            Q(status__in=('pending', 'running')) | Q(
+                status='complete',
+                completed_at__gte=now() - timedelta(
+                    minutes=settings.REPORT_EXPORT_REUSE_MINUTES)),
+            report=report,
+            fingerprint=fingerprint
+        ).order_by('-created_at').first()
+        if existing:
+            return existing, False
+
+        export = self.create(
+            report=report,
+            query_string=query_string,
+            fingerprint=fingerprint,
+            requested_by=user
+        )
+        return export, True
+
+
+class ReportExport(TimestampModel):
+    """A CSV export of a report, generated in the background"""
+    report = models.CharField(max_length=50, choices=REPORT_CHOICES)
+    query_string = models.TextField(blank=True)
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL)
+    # Users other than `requested_by` who asked for the export before it
+    # finished, and are sent a message when it does
+    notify_users = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, related_name='awaited_report_exports')
+    status = models.CharField(
+        max_length=20, choices=EXPORT_STATUSES, default='pending')
+    rows_exported = models.IntegerField(default=0)
+    total_rows = models.IntegerField(null=True, blank=True)
+    export_file = models.FileField(
+        max_length=255, upload_to='reports', blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReportExportManager()
+
+    def __unicode__(self):
+        """Unicode representation of the export."""
+        return u'{report} export {pk}'.format(
+            report=self.get_report_display(), pk=self.pk)
+
+    def get_absolute_url(self):
+        """The URL to download the export."""
+        return reverse('report_export_download', kwargs={'pk': self.pk})
+
+    @property
+    def full_url(self):
+        """The URL (including the origin) to download the export."""
+        return settings.ORIGIN + self.get_absolute_url()
+
+    @property
+    def progress(self):
+        """The percentage of rows exported."""
+        if self.status == 'complete':
+            return 100
+        if not self.total_rows:
+            return 0
+        return int(100 * self.rows_exported / self.total_rows)
+
+    def user_can_download(self, user):
+        """Whether a user can download this export."""
+        return user.has_perm(REPORT_PERMISSIONS[self.report])
+
+
+def _execute_upsert(query, params):
+    """
+    Run a statement which updates or inserts rows and selects a count
+
+    If another process inserts one of the same rows first the statement is run
+    again, when that row will be updated instead.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchone()[0]
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+# Recount the statistics of every user (or only those in `user_ids`), update
+# their existing `UserStats` rows and insert the missing ones in a single
+# statement, returning the number of users counted. Visits older than the
+# visit retention policy have been purged, so when one is set an existing
+# visit count is only ever raised by a recount.
+RECONCILE_USER_STATS_SQL = """
+    WITH counts AS (
+        SELECT
+            users.id AS user_id,
+            COALESCE(visits.total, 0) AS visit_count,
+            COALESCE(messages.total, 0) AS messages_sent,
+            COALESCE(subscriptions.total, 0) AS total_groups_joined,
+            COALESCE(flags.total, 0) AS flags_received
+        FROM accounts_user users
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS total FROM accounts_visit
+            {visit_filter} GROUP BY user_id
+        ) visits ON visits.user_id = users.id
+        LEFT JOIN (
+            SELECT sender_id, COUNT(*) AS total FROM connectmessages_message
+            {message_filter} GROUP BY sender_id
+        ) messages ON messages.sender_id = users.id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS total FROM notifications_subscription
+            {subscription_filter} GROUP BY user_id
+        ) subscriptions ON subscriptions.user_id = users.id
+        LEFT JOIN (
+            SELECT message.sender_id, COUNT(*) AS total
+            FROM connectmessages_message message
+            JOIN connectmessages_message_flags message_flags
+                ON message_flags.message_id = message.id
+            {flag_filter} GROUP BY message.sender_id
+        ) flags ON flags.sender_id = users.id
+        {user_filter}
+    ), updated AS (
+        UPDATE reporting_userstats SET
+            visit_count = {visit_count},
+            messages_sent = counts.messages_sent,
+            total_groups_joined = counts.total_groups_joined,
+            flags_received = counts.flags_received,
+            reconciled_at = now()
+        FROM counts
+        WHERE reporting_userstats.user_id = counts.user_id
+        RETURNING reporting_userstats.user_id
+    ), inserted AS (
+        INSERT INTO reporting_userstats (
+            user_id,
+            visit_count,
+            messages_sent,
+            total_groups_joined,
+            flags_received,
+            reconciled_at)
+        SELECT
+            user_id,
+            visit_count,
+            messages_sent,
+            total_groups_joined,
+            flags_received,
+            now()
+        FROM counts
+        WHERE NOT EXISTS (
+            SELECT 1 FROM reporting_userstats
+            WHERE reporting_userstats.user_id = counts.user_id)
+        RETURNING user_id
+    )
+    SELECT (SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted)
+    """
+
+
+class UserStatsManager(models.Manager):
+    """Manager for the UserStats model"""
+    def increment(self, user_id, field, amount=1):
+        """Add `amount` to one of a user's statistics"""
+        updated = self.get_queryset().filter(user_id=user_id).update(
+            **{field: F(field) + amount})
+
+        # If the user has no statistics yet count everything from scratch,
+        # which will include the event being recorded. Removals are skipped as
+        # they may be part of the user themselves being deleted.
+        if not updated and amount > 0:
+            self.reconcile(user_ids=[user_id])
+
+    def increment_many(self, user_ids, field):
+        """Add 1 to one of the statistics of each user in `user_ids`
+
+        A user appearing more than once in `user_ids` is counted once for each
+        time they appear.
+        """
+        user_ids_by_amount = defaultdict(list)
+        for user_id, amount in Counter(user_ids).items():
+            user_ids_by_amount[amount].append(user_id)
+
+        counted = set(self.get_queryset().filter(
+            user_id__in=set(user_ids)).values_list('user_id', flat=True))
+        for amount, amount_user_ids in user_ids_by_amount.items():
+            self.get_queryset().filter(user_id__in=amount_user_ids).update(
+                **{field: F(field) + amount})
+
+        # Users without statistics are counted from scratch, as in `increment`
+        uncounted = set(user_ids) - counted
+        if uncounted:
+            self.reconcile(user_ids=uncounted)
+
+    def reconcile(self, user_ids=None):
+        """Recount the statistics of every user, or only those in `user_ids`"""
+        if user_ids is None:
+            filters = {
+                'visit_filter': '',
+                'message_filter': '',
+                'subscription_filter': '',
+                'flag_filter': '',
+                'user_filter': ''
+            }
+        else:
+            filters = {
+                'visit_filter': 'WHERE user_id = ANY(%(user_ids)s)',
+                'message_filter': 'WHERE sender_id = ANY(%(user_ids)s)',
+                'subscription_filter': 'WHERE user_id = ANY(%(user_ids)s)',
+                'flag_filter': 'WHERE message.sender_id = ANY(%(user_ids)s)',
+                'user_filter': 'WHERE users.id = ANY(%(user_ids)s)'
+            }
+
+        if settings.RETENTION_POLICIES['accounts.Visit']['days']:
+            filters['visit_count'] = (
+                'GREATEST(reporting_userstats.visit_count,'
+                ' counts.visit_count)')
+        else:
+            filters['visit_count'] = 'counts.visit_count'
+
+        query = RECONCILE_USER_STATS_SQL.format(**filters)
+        params = {'user_ids': list(user_ids or [])}
+        return _execute_upsert(query, params)
+
+
+class UserStats(models.Model):
+    """Activity statistics for a single user, used by the user report"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, primary_key=True, related_name='stats')
+    visit_count = models.IntegerField(default=0, db_index=True)
+    messages_sent = models.IntegerField(default=0, db_index=True)
+    total_groups_joined = models.IntegerField(default=0, db_index=True)
+    flags_received = models.IntegerField(default=0, db_index=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    objects = UserStatsManager()
+
+    def __unicode__(self):
+        """Unicode representation of the statistics."""
+        return u'Statistics for {user}'.format(user=self.user)
+
+
+# Recount the statistics of every group (or only those in `group_ids`), update
+# their existing `GroupStats` rows and insert the missing ones in a single
+# statement, returning the number of groups counted
+REFRESH_GROUP_STATS_SQL = """
+    WITH counts AS (
+        SELECT
+            groups.id AS group_id,
+            COALESCE(messages.total, 0) AS message_count,
+            COALESCE(threads.total, 0) AS thread_count,
+            COALESCE(messages.replies, 0) AS reply_count,
+            COALESCE(messages.posters, 0) AS posters,
+            COALESCE(members.total, 0) AS member_count,
+            COALESCE(owners.total, 0) AS owner_count
+        FROM groups_group groups
+        LEFT JOIN (
+            SELECT
+                thread.group_id,
+                COUNT(*) AS total,
+                SUM(CASE WHEN message.id != thread.first_message_id
+                    THEN 1 ELSE 0 END) AS replies,
+                COUNT(DISTINCT message.sender_id) AS posters
+            FROM connectmessages_message message
+            JOIN connectmessages_thread thread ON message.thread_id = thread.id
+            JOIN accounts_user sender ON message.sender_id = sender.id
+            WHERE message.status = 'approved' AND sender.is_banned <> TRUE
+            {thread_filter}
+            GROUP BY thread.group_id
+        ) messages ON messages.group_id = groups.id
+        LEFT JOIN (
+            SELECT thread.group_id, COUNT(*) AS total
+            FROM connectmessages_thread thread
+            JOIN connectmessages_message first_message
+                ON thread.first_message_id = first_message.id
+            JOIN accounts_user sender ON first_message.sender_id = sender.id
+            WHERE first_message.status = 'approved'
+                AND sender.is_banned <> TRUE
+            {thread_filter}
+            GROUP BY thread.group_id
+        ) threads ON threads.group_id = groups.id
+        LEFT JOIN (
+            SELECT user_groups.group_id, COUNT(*) AS total
+            FROM accounts_user_groups user_groups
+            JOIN accounts_user member ON user_groups.user_id = member.id
+            WHERE member.is_banned <> TRUE {member_filter}
+            GROUP BY user_groups.group_id
+        ) members ON members.group_id = groups.group_id
+        LEFT JOIN (
+            SELECT group_id, COUNT(*) AS total FROM groups_group_owners
+            {owner_filter} GROUP BY group_id
+        ) owners ON owners.group_id = groups.id
+        {group_filter}
+    ), updated AS (
+        UPDATE reporting_groupstats SET
+            message_count = counts.message_count,
+            thread_count = counts.thread_count,
+            reply_count = counts.reply_count,
+            posters = counts.posters,
+            member_count = counts.member_count,
+            owner_count = counts.owner_count,
+            refreshed_at = now(),
+            -- Keep the group stale if it changed after this refresh started
+            stale_since = CASE
+                WHEN reporting_groupstats.stale_since > now()
+                THEN reporting_groupstats.stale_since ELSE NULL END
+        FROM counts
+        WHERE reporting_groupstats.group_id = counts.group_id
+        RETURNING reporting_groupstats.group_id
+    ), inserted AS (
+        INSERT INTO reporting_groupstats (
+            group_id,
+            message_count,
+            thread_count,
+            reply_count,
+            posters,
+            member_count,
+            owner_count,
+            stale_since,
+            refreshed_at)
+        SELECT
+            group_id,
+            message_count,
+            thread_count,
+            reply_count,
+            posters,
+            member_count,
+            owner_count,
+            NULL,
+            now()
+        FROM counts
+        WHERE NOT EXISTS (
+            SELECT 1 FROM reporting_groupstats
+            WHERE reporting_groupstats.group_id = counts.group_id)
+        RETURNING group_id
+    )
+    SELECT (SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted)
+    """
+
+
+class GroupStatsManager(models.Manager):
+    """Manager for the GroupStats model"""
+    def mark_stale(self, group_ids):
+        """Flag the statistics of the groups in `group_ids` as out of date"""
+        return self.get_queryset().filter(
+            group_id__in=group_ids).update(stale_since=now())
+
+    def refresh(self, group_ids=None):
+        """Recount the statistics of every group, or only those in `group_ids`"""
+        if group_ids is None:
+            filters = {
+                'thread_filter': '',
+                'member_filter': '',
+                'owner_filter': '',
+                'group_filter': ''
+            }
+        else:
+            filters = {
+                'thread_filter': 'AND thread.group_id = ANY(%(group_ids)s)',
+                'member_filter': (
+                    'AND user_groups.group_id IN (SELECT group_id FROM'
+                    ' groups_group WHERE id = ANY(%(group_ids)s))'),
+                'owner_filter': 'WHERE group_id = ANY(%(group_ids)s)',
+                'group_filter': 'WHERE groups.id = ANY(%(group_ids)s)'
+            }
+
+        return _execute_upsert(
+            REFRESH_GROUP_STATS_SQL.format(**filters),
+            {'group_ids': list(group_ids or [])})
+
+    def refresh_stale(self):
+        """Recount the statistics of every group marked as stale"""
+        group_ids = list(self.get_queryset().filter(
+            stale_since__isnull=False).values_list('group_id', flat=True))
+        if not group_ids:
+            return 0
+        return self.refresh(group_ids=group_ids)
+
+
+class GroupStats(models.Model):
+    """Precomputed statistics for a single group, used by the group report"""
+    group = models.OneToOneField(
+        'groups.Group', primary_key=True, related_name='stats')
+    message_count = models.IntegerField(default=0, db_index=True)
+    thread_count = models.IntegerField(default=0, db_index=True)
+    reply_count = models.IntegerField(default=0, db_index=True)
+    posters = models.IntegerField(default=0, db_index=True)
+    member_count = models.IntegerField(default=0, db_index=True)
+    owner_count = models.IntegerField(default=0, db_index=True)
+    stale_since = models.DateTimeField(null=True, blank=True, db_index=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = GroupStatsManager()
+
+    def __unicode__(self):
+        """Unicode representation of the statistics."""
+        return u'Statistics for {group}'.format(group=self.group)
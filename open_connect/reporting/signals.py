@@ -0,0 +1,132 @@
+"""Signal handlers which keep user and group statistics up to date"""
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from open_connect.accounts import visits_recorded
+from open_connect.accounts.models import Visit
+from open_connect.connectmessages.models import Message, Thread
+from open_connect.groups import group_member_added, group_member_removed
+from open_connect.groups.models import Group
+from open_connect.notifications.models import Subscription
+from open_connect.reporting.models import GroupStats, UserStats
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_user_stats(sender, instance, created, **kwargs):
+    """Give every new user an empty set of statistics"""
+    # pylint: disable=unused-argument
+    if created and not kwargs.get('raw'):
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Visit)
+def count_visit(sender, instance, created, **kwargs):
+    """Count a new visit"""
+    # pylint: disable=unused-argument
+    if created and instance.user_id:
+        UserStats.objects.increment(instance.user_id, 'visit_count')
+
+
+@receiver(visits_recorded)
+def count_recorded_visits(sender, visits, **kwargs):
+    """Count visits saved in bulk"""
+    # pylint: disable=unused-argument
+    UserStats.objects.increment_many(
+        [visit.user_id for visit in visits if visit.user_id], 'visit_count')
+
+
+@receiver(post_save, sender=Message)
+def count_message(sender, instance, created, **kwargs):
+    """Count a newly sent message"""
+    # pylint: disable=unused-argument
+    if created:
+        UserStats.objects.increment(instance.sender_id, 'messages_sent')
+
+
+@receiver(post_delete, sender=Message)
+def uncount_message(sender, instance, **kwargs):
+    """Stop counting a deleted message"""
+    # pylint: disable=unused-argument
+    UserStats.objects.increment(instance.sender_id, 'messages_sent', -1)
+
+
+@receiver(m2m_changed, sender=Message.flags.through)
+def count_flags(sender, instance, action, pk_set, **kwargs):
+    """Count flags added to or removed from a message"""
+    # pylint: disable=unused-argument
+    if action == 'post_add' and pk_set:
+        UserStats.objects.increment(
+            instance.sender_id, 'flags_received', len(pk_set))
+    elif action == 'post_remove' and pk_set:
+        UserStats.objects.increment(
+            instance.sender_id, 'flags_received', -len(pk_set))
+
+
+@receiver(post_save, sender=Subscription)
+def count_subscription(sender, instance, created, **kwargs):
+    """Count a group the user has joined"""
+    # pylint: disable=unused-argument
+    if created:
+        UserStats.objects.increment(instance.user_id, 'total_groups_joined')
+
+
+@receiver(post_delete, sender=Subscription)
+def uncount_subscription(sender, instance, **kwargs):
+    """Stop counting a group the user has left"""
+    # pylint: disable=unused-argument
+    UserStats.objects.increment(
+        instance.user_id, 'total_groups_joined', -1)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    """Give every new group a set of statistics to be counted"""
+    # pylint: disable=unused-argument
+    if created and not kwargs.get('raw'):
+        GroupStats.objects.get_or_create(
+            group=instance, defaults={'stale_since': now()})
+
+
+@receiver(post_save, sender=Thread)
+def thread_changed(sender, instance, **kwargs):
+    """Recount a group when one of its threads changes"""
+    # pylint: disable=unused-argument
+    # Threads are saved whenever a message in them is posted, moderated or
+    # deleted, so this covers changes to the group's message counts.
+    if instance.group_id:
+        GroupStats.objects.mark_stale([instance.group_id])
+
+
+@receiver(group_member_added)
+@receiver(group_member_removed)
+def membership_changed(sender, group, **kwargs):
+    """Recount a group when a member joins or leaves"""
+    # pylint: disable=unused-argument
+    GroupStats.objects.mark_stale([group.pk])
+
+
+@receiver(post_save, sender=Message)
+def message_changed(sender, instance, created, **kwargs):
+    """Recount a group when one of its messages is moderated or flagged"""
+    # pylint: disable=unused-argument
+    # New messages are counted when their thread is saved
+    if not created:
+        GroupStats.objects.mark_stale(Thread.objects.filter(
+            pk=instance.thread_id).values_list('group_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Group.owners.through)
+def owners_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recount the groups whose owners have changed"""
+    # pylint: disable=unused-argument
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            GroupStats.objects.mark_stale([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        GroupStats.objects.mark_stale(pk_set)
+    elif action == 'pre_clear':
+        # Once cleared there is no way to tell which groups the user owned
+        GroupStats.objects.mark_stale(
+            list(instance.owned_groups_set.values_list('pk', flat=True)))
@@ -0,0 +1,111 @@
+"""Tasks for the reporting app."""
+# pylint: disable=not-callable
+import logging
+from tempfile import TemporaryFile
+
+from celery import shared_task
+from django.core.files import File
+from django.http import HttpRequest, QueryDict
+from django.utils.timezone import now
+
+from open_connect.connectmessages.tasks import send_system_message
+from open_connect.reporting.models import (
+    GroupStats, ReportExport, UserStats
+)
+from open_connect.reporting import utils
+
+
+LOGGER = logging.getLogger('reporting.tasks')
+
+
+def get_report_view(export):
+    """Set up the report view an export is generated from."""
+    from open_connect.reporting.views import REPORT_VIEWS
+    request = HttpRequest()
+    request.GET = QueryDict(export.query_string)
+    request.user = export.requested_by
+
+    view = REPORT_VIEWS[export.report]()
+    view.request = request
+    view.args = ()
+    view.kwargs = {}
+    return view
+
+
+def notify_export_ready(export, user):
+    """Send a user a message linking to a finished export."""
+    send_system_message.delay(
+        recipient=user.pk,
+        subject=u'Your {report} export is ready'.format(
+            report=export.get_report_display()),
+        message_content=(
+            u'The export you requested is ready. <a href="{link}">Click here'
+            u'</a> to download it.'.format(link=export.full_url))
+    )
+
+
+@shared_task()
+def run_report_export(export_id):
+    """Write a report export to storage and notify the requester."""
+    export = ReportExport.objects.select_related(
+        'requested_by').get(pk=export_id)
+    view = get_report_view(export)
+
+    export.status = 'running'
+    export.total_rows = view.get_queryset().count()
+    export.save()
+
+    try:
+        rows = 0
+        with TemporaryFile() as export_file:
+            for line in utils.stream_csv(
+                    view.export_headers, view.get_export_rows()):
+                export_file.write(line)
+                rows += 1
+                if rows % utils.EXPORT_CHUNK_SIZE == 0:
+                    ReportExport.objects.filter(pk=export.pk).update(
+                        rows_exported=rows - 1)
+
+            export_file.seek(0)
+            export.export_file.save(
+                view.export_filename, File(export_file), save=False)
+    except Exception:
+        export.status = 'failed'
+        export.save()
+        LOGGER.exception('Report export %s failed', export.pk)
+        raise
+
+    # The header line isn't a row of the report
+    export.rows_exported = rows - 1
+    export.status = 'complete'
+    export.completed_at = now()
+    export.save()
+    LOGGER.info(
+        'Exported %s rows of the %s report', export.rows_exported,
+        export.report)
+
+    notify_export_ready(export, export.requested_by)
+    for user in export.notify_users.exclude(pk=export.requested_by_id):
+        notify_export_ready(export, user)
+
+
+@shared_task()
+def reconcile_user_stats():
+    """Recount every user's statistics to correct any drift."""
+    reconciled = UserStats.objects.reconcile()
+    LOGGER.info('Reconciled statistics for %s users', reconciled)
+
+
+@shared_task()
+def refresh_stale_group_stats():
+    """Recount the statistics of groups which have changed."""
+    refreshed = GroupStats.objects.refresh_stale()
+    if refreshed:
+        LOGGER.info('Refreshed statistics for %s groups', refreshed)
+
+
+@shared_task()
+def rebuild_group_stats():
+    """Recount every group's statistics, including changes to banned users."""
+    refreshed = GroupStats.objects.refresh()
+    LOGGER.info('Rebuilt statistics for %s groups', refreshed)
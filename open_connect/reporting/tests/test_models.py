@@ -0,0 +1,192 @@
+"""Tests for reporting.models."""
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+from model_mommy import mommy
+
+from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.reporting.models import (
+    GroupStats, UserStats, normalize_export_query
+)
+
+
+class NormalizeExportQueryTest(TestCase):
+    """Tests for normalize_export_query."""
+    def test_normalize(self):
+        """Unused arguments should be removed and the rest sorted."""
+        self.assertEqual(
+            normalize_export_query('state=NY&export&page=3&order_by=email'),
+            'order_by=email&state=NY')
+        self.assertEqual(normalize_export_query('export=1'), '')
+
+
+class UserStatsTest(ConnectTestMixin, TestCase):
+    """Tests for keeping UserStats up to date."""
+    def setUp(self):
+        """Create a user with no activity."""
+        self.user = self.create_user()
+
+    def get_stats(self):
+        """Get the user's current statistics."""
+        return UserStats.objects.get(user=self.user)
+
+    def test_new_user_has_stats(self):
+        """New users should start with empty statistics."""
+        stats = self.get_stats()
+        self.assertEqual(stats.visit_count, 0)
+        self.assertEqual(stats.messages_sent, 0)
+        self.assertEqual(stats.total_groups_joined, 0)
+        self.assertEqual(stats.flags_received, 0)
+
+    def test_activity_is_counted(self):
+        """Visits, messages, groups and flags should update the stats."""
+        group = self.create_group()
+        thread = self.create_thread(sender=self.user, group=group)
+        mommy.make('accounts.Visit', user=self.user)
+        thread.message_set.get().flag(flagged_by=self.create_superuser())
+
+        stats = self.get_stats()
+        self.assertEqual(stats.visit_count, 1)
+        self.assertEqual(stats.messages_sent, 1)
+        self.assertEqual(stats.total_groups_joined, 1)
+        self.assertEqual(stats.flags_received, 1)
+
+        self.user.remove_from_group(group)
+        self.assertEqual(self.get_stats().total_groups_joined, 0)
+
+    def test_missing_stats_are_recounted(self):
+        """A user without stats should have everything counted."""
+        mommy.make('accounts.Visit', user=self.user)
+        UserStats.objects.filter(user=self.user).delete()
+
+        mommy.make('accounts.Visit', user=self.user)
+        self.assertEqual(self.get_stats().visit_count, 2)
+
+    def test_reconcile(self):
+        """Reconciling should correct any drift."""
+        mommy.make('accounts.Visit', user=self.user)
+        UserStats.objects.filter(user=self.user).update(
+            visit_count=10, messages_sent=3)
+
+        policies = {'accounts.Visit': {'field': 'created_at', 'days': 0}}
+        with self.settings(RETENTION_POLICIES=policies):
+            UserStats.objects.reconcile()
+
+        stats = self.get_stats()
+        self.assertEqual(stats.visit_count, 1)
+        self.assertEqual(stats.messages_sent, 0)
+        self.assertIsNotNone(stats.reconciled_at)
+
+    def test_reconcile_keeps_purged_visits(self):
+        """Purged visits shouldn't be taken off the user's visit count."""
+        mommy.make('accounts.Visit', user=self.user)
+        UserStats.objects.filter(user=self.user).update(visit_count=10)
+
+        policies = {'accounts.Visit': {'field': 'created_at', 'days': 365}}
+        with self.settings(RETENTION_POLICIES=policies):
+            UserStats.objects.reconcile()
+
+        self.assertEqual(self.get_stats().visit_count, 10)
+
+    def test_reconcile_some_users(self):
+        """Only the given users should be reconciled."""
+        other_user = self.create_user()
+        UserStats.objects.filter(
+            user__in=[self.user, other_user]).update(visit_count=10)
+
+        policies = {'accounts.Visit': {'field': 'created_at', 'days': 0}}
+        with self.settings(RETENTION_POLICIES=policies):
+            UserStats.objects.reconcile(user_ids=[self.user.pk])
+
+        self.assertEqual(self.get_stats().visit_count, 0)
+        self.assertEqual(
+            UserStats.objects.get(user=other_user).visit_count, 10)
+
+    def test_increment_many(self):
+        """Each user should be incremented once per appearance."""
+        other_user = self.create_user()
+        mommy.make('accounts.Visit', user=other_user)
+        UserStats.objects.filter(user=other_user).delete()
+
+        UserStats.objects.increment_many(
+            [self.user.pk, self.user.pk, other_user.pk], 'visit_count')
+
+        self.assertEqual(self.get_stats().visit_count, 2)
+        # Users without stats are recounted from the database
+        self.assertEqual(
+            UserStats.objects.get(user=other_user).visit_count, 1)
+
+
+class GroupStatsTest(ConnectTestMixin, TestCase):
+    """Tests for keeping GroupStats up to date."""
+    def setUp(self):
+        """Create a group with an owner, a member and a thread."""
+        self.group = self.create_group()
+        self.owner = self.create_user()
+        self.member = self.create_user()
+        self.group.owners.add(self.owner)
+        self.owner.add_to_group(self.group.pk)
+        self.thread = self.create_thread(sender=self.member, group=self.group)
+        mommy.make(
+            'connectmessages.Message', thread=self.thread, sender=self.owner)
+
+    def get_stats(self):
+        """Get the group's current statistics."""
+        return GroupStats.objects.get(group=self.group)
+
+    def test_new_group_is_stale(self):
+        """New groups should be counted at the next refresh."""
+        self.assertIsNotNone(self.get_stats().stale_since)
+
+    def test_refresh_stale(self):
+        """Refreshing stale groups should count everything."""
+        GroupStats.objects.refresh_stale()
+
+        stats = self.get_stats()
+        self.assertEqual(stats.message_count, 2)
+        self.assertEqual(stats.thread_count, 1)
+        self.assertEqual(stats.reply_count, 1)
+        self.assertEqual(stats.posters, 2)
+        self.assertEqual(stats.member_count, 2)
+        self.assertEqual(stats.owner_count, 1)
+        self.assertIsNone(stats.stale_since)
+        self.assertIsNotNone(stats.refreshed_at)
+
+    def test_changes_mark_group_stale(self):
+        """Messages, members and owners changing should mark stats stale."""
+        GroupStats.objects.refresh_stale()
+
+        self.create_user().add_to_group(self.group.pk)
+        self.assertIsNotNone(self.get_stats().stale_since)
+        GroupStats.objects.refresh_stale()
+        self.assertEqual(self.get_stats().member_count, 3)
+
+        self.group.owners.remove(self.owner)
+        self.assertIsNotNone(self.get_stats().stale_since)
+        GroupStats.objects.refresh_stale()
+        self.assertEqual(self.get_stats().owner_count, 0)
+
+        self.thread.first_message.flag(flagged_by=self.create_superuser())
+        self.assertIsNotNone(self.get_stats().stale_since)
+        GroupStats.objects.refresh_stale()
+        self.assertEqual(self.get_stats().thread_count, 0)
+
+    def test_refresh_keeps_later_changes_stale(self):
+        """Changes made after a refresh started should stay stale."""
+        GroupStats.objects.filter(group=self.group).update(
+            stale_since=now() + timedelta(minutes=1))
+
+        GroupStats.objects.refresh(group_ids=[self.group.pk])
+
+        self.assertIsNotNone(self.get_stats().stale_since)
+
+    def test_rebuild_command(self):
+        """The rebuild command should recount every group."""
+        GroupStats.objects.filter(group=self.group).update(
+            message_count=50, stale_since=None)
+
+        call_command('rebuild_group_stats')
+
+        self.assertEqual(self.get_stats().message_count, 2)
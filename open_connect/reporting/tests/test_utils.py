@@ -0,0 +1,24 @@
+"""Tests for reporting.utils."""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.reporting.utils import iterate_in_chunks
+
+
+class IterateInChunksTest(ConnectTestMixin, TestCase):
+    """Tests for iterate_in_chunks."""
+    def test_keeps_order(self):
+        """Objects should be yielded in the queryset's order."""
+        for _ in range(5):
+            self.create_user()
+        queryset = get_user_model().objects.order_by('-pk')
+
+        self.assertEqual(
+            [user.pk for user in iterate_in_chunks(queryset, chunk_size=2)],
+            list(queryset.values_list('pk', flat=True)))
+
+    def test_empty(self):
+        """An empty queryset should yield nothing."""
+        queryset = get_user_model().objects.none()
+        self.assertEqual(list(iterate_in_chunks(queryset, chunk_size=2)), [])
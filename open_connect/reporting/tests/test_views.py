@@ -1,24 +1,41 @@
 """Tests for reporting.views."""
 # pylint: disable=invalid-name
+from datetime import date
 import csv
 import io
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
-from django.test import Client, TestCase
+from django.test import Client, RequestFactory, TestCase
 from django.test.utils import override_settings
+from mock import patch
 from model_mommy import mommy
 from tablib import import_set
 
 from open_connect.connectmessages.tests import ConnectMessageTestCase
 from open_connect.connect_core.utils.basetests import ConnectTestMixin
+from open_connect.reporting import tasks
+from open_connect.reporting.models import (
+    GroupStats, ReportExport, UserStats
+)
 from open_connect.reporting.views import UserReportListView, GroupReportListView
 
 
 User = get_user_model()
 
 
+def run_export(client, url):
+    """Request an export and run the background job it queues."""
+    with patch('open_connect.reporting.views.run_report_export') as mock_run:
+        response = client.get(url)
+    export_id = mock_run.delay.call_args[0][0]
+    with patch.object(tasks, 'send_system_message'):
+        tasks.run_report_export(export_id)
+    export = ReportExport.objects.get(pk=export_id)
+    return response, export, export.export_file.read()
+
+
 class UserReportListViewTest(ConnectMessageTestCase):
     """Tests for UserReportListView."""
     def test_get_queryset(self):
@@ -62,22 +79,83 @@ class UserReportListViewTest(ConnectMessageTestCase):
         self.assertEqual(user.messages_sent, 2)
         self.assertEqual(user.visit_count, 1)
 
+    def test_order_by_stats(self):
+        """Users should be sortable by their statistics."""
+        user = mommy.make(User)
+        UserStats.objects.filter(user=user).update(visit_count=1000000)
+
+        view = UserReportListView()
+        view.request = self.request_factory.get(
+            '/', {'order_by': 'visit_count', 'sort': 'desc'})
+        self.assertEqual(view.get_queryset()[0], user)
+
     def test_export(self):
-        """If export is in query string, response should be a csv."""
-        response = self.client.get('%s?export' % reverse('users_report'))
-        self.assertEqual(
-            response['Content-Disposition'],
-            'attachment; filename=users.csv'
-        )
-        self.assertEqual(
-            response['Content-Type'],
-            'text/csv'
-        )
-        data = import_set(response.content)
+        """If export is in query string, a csv should be made by a job."""
+        response, export, content = run_export(
+            self.client, '%s?export' % reverse('users_report'))
+        self.assertRedirects(response, reverse('users_report'))
+        self.assertEqual(export.report, 'users')
+        self.assertEqual(export.status, 'complete')
+        self.assertTrue(export.export_file.name.endswith('users.csv'))
+        data = import_set(content)
         # There should be at least the header row and one user row
         self.assertGreater(data.height, 2)
         self.assertEqual(data.width, 14)
 
+    def test_export_in_chunks(self):
+        """The export should load users a chunk at a time."""
+        with patch('open_connect.reporting.utils.EXPORT_CHUNK_SIZE', 1):
+            _, export, content = run_export(
+                self.client, '%s?export' % reverse('users_report'))
+        data = import_set(content)
+        users = User.objects.exclude(
+            email=settings.SYSTEM_USER_EMAIL).count()
+        self.assertEqual(data.height, users)
+        self.assertEqual(export.total_rows, users)
+        self.assertEqual(export.rows_exported, users)
+
+    def test_repeated_export_is_reused(self):
+        """An identical export that recently finished should be reused."""
+        _, export, _ = run_export(
+            self.client, '%s?export&page=2' % reverse('users_report'))
+
+        with patch('open_connect.reporting.views.run_report_export') as run:
+            with patch.object(tasks, 'send_system_message') as mock_send:
+                self.client.get('%s?export' % reverse('users_report'))
+
+        self.assertFalse(run.delay.called)
+        self.assertIn(
+            export.full_url, mock_send.delay.call_args[1]['message_content'])
+
+    def test_running_export_is_reused(self):
+        """An identical export that hasn't finished should be reused."""
+        with patch('open_connect.reporting.views.run_report_export') as run:
+            self.client.get('%s?export' % reverse('users_report'))
+        export = ReportExport.objects.get(pk=run.delay.call_args[0][0])
+
+        other_user = User.objects.create_superuser(
+            username='reportexport@12ioavoi3.local', password='moo')
+        client = Client()
+        client.post(
+            reverse('account_login'),
+            {'login': 'reportexport@12ioavoi3.local', 'password': 'moo'})
+        with patch('open_connect.reporting.views.run_report_export') as run:
+            with patch.object(tasks, 'send_system_message') as mock_send:
+                client.get('%s?export&page=2' % reverse('users_report'))
+
+        self.assertFalse(run.delay.called)
+        self.assertFalse(mock_send.delay.called)
+        self.assertEqual(
+            list(export.notify_users.all()), [other_user])
+
+        # Both users should be sent the export once it is ready
+        with patch.object(tasks, 'send_system_message') as mock_send:
+            tasks.run_report_export(export.pk)
+        self.assertEqual(
+            sorted(call[1]['recipient']
+                   for call in mock_send.delay.call_args_list),
+            sorted([self.superuser.pk, other_user.pk]))
+
     def test_non_export(self):
         """If export is not in query string, response should be normal."""
         response = self.client.get(reverse('users_report'))
@@ -149,22 +227,16 @@ class GroupReportListViewTest(ConnectTestMixin, TestCase):
         member_two.add_to_group(group.pk)
 
         self.create_thread(sender=member_one, group=group)
+        GroupStats.objects.refresh_stale()
 
-        response = self.client.get(
+        _, _, content = run_export(
+            self.client,
             '{path}?export&search_name={group_name}'.format(
                 path=reverse('groups_report'), group_name=group.group.name))
-        self.assertEqual(
-            response['Content-Disposition'],
-            'attachment; filename=groups.csv'
-        )
-        self.assertEqual(
-            response['Content-Type'],
-            'text/csv'
-        )
 
         # We can use python's CSV parsing functionality by creating a CSV file
         # object and passing it to DictReader.
-        reader = csv.DictReader(io.StringIO(unicode(response.content)))
+        reader = csv.DictReader(io.StringIO(unicode(content)))
 
         # We can get the first row in the CSV (which should just be our group)
         # by using python's next() functionality.
@@ -182,6 +254,16 @@ class GroupReportListViewTest(ConnectTestMixin, TestCase):
         self.assertEqual(report['Private'], 'False')
         self.assertEqual(report['Threads'], '1')
 
+    def test_order_by_stats(self):
+        """Groups should be sortable by their statistics."""
+        group = self.create_group()
+        GroupStats.objects.filter(group=group).update(member_count=1000000)
+
+        view = GroupReportListView()
+        view.request = RequestFactory().get(
+            '/', {'order_by': 'member_count', 'sort': 'desc'})
+        self.assertEqual(view.get_queryset()[0], group)
+
     def test_non_export(self):
         """If export is not in query string, response should be normal."""
         response = self.client.get(reverse('groups_report'))
@@ -210,3 +292,98 @@ class GroupReportListViewTest(ConnectTestMixin, TestCase):
         response = self.client.get(
             reverse('groups_report'), {'search_name': 'Puppies'})
         self.assertEqual(response.context['search_name'], 'Puppies')
+
+
+class EmailReportListViewTest(ConnectTestMixin, TestCase):
+    """Tests for EmailReportListView."""
+    def setUp(self):
+        """Login the testcase as a superuser and create some rollups"""
+        self.login(self.create_superuser())
+        mommy.make(
+            'mailer.EmailOpenRollup', day=date(2015, 3, 2),
+            email_type='digest', breakdown='browser', value='Chrome 40',
+            opens=15, unique_opens=9)
+        mommy.make(
+            'mailer.EmailOpenRollup', day=date(2015, 3, 2),
+            email_type='immediate', breakdown='browser', value='Firefox 35',
+            opens=3, unique_opens=3)
+        mommy.make(
+            'mailer.EmailOpenRollup', day=date(2015, 3, 2),
+            email_type='digest', breakdown='device_family', value='Other',
+            opens=10, unique_opens=8)
+        mommy.make(
+            'mailer.EmailOpenRollup', day=date(2015, 3, 2),
+            email_type='digest', breakdown='device_family', value='iPhone',
+            opens=5, unique_opens=4)
+        mommy.make(
+            'mailer.EmailOpenRollup', day=date(2015, 3, 2),
+            email_type='immediate', breakdown='device_family', value='Other',
+            opens=3, unique_opens=3)
+
+    def test_export(self):
+        """Opens should be reported by day, email type and browser."""
+        response = self.client.get(reverse('emails_report'), {
+            'export': 1, 'start': '2015-03-01', 'end': '2015-03-03',
+            'email_type': 'digest'})
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename=emails.csv'
+        )
+
+        reader = csv.DictReader(
+            io.StringIO(unicode(''.join(response.streaming_content))))
+        rows = list(reader)
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['Browser'], 'Chrome 40')
+        self.assertEqual(rows[0]['Opens'], '15')
+        self.assertEqual(rows[0]['Unique Opens'], '9')
+
+    def test_non_export(self):
+        """If export is not in query string, response should be normal."""
+        response = self.client.get(reverse('emails_report'), {
+            'start': '2015-03-01', 'end': '2015-03-03',
+            'breakdown': 'device_family'})
+        self.assertEqual(
+            response.templates[0].name,
+            'email_report.html'
+        )
+        self.assertEqual(response.context['breakdown'], 'device_family')
+        self.assertContains(response, 'iPhone')
+        self.assertEqual(len(response.context['rows']), 3)
+
+    def test_requires_permission(self):
+        """Users without the report permission should be redirected."""
+        self.login(self.create_user())
+        response = self.client.get(reverse('emails_report'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ReportExportDownloadViewTest(ConnectTestMixin, TestCase):
+    """Tests for ReportExportDownloadView."""
+    def setUp(self):
+        """Create an export to download"""
+        self.export = mommy.make(
+            ReportExport, report='users', status='complete',
+            export_file='reports/users.csv')
+
+    def test_redirects_to_file(self):
+        """Users with the report permission should get the file."""
+        self.login(self.create_superuser())
+        response = self.client.get(self.export.get_absolute_url())
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('reports/users.csv', response['Location'])
+
+    def test_requires_permission(self):
+        """Users without the report permission should be forbidden."""
+        self.login(self.create_user())
+        response = self.client.get(self.export.get_absolute_url())
+        self.assertEqual(response.status_code, 403)
+
+    def test_unfinished_export(self):
+        """Exports that haven't finished can't be downloaded."""
+        self.export.status = 'running'
+        self.export.save()
+        self.login(self.create_superuser())
+        response = self.client.get(self.export.get_absolute_url())
+        self.assertEqual(response.status_code, 404)
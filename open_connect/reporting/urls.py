@@ -16,4 +16,11 @@ urlpatterns = patterns(
         permission_required('accounts.can_view_group_report')(
             views.GroupReportListView.as_view()),
         name='groups_report'),
+    url(r'^emails/$',
+        permission_required('mailer.can_view_email_report')(
+            views.EmailReportListView.as_view()),
+        name='emails_report'),
+    url(r'^exports/(?P<pk>\d+)/$',
+        views.ReportExportDownloadView.as_view(),
+        name='report_export_download'),
 )
@@ -0,0 +1,89 @@
+"""Utilities for the reporting app."""
+import csv
+from itertools import islice
+import uuid
+
+from django.db import connections
+from django.db.models.sql.datastructures import EmptyResultSet
+
+# Number of objects to load from the database at a time when exporting
+EXPORT_CHUNK_SIZE = 1000
+
+
+class Echo(object):
+    """File-like object which returns whatever is written to it."""
+    # pylint: disable=no-self-use
+    def write(self, value):
+        """Return the value instead of storing it."""
+        return value
+
+
+def export_value(value):
+    """Convert a value into a UTF-8 string for the CSV writer."""
+    if value is None:
+        return ''
+    return unicode(value).encode('utf-8')
+
+
+def iterate_rows(queryset, chunk_size):
+    """
+    Yield every row of a `values_list` queryset from a server-side cursor
+
+    On PostgreSQL the rows are read through a named cursor, `chunk_size` rows
+    at a time, so they're never all held in memory. The cursor is declared
+    `WITH HOLD` so that it survives the caller committing (such as an export
+    saving its progress) while the rows are being read.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        for row in queryset.iterator():
+            yield row
+        return
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return
+    connection.ensure_connection()
+    cursor = connection.connection.cursor(
+        name='export_{id}'.format(id=uuid.uuid4().hex), withhold=True)
+    try:
+        cursor.itersize = chunk_size
+        cursor.execute(sql, params)
+        for row in cursor:
+            yield row
+    finally:
+        cursor.close()
+
+
+def iterate_in_chunks(queryset, chunk_size=None):
+    """
+    Yield every object in a queryset, loading a chunk of objects at a time
+
+    The primary keys of the (ordered) queryset are read from a server-side
+    cursor, and the objects themselves, along with any extra columns and
+    prefetches, are loaded one chunk at a time as the caller consumes them.
+    """
+    if chunk_size is None:
+        chunk_size = EXPORT_CHUNK_SIZE
+    # Annotations are selected alongside the primary key in case the queryset
+    # is ordered by one of them
+    rows = iterate_rows(queryset.values_list(
+        'pk', *queryset.query.annotations.keys()), chunk_size)
+    while True:
+        chunk = [row[0] for row in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        objects = {
+            obj.pk: obj for obj in queryset.filter(pk__in=chunk).order_by()}
+        for pk in chunk:
+            if pk in objects:
+                yield objects[pk]
+
+
+def stream_csv(headers, rows):
+    """Yield each line of a CSV file with the given headers and rows."""
+    writer = csv.writer(Echo())
+    yield writer.writerow([export_value(value) for value in headers])
+    for row in rows:
+        yield writer.writerow([export_value(value) for value in row])
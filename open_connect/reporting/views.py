@@ -1,24 +1,111 @@
 """Views for generating reports."""
+from datetime import timedelta
+
+from django.contrib import messages
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum, Q
-from django.http import HttpResponse
-from django.views.generic import ListView
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, Q
+from django.http import (
+    Http404, HttpResponseForbidden, HttpResponseRedirect,
+    StreamingHttpResponse
+)
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from django.utils.timezone import now
+from django.views.generic import ListView, RedirectView
 from pure_pagination import PaginationMixin
-from tablib import Dataset
 
 from open_connect.accounts.views import SuppressSystemUserMixin
 from open_connect.groups.models import Group
 from open_connect.groups.utils import groups_tags_string
+from open_connect.mailer.models import (
+    EMAIL_OPEN_BREAKDOWNS, EmailOpenRollup
+)
 from open_connect.connect_core.utils.mixins import (
     SortableListMixin,
     DateTimeRangeListMixin,
     PaginateByMixin
 )
 from open_connect.connect_core.utils.views import CommonViewMixin
+from open_connect.reporting.models import (
+    ReportExport, normalize_export_query
+)
+from open_connect.reporting.tasks import notify_export_ready, run_report_export
+from open_connect.reporting.utils import iterate_in_chunks, stream_csv
+
+
+class CSVExportMixin(object):
+    """
+    Export the view's report as a CSV file if `export` is requested.
+
+    Views must define an `export_row` method which returns the row of the
+    export for a single object. If `export_report` is set the export is
+    generated in the background and the user is sent a message when it is
+    ready, otherwise it is streamed.
+    """
+    export_filename = 'export.csv'
+    export_headers = ()
+    export_report = None
+    export_row = None
+
+    def get_export_objects(self):
+        """The objects to export, loaded a chunk at a time."""
+        return iterate_in_chunks(self.get_queryset())
+
+    def get_export_rows(self):
+        """Every row of the export."""
+        if self.export_row is None:
+            raise ImproperlyConfigured(
+                '{view} must define export_row'.format(
+                    view=self.__class__.__name__))
+        for obj in self.get_export_objects():
+            yield self.export_row(obj)
+
+    def render_to_response(self, context, **response_kwargs):
+        """If exporting, stream a csv."""
+        if 'export' in self.request.GET and self.export_report:
+            return self.request_export()
+        elif 'export' in self.request.GET:
+            response = StreamingHttpResponse(
+                stream_csv(self.export_headers, self.get_export_rows()),
+                content_type='text/csv'
+            )
+            response['Content-Disposition'] = (
+                'attachment; filename=%s' % self.export_filename)
+            return response
+        else:
+            return super(CSVExportMixin, self).render_to_response(
+                context, **response_kwargs)
+
+    def request_export(self):
+        """Queue a background export and send the user back to the report."""
+        query_string = self.request.GET.urlencode()
+        export, created = ReportExport.objects.request_export(
+            self.export_report, query_string, self.request.user)
+        if created:
+            run_report_export.delay(export.pk)
+        elif export.status == 'complete':
+            notify_export_ready(export, self.request.user)
+        elif export.requested_by_id != self.request.user.pk:
+            export.notify_users.add(self.request.user)
+            # The export may have finished before the user was added, in which
+            # case they won't be included by the job
+            if ReportExport.objects.filter(
+                    pk=export.pk, status='complete').exists():
+                notify_export_ready(export, self.request.user)
+
+        messages.success(
+            self.request,
+            'Your export is being prepared. You will be sent a message with a'
+            ' link to download it when it is ready.')
+        return HttpResponseRedirect(u'{path}?{query}'.format(
+            path=self.request.path,
+            query=normalize_export_query(query_string)))
 
 
 class UserReportListView(
-        SuppressSystemUserMixin, PaginationMixin, PaginateByMixin,
+        CSVExportMixin, SuppressSystemUserMixin, PaginationMixin,
+        PaginateByMixin,
         DateTimeRangeListMixin, SortableListMixin, CommonViewMixin, ListView):
     """View for reporting on users."""
     model = get_user_model()
@@ -35,34 +122,25 @@ class UserReportListView(
     dd_active_item = 'User Report'
     paginate_by = 25
     context_object_name = 'users'
+    export_filename = 'users.csv'
+    export_report = 'users'
+    export_headers = (
+        u'Name', u'Email', u'Phone', u'Zip', u'State', u'Joined',
+        u'Last login', u'Total Groups Joined',
+        u'Flags received', u'Messages sent', u'Staff?', u'Superuser?',
+        u'Banned?', u'Visits'
+    )
 
     def get_queryset(self):
         """Update the queryset with some annotations."""
-        # Using annotate() on this query will result in a GROUP_BY of all
-        # the columns returned. This causes a huge hit on performance, so we
-        # need to fall back to the Django ORM's `extra()` functionality.
-        queryset = super(UserReportListView, self).get_queryset().extra(
-            select={
-                'visit_count': "SELECT COUNT(*) FROM accounts_visit visit "
-                               "WHERE visit.user_id = accounts_user.id",
-
-                'messages_sent': "SELECT COUNT(*) FROM "
-                                 "connectmessages_message messages WHERE "
-                                 "messages.sender_id = accounts_user.id",
-
-                'total_groups_joined': "SELECT COUNT(*) FROM "
-                                       "notifications_subscription "
-                                       "subscriptions WHERE "
-                                       "subscriptions.user_id = "
-                                       "accounts_user.id",
-
-                'flags_received': "SELECT COUNT(message_flags.id) FROM "
-                                  "connectmessages_message messages LEFT JOIN "
-                                  "connectmessages_message_flags "
-                                  "message_flags ON message_flags.message_id "
-                                  "= messages.id WHERE messages.sender_id = "
-                                  "accounts_user.id"
-            }
+        # The counts are kept up to date in `UserStats` so that the report
+        # can be sorted on their indexes without counting anything. Every
+        # user has a `UserStats` row from the moment they are created.
+        queryset = super(UserReportListView, self).get_queryset().annotate(
+            visit_count=F('stats__visit_count'),
+            messages_sent=F('stats__messages_sent'),
+            total_groups_joined=F('stats__total_groups_joined'),
+            flags_received=F('stats__flags_received')
         ).defer('biography').defer('image')
 
         search = self.request.GET.get('search', False)
@@ -80,40 +158,20 @@ class UserReportListView(
         context['search'] = self.request.GET.get('search', False)
         return context
 
-    def render_to_response(self, context, **response_kwargs):
-        """If exporting, generate a csv."""
-        if 'export' in self.request.GET:
-            data = Dataset()
-            data.headers = (
-                u'Name', u'Email', u'Phone', u'Zip', u'State', u'Joined',
-                u'Last login', u'Total Groups Joined',
-                u'Flags received', u'Messages sent', u'Staff?', u'Superuser?',
-                u'Banned?', u'Visits'
-            )
-
-            for user in self.get_queryset():
-                data.append((
-                    user.get_real_name(), user.email, user.phone, user.zip_code,
-                    user.state, user.date_joined, user.last_login,
-                    user.total_groups_joined, user.flags_received,
-                    user.messages_sent, user.is_staff, user.is_superuser,
-                    user.is_banned, user.visit_count
-                ))
-
-            response = HttpResponse(
-                data.csv,
-                content_type='text/csv'
-            )
-            response['Content-Disposition'] = 'attachment; filename=users.csv'
-            return response
-        else:
-            return super(UserReportListView, self).render_to_response(
-                context, **response_kwargs)
+    def export_row(self, user):
+        """The row of the export for a single user."""
+        return (
+            user.get_real_name(), user.email, user.phone, user.zip_code,
+            user.state, user.date_joined, user.last_login,
+            user.total_groups_joined, user.flags_received,
+            user.messages_sent, user.is_staff, user.is_superuser,
+            user.is_banned, user.visit_count
+        )
 
 
 class GroupReportListView(
-        PaginationMixin, PaginateByMixin, DateTimeRangeListMixin,
-        SortableListMixin, CommonViewMixin, ListView):
+        CSVExportMixin, PaginationMixin, PaginateByMixin,
+        DateTimeRangeListMixin, SortableListMixin, CommonViewMixin, ListView):
     """View for reporting on groups."""
     model = Group
     template_name = 'group_report.html'
@@ -125,47 +183,28 @@ class GroupReportListView(
     ]
     paginate_by = 25
     context_object_name = 'groups'
+    export_filename = 'groups.csv'
+    export_report = 'groups'
+    export_headers = (
+        'Name', 'Messages', 'Threads', 'Replies', 'Posters',
+        'Category', 'Tags', 'State', 'Members', 'Admins', 'Private',
+        'Published', 'Moderated', 'Featured', 'Member list published',
+        'Created', 'Created By'
+    )
 
     def get_queryset(self):
         """Update the queryset with some annotations."""
-        # Using annotate() on this query will result in a GROUP_BY of all
-        # the columns returned. This causes a huge hit on performance, so we
-        # need to fall back to the Django ORM's `extra()` functionality.
-        queryset = super(GroupReportListView, self).get_queryset().extra(
-            select={
-                'reply_count': "SELECT COUNT(*) from connectmessages_message "
-                               "m JOIN connectmessages_thread t ON "
-                               "m.thread_id = t.id  JOIN accounts_user u ON "
-                               "m.sender_id = u.id WHERE t.group_id = "
-                               "groups_group.id AND m.id != t.first_message_id "
-                               "AND u.is_banned <> TRUE AND m.status = "
-                               "'approved'",
-                'thread_count': "SELECT COUNT(*) from connectmessages_thread t "
-                                "JOIN connectmessages_message fm ON "
-                                "t.first_message_id = fm.id JOIN "
-                                "accounts_user firstsender ON fm.sender_id = "
-                                "firstsender.id WHERE fm.status = 'approved' "
-                                "AND firstsender.is_banned <> TRUE AND "
-                                "t.group_id = groups_group.id",
-                'message_count': "SELECT COUNT(*) from connectmessages_message "
-                                 "m JOIN connectmessages_thread t ON "
-                                 "m.thread_id = t.id JOIN accounts_user u ON "
-                                 "m.sender_id = u.id WHERE t.group_id = "
-                                 "groups_group.id AND u.is_banned <> TRUE AND "
-                                 "m.status = 'approved'",
-                'posters': "SELECT COUNT(DISTINCT au.id) from "
-                           "connectmessages_message m JOIN "
-                           "connectmessages_thread t ON m.thread_id = t.id "
-                           "JOIN accounts_user au ON m.sender_id = au.id "
-                           "WHERE t.group_id = groups_group.id AND "
-                           "au.is_banned <> TRUE AND m.status = 'approved'",
-                'member_count': "SELECT COUNT(*) from accounts_user_groups aug "
-                                "JOIN accounts_user au ON aug.user_id = au.id "
-                                "WHERE aug.group_id = groups_group.group_id "
-                                "AND au.is_banned <> TRUE",
-                'owner_count': "SELECT COUNT(*) from groups_group_owners go "
-                               "WHERE go.group_id = groups_group.id"
-            }
+        # The counts are maintained in GroupStats rather than calculated for
+        # every group on every page view, so the report can be sorted on their
+        # indexes. Every group has a `GroupStats` row from the moment it is
+        # created.
+        queryset = super(GroupReportListView, self).get_queryset().annotate(
+            message_count=F('stats__message_count'),
+            thread_count=F('stats__thread_count'),
+            reply_count=F('stats__reply_count'),
+            posters=F('stats__posters'),
+            member_count=F('stats__member_count'),
+            owner_count=F('stats__owner_count')
         ).only(
             "group__name", "category__name", "state", "private", "published",
             "moderated", "featured", "member_list_published", "created_at",
@@ -187,34 +226,108 @@ class GroupReportListView(
         context['search_name'] = self.request.GET.get('search_name', False)
         return context
 
-    def render_to_response(self, context, **response_kwargs):
-        """If exporting, generate a csv."""
-        if 'export' in self.request.GET:
-            data = Dataset()
-            data.headers = (
-                'Name', 'Messages', 'Threads', 'Replies', 'Posters',
-                'Category', 'Tags', 'State', 'Members', 'Admins', 'Private',
-                'Published', 'Moderated', 'Featured', 'Member list published',
-                'Created', 'Created By'
-            )
+    def export_row(self, group):
+        """The row of the export for a single group."""
+        return (
+            group.group.name, group.message_count, group.thread_count,
+            group.reply_count, group.posters,
+            group.category.name, groups_tags_string([group]),
+            group.state, group.member_count, group.owner_count,
+            group.private, group.published, group.moderated,
+            group.featured, group.member_list_published,
+            group.created_at, group.created_by
+        )
 
-            for group in self.get_queryset():
-                data.append((
-                    group.group.name, group.message_count, group.thread_count,
-                    group.reply_count, group.posters,
-                    group.category.name, groups_tags_string([group]),
-                    group.state, group.member_count, group.owner_count,
-                    group.private, group.published, group.moderated,
-                    group.featured, group.member_list_published,
-                    group.created_at, group.created_by
-                ))
-
-            response = HttpResponse(
-                data.csv,
-                content_type='text/csv'
-            )
-            response['Content-Disposition'] = 'attachment; filename=groups.csv'
-            return response
-        else:
-            return super(GroupReportListView, self).render_to_response(
-                context, **response_kwargs)
+
+class EmailReportListView(
+        CSVExportMixin, PaginationMixin, PaginateByMixin, CommonViewMixin,
+        ListView):
+    """View for reporting on email opens from the daily rollup."""
+    model = EmailOpenRollup
+    template_name = 'email_report.html'
+    breakdowns = [breakdown for breakdown, _ in EMAIL_OPEN_BREAKDOWNS]
+    default_days = 30
+    nav_active_item = 'Admin'
+    dd_active_item = 'Email Report'
+    paginate_by = 25
+    context_object_name = 'rows'
+    export_filename = 'emails.csv'
+
+    def get_breakdown(self):
+        """The client attribute opens are broken down by."""
+        breakdown = self.request.GET.get('breakdown')
+        if breakdown in self.breakdowns:
+            return breakdown
+        return self.breakdowns[0]
+
+    def get_date_range(self):
+        """The first and last day of the report."""
+        end = parse_date(self.request.GET.get('end', '')) or now().date()
+        start = parse_date(self.request.GET.get('start', '')) or (
+            end - timedelta(days=self.default_days))
+        return start, end
+
+    def get_queryset(self):
+        """The rollup rows for each day and email type in the breakdown."""
+        start, end = self.get_date_range()
+        queryset = EmailOpenRollup.objects.filter(
+            day__gte=start, day__lte=end, breakdown=self.get_breakdown())
+
+        email_type = self.request.GET.get('email_type')
+        if email_type:
+            queryset = queryset.filter(email_type=email_type)
+
+        return queryset.order_by('-day', 'email_type', '-opens')
+
+    def get_context_data(self, **kwargs):
+        """Pass in extra context to the view"""
+        context = super(EmailReportListView, self).get_context_data(**kwargs)
+        context['start'], context['end'] = self.get_date_range()
+        context['breakdown'] = self.get_breakdown()
+        context['breakdowns'] = self.breakdowns
+        context['email_type'] = self.request.GET.get('email_type', '')
+        context['email_types'] = EmailOpenRollup.objects.values_list(
+            'email_type', flat=True).distinct().order_by('email_type')
+        return context
+
+    @property
+    def export_headers(self):
+        """The header row of the export."""
+        breakdown = self.get_breakdown().replace('_', ' ').title()
+        return ('Day', 'Email Type', breakdown, 'Opens', 'Unique Opens')
+
+    def get_export_objects(self):
+        """The rollup is small and can be read straight from the query."""
+        return self.get_queryset().iterator()
+
+    def export_row(self, row):
+        """The row of the export for a single day and breakdown."""
+        return (
+            row.day, row.email_type, row.value, row.opens, row.unique_opens)
+
+
+class ReportExportDownloadView(RedirectView):
+    """Direct a user to a finished report export."""
+    permanent = False
+    export = None
+
+    def get(self, request, *args, **kwargs):
+        """Method to handle GET Http Requests to ReportExportDownloadView"""
+        self.export = get_object_or_404(ReportExport, pk=self.kwargs['pk'])
+        if not self.export.user_can_download(request.user):
+            return HttpResponseForbidden()
+        if self.export.status != 'complete':
+            raise Http404
+        return super(ReportExportDownloadView, self).get(
+            request, *args, **kwargs)
+
+    def get_redirect_url(self, *args, **kwargs):
+        """Returns the url of the export file."""
+        return self.export.export_file.url
+
+
+# The views that generate each report that can be exported in the background
+REPORT_VIEWS = {
+    'users': UserReportListView,
+    'groups': GroupReportListView,
+}
@@ -85,7 +85,8 @@ class ResourceListView(ListView):
         query = self.request.GET.get('query', None)
         group_id = self.request.GET.get('group_id', None)
         file_type = self.request.GET.get('file_type', None)
-        queryset = queryset.filter(groups__in=self.request.user.groups_joined)
+        queryset = queryset.filter(
+            groups__in=self.request.user.joined_group_ids)
         if query:
             queryset = queryset.filter(
                 Q(name__icontains=query)